@@ -1,47 +1,117 @@
-import json
-import os
-from typing import List, Dict, Any
-from openai import OpenAI
+import asyncio
+import contextlib
+import inspect
+import logging
+import time
+from typing import List, Dict, Any, AsyncIterator, Optional, Tuple
 import google.generativeai as genai
 from app.models import (
     PatientData, CaregiverInput, RoutingDecision, 
     AgentResponse, AgentType, EditableForm, FormField
 )
+from app.llm_executor import run_blocking
+from app.llm_cache import get_llm_cache, make_cache_key
+from app.single_flight import SingleFlight
+from app.rate_limiter import get_rate_limiter, estimate_tokens, RateLimitTimeout
+from app.circuit_breaker import get_circuit_breaker, CircuitOpenError
+from app.fake_llm import FAKE_MODEL_NAME
+from app.llm_clients import get_llm_clients
+from app.metrics import get_metrics, timed
+from app.tracing import set_attribute, traced
+from app.logging_config import log_payload
+from app.llm_recorder import get_llm_recorder, replay_enabled
+from app.hedging import create_hedging_policy
+from app import deadline
+from app.structured_output import (
+    AGENT_PARSERS, ROUTING_PARSER, PACKED_ROUTING_PARSER, PACKED_ROUTING_RESPONSE_PARSER, COMBINED_PARSER,
+    STRUCTURED_DATA_FIELDS, RoutingOutput, StructuredOutputError, StructuredOutputParser, load_json, parse_agent_output,
+    parse_packed_routing, validate_agent_output
+)
+
+logger = logging.getLogger(__name__)
+
+# Bump when prompt wording changes so cached responses from old prompts are not reused
+PROMPT_TEMPLATE_VERSION = "2024.3"
+
+GOOGLE_MODEL_NAME = "gemini-1.5-flash"
+# Structured outputs (response_format json_schema) need gpt-4o-mini or newer
+OPENAI_MODEL_NAME = "gpt-4o-mini"
+
+def _google_config_parameters() -> set:
+    """GenerationConfig fields the installed Gemini SDK accepts (JSON mode and schemas need newer SDKs)."""
+    try:
+        return set(inspect.signature(genai.GenerationConfig).parameters)
+    except (AttributeError, TypeError, ValueError):
+        return set()
+
+_GOOGLE_CONFIG_PARAMETERS = _google_config_parameters()
+
+def _google_json_mode_kwargs(parser: Optional[StructuredOutputParser] = None) -> Dict[str, Any]:
+    """generate_content kwargs requesting JSON output (constrained to the parser's schema where supported)."""
+    if "response_mime_type" not in _GOOGLE_CONFIG_PARAMETERS:
+        return {}
+    config = {"response_mime_type": "application/json"}
+    if parser is not None and "response_schema" in _GOOGLE_CONFIG_PARAMETERS:
+        config["response_schema"] = parser.inline_schema()
+    return {"generation_config": genai.GenerationConfig(**config)}
+
+def _openai_response_format(parser: Optional[StructuredOutputParser] = None) -> Dict[str, Any]:
+    """OpenAI response_format: the parser's JSON schema, or plain JSON mode when the call has no schema."""
+    if parser is None:
+        return {"type": "json_object"}
+    return {"type": "json_schema", "json_schema": {"name": parser.name, "schema": parser.json_schema, "strict": False}}
+
+def _looks_like_json(text: str) -> bool:
+    """Whether a response parses as JSON, after local repair (used to pick the winning hedged response)."""
+    try:
+        load_json(text)
+        return True
+    except StructuredOutputError:
+        return False
 
 class AIService:
     def __init__(self):
-        # Try to initialize Google AI Studio first, then OpenAI as fallback
+        # Initialize every configured provider; Google AI Studio is primary, OpenAI the fallback
         self.ai_provider = None
         self.client = None
-        
-        # Check for Google AI Studio API key
-        google_api_key = os.getenv("GOOGLE_AI_API_KEY")
-        if google_api_key:
+        self.model_name = None
+        self.clients: Dict[str, Any] = {}
+        self.model_names: Dict[str, str] = {}
+        self.inflight_requests = SingleFlight()
+        self.hedging = create_hedging_policy()
+        
+        # Clients come from the process-wide registry, shared with nurse ranking
+        registry = get_llm_clients()
+        model_names = {"fake": FAKE_MODEL_NAME, "google": GOOGLE_MODEL_NAME, "openai": OPENAI_MODEL_NAME}
+        for provider in registry.providers():
             try:
-                genai.configure(api_key=google_api_key)
-                self.client = genai.GenerativeModel('gemini-1.5-flash')
-                self.ai_provider = "google"
-                print("✅ Using Google AI Studio (Gemini) for AI features")
+                self.clients[provider] = registry.get_client(provider, model_names[provider])
+                self.model_names[provider] = model_names[provider]
             except Exception as e:
-                print(f"⚠️  Google AI Studio initialization failed: {e}")
-        
-        # Fallback to OpenAI if Google AI not available
-        if not self.client:
-            openai_api_key = os.getenv("OPENAI_API_KEY")
-            if openai_api_key:
-                try:
-                    self.client = OpenAI(api_key=openai_api_key)
-                    self.ai_provider = "openai"
-                    print("✅ Using OpenAI for AI features")
-                except Exception as e:
-                    print(f"⚠️  OpenAI initialization failed: {e}")
-        
-        # If neither API is available
-        if not self.client:
-            self.ai_provider = None
-            print("⚠️  Warning: No AI API key configured. Using fallback logic.")
-            print("   Set GOOGLE_AI_API_KEY or OPENAI_API_KEY for full AI features.")
+                logger.warning(f"⚠️ {provider} initialization failed: {e}")
+        
+        if "fake" in self.clients:
+            # Offline load/latency testing: a deterministic local stand-in replaces the real providers
+            logger.info("🧪 Using local fake LLM provider (LLM_FAKE_PROVIDER=true)")
+        elif "google" in self.clients:
+            logger.info("✅ Using Google AI Studio (Gemini) for AI features")
+            if "openai" in self.clients:
+                logger.info("✅ OpenAI configured as alternate AI provider")
+        elif "openai" in self.clients:
+            # OpenAI is primary when Google AI is not available, otherwise the alternate for failover/hedging
+            logger.info("✅ Using OpenAI for AI features")
+        
+        if self.clients:
+            self.ai_provider = next(iter(self.clients))
+            self.client = self.clients[self.ai_provider]
+            self.model_name = self.model_names[self.ai_provider]
+        else:
+            # If neither API is available
+            logger.warning("⚠️ No AI API key configured, using fallback logic. "
+                           "Set GOOGLE_AI_API_KEY or OPENAI_API_KEY for full AI features.")
     
+    @traced("route_patient")
+    @timed("routing")
     async def route_patient(self, patient_data, caregiver_input: CaregiverInput) -> RoutingDecision:
         """Use AI to determine which agents should handle this patient case."""
         
@@ -108,42 +178,145 @@ class AIService:
         """
         
         try:
-            response = await self._call_ai(prompt)
-            print(f"🤖 AI Response received: {response[:200]}...")  # Debug log
-            
-            # Clean the response to extract JSON
-            cleaned_response = response.strip()
-            if cleaned_response.startswith('```json'):
-                cleaned_response = cleaned_response[7:]
-            if cleaned_response.endswith('```'):
-                cleaned_response = cleaned_response[:-3]
-            cleaned_response = cleaned_response.strip()
+            response = await self._call_ai(prompt, ROUTING_PARSER)
+            log_payload(logger, "🤖 AI routing response received", response, patient_id=patient_data.patient_id)
             
-            result = json.loads(cleaned_response)
+            # Parse against the routing schema (with local repair of near-JSON)
+            routing_decision = self._routing_decision(patient_data.patient_id, ROUTING_PARSER.parse(response))
             
-            # Validate required fields
-            if not all(key in result for key in ["recommended_agents", "reasoning", "priority_score", "estimated_timeline"]):
-                raise ValueError("Missing required fields in AI response")
+            logger.debug(f"✅ AI routing successful: {routing_decision.recommended_agents}")
             
-            print(f"✅ AI routing successful: {result['recommended_agents']}")
-            
-            return RoutingDecision(
-                patient_id=patient_data.patient_id,
-                recommended_agents=[AgentType(agent.lower()) for agent in result["recommended_agents"]],
-                reasoning=result["reasoning"],
-                priority_score=result["priority_score"],
-                estimated_timeline=result["estimated_timeline"]
-            )
-        except json.JSONDecodeError as e:
-            print(f"❌ JSON parsing error: {e}")
-            print(f"Raw AI response: {response}")
+            return routing_decision
+        except StructuredOutputError as e:
+            logger.warning(f"❌ Routing output error: {e}")
+            log_payload(logger, "Raw AI routing response", response, level=logging.WARNING,
+                        patient_id=patient_data.patient_id)
             # Use improved fallback routing logic
             return self._fallback_routing(patient_data, caregiver_input)
         except Exception as e:
-            print(f"❌ AI routing error: {e}")
+            logger.error(f"❌ AI routing error: {e}")
             # Use improved fallback routing logic
             return self._fallback_routing(patient_data, caregiver_input)
     
+    @traced("route_patients_packed")
+    @timed("packed_routing")
+    async def route_patients_packed(self, cases: List[Tuple[Any, CaregiverInput]], pack_size: int = 10,
+                                    semaphore: Optional[asyncio.Semaphore] = None) -> Dict[str, RoutingDecision]:
+        """Route many patients with several compact profiles per prompt, keyed by patient_id.
+        
+        The routing instructions are sent once per pack instead of once per patient. Entries that are
+        missing or fail RoutingDecision validation are re-queued through route_patient individually.
+        Every LLM call (pack or re-queued patient) holds the semaphore when one is given.
+        """
+        decisions: Dict[str, RoutingDecision] = {}
+        async for pack_decisions in self.iter_packed_routing(cases, pack_size, semaphore):
+            decisions.update(pack_decisions)
+        return decisions
+    
+    async def iter_packed_routing(self, cases: List[Tuple[Any, CaregiverInput]], pack_size: int = 10,
+                                  semaphore: Optional[asyncio.Semaphore] = None) -> AsyncIterator[Dict[str, RoutingDecision]]:
+        """Packed routing yielding each pack's decisions as soon as that pack (and its re-queues) completes."""
+        packs = [cases[i:i + pack_size] for i in range(0, len(cases), max(1, pack_size))]
+        tasks = [asyncio.ensure_future(self._route_pack(pack, semaphore)) for pack in packs]
+        try:
+            for next_pack in asyncio.as_completed(tasks):
+                yield await next_pack
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    async def _route_pack(self, pack: List[Tuple[Any, CaregiverInput]],
+                          semaphore: Optional[asyncio.Semaphore] = None) -> Dict[str, RoutingDecision]:
+        """Route one pack of patients with a single LLM call, re-queuing entries that fail validation."""
+        if semaphore is None:
+            semaphore = contextlib.nullcontext()
+        decisions: Dict[str, RoutingDecision] = {}
+        if len(pack) > 1:
+            expected_ids = {patient_data.patient_id for patient_data, _ in pack}
+            try:
+                async with semaphore:
+                    response = await self._call_ai(self._build_packed_routing_prompt(pack),
+                                                   PACKED_ROUTING_RESPONSE_PARSER)
+                for entry in parse_packed_routing(response):
+                    patient_id = str(entry.get("patient_id")) if isinstance(entry, dict) else None
+                    if patient_id not in expected_ids or patient_id in decisions:
+                        continue
+                    try:
+                        decisions[patient_id] = self._routing_decision(patient_id, PACKED_ROUTING_PARSER.validate(entry))
+                    except StructuredOutputError as e:
+                        logger.warning(f"⚠️ Packed routing entry for {patient_id} failed validation: {e}")
+            except Exception as e:
+                logger.error(f"❌ Packed routing error for {len(pack)} patients: {e}")
+        
+        requeued = [(patient_data, caregiver_input) for patient_data, caregiver_input in pack
+                    if patient_data.patient_id not in decisions]
+        if requeued and len(pack) > 1:
+            logger.warning(f"⚠️ Re-routing {len(requeued)} of {len(pack)} packed patients individually")
+        
+        async def route_one(patient_data, caregiver_input) -> RoutingDecision:
+            # The pack's own slot is released first, so re-queues cannot deadlock a small semaphore
+            async with semaphore:
+                return await self.route_patient(patient_data, caregiver_input)
+        
+        routed = await asyncio.gather(
+            *(route_one(patient_data, caregiver_input) for patient_data, caregiver_input in requeued)
+        )
+        for (patient_data, _), decision in zip(requeued, routed):
+            decisions[patient_data.patient_id] = decision
+        return decisions
+    
+    def _build_packed_routing_prompt(self, pack: List[Tuple[Any, CaregiverInput]]) -> str:
+        """Routing prompt with the instruction block once and one compact profile line per patient."""
+        profiles = "\n".join(
+            f"        - patient_id={patient_data.patient_id} | dx={patient_data.primary_icu_diagnosis} | "
+            f"discharge={patient_data.icu_discharge_date or 'Pending'} | insurance={patient_data.insurance_coverage_status or 'Unknown'} | "
+            f"skilled_nursing={patient_data.skilled_nursing_needed or 'n/a'} | visits={patient_data.nursing_visit_frequency or 'n/a'} | "
+            f"equipment={patient_data.equipment_needed or 'None'} | medication={patient_data.medication or 'None'} | "
+            f"concern={caregiver_input.primary_concern} | urgency={caregiver_input.urgency_level}"
+            for patient_data, caregiver_input in pack
+        )
+        return f"""
+        You are a DISCHARGE PLANNING coordinator AI. Route EACH patient below to the agents that must coordinate
+        their hospital-to-home transition. Focus ONLY on discharge logistics - NOT ongoing clinical management.
+        
+        ROUTING DECISION CRITERIA (Discharge Logistics Only):
+        - NURSING: Home health referral, 485 plan setup, discharge education coordination
+        - DME: Equipment delivery scheduling, insurance authorization, home setup coordination
+        - PHARMACY: eRx handoff, prescription transfer, pickup/delivery coordination
+        - STATE: Prior authorization, insurance verification, Medicaid coordination
+        
+        Patients ({len(pack)}):
+{profiles}
+        
+        IMPORTANT: Respond ONLY with a valid JSON object whose "decisions" array has exactly one entry per patient_id above:
+        {{
+            "decisions": [
+                {{
+                    "patient_id": "<patient_id>",
+                    "recommended_agents": ["nursing", "dme", "pharmacy", "state"],
+                    "reasoning": "Discharge coordination explanation focusing ONLY on logistics",
+                    "priority_score": 7,
+                    "estimated_timeline": "before discharge"
+                }}
+            ]
+        }}
+        """
+    
+    async def process_agent(self, agent_type: AgentType, patient_data, caregiver_input: CaregiverInput) -> AgentResponse:
+        """Dispatch a patient case to the processor for the given agent type."""
+        processors = {
+            AgentType.NURSING: self.process_nursing_agent,
+            AgentType.DME: self.process_dme_agent,
+            AgentType.PHARMACY: self.process_pharmacy_agent,
+            AgentType.STATE: self.process_state_agent,
+        }
+        processor = processors.get(agent_type)
+        if processor is None:
+            raise ValueError(f"Unknown agent type: {agent_type}")
+        return await processor(patient_data, caregiver_input)
+    
+    @traced("process_nursing_agent")
+    @timed("agent", agent="nursing")
     async def process_nursing_agent(self, patient_data, caregiver_input: CaregiverInput) -> AgentResponse:
         """Process patient case through enhanced nursing agent with RAG-based nurse recommendations."""
         
@@ -152,31 +325,17 @@ class AIService:
             from app.enhanced_nursing_agent import get_nurse_recommendations_for_patient
             
             # Prepare patient context for nurse matching - handle missing fields gracefully
-            patient_context = {
-                'name': getattr(patient_data, 'name', 'Unknown Patient'),
-                'patient_id': getattr(patient_data, 'patient_id', 'UNKNOWN'),
-                'age': getattr(patient_data, 'age', None) or getattr(patient_data, 'date_of_birth', None),
-                'gender': getattr(patient_data, 'gender', 'Unknown'),
-                'primary_diagnosis': getattr(patient_data, 'primary_icu_diagnosis', None) or getattr(patient_data, 'diagnosis', 'Not specified'),
-                'secondary_diagnoses': getattr(patient_data, 'secondary_diagnoses', None),
-                'skilled_nursing_needed': getattr(patient_data, 'skilled_nursing_needed', None),
-                'type_of_nursing_care': getattr(patient_data, 'type_of_nursing_care', None),
-                'equipment_needed': getattr(patient_data, 'equipment_needed', None),
-                'medication': getattr(patient_data, 'medication', None),
-                'route': getattr(patient_data, 'route', None),
-                'vascular_access': getattr(patient_data, 'vascular_access', None),
-                'address': getattr(patient_data, 'address', None),
-                'insurance_coverage_status': getattr(patient_data, 'insurance_coverage_status', None),
-                'special_instructions': getattr(patient_data, 'special_instructions', None),
-                'allergies': getattr(patient_data, 'allergies', None),
-                'primary_concern': caregiver_input.primary_concern
-            }
+            patient_context = self._nursing_patient_context(patient_data, caregiver_input)
             
-            print(f"🔍 Patient context for nurse matching: {patient_context}")
+            log_payload(logger, "🔍 Patient context for nurse matching", patient_context,
+                        patient_id=patient_data.patient_id)
             
-            # Get nurse recommendations
-            nurse_recommendations = get_nurse_recommendations_for_patient(patient_context, top_n=5)
-            print(f"👩‍⚕️ Nurse recommendations result: {nurse_recommendations}")
+            # Get nurse recommendations (TF-IDF retrieval and LLM ranking are blocking, run off the event loop)
+            nurse_recommendations = await deadline.wait_for(
+                run_blocking(get_nurse_recommendations_for_patient, patient_context, top_n=5), default=None
+            )
+            log_payload(logger, "👩‍⚕️ Nurse recommendations result", nurse_recommendations,
+                        patient_id=patient_data.patient_id)
             
             # Generate nursing care plan using LLM
             care_plan_prompt = f"""
@@ -242,12 +401,13 @@ class AIService:
             """
             
             # Get care plan from LLM
-            if self.ai_provider == "google" and self.client:
+            if self.client or replay_enabled():
                 try:
-                    response = self.client.generate_content(care_plan_prompt)
-                    care_plan_text = response.text if response else ""
+                    care_plan_text = await self._call_ai(care_plan_prompt, AGENT_PARSERS[AgentType.NURSING])
+                except deadline.DeadlineExceeded:
+                    raise
                 except Exception as e:
-                    print(f"⚠️ Google AI error in nursing agent: {e}")
+                    logger.warning(f"⚠️ AI error in nursing agent: {e}")
                     care_plan_text = ""
             else:
                 care_plan_text = ""
@@ -255,82 +415,105 @@ class AIService:
             # Parse care plan or use fallback
             if care_plan_text:
                 try:
-                    # Extract JSON from response
-                    json_start = care_plan_text.find('{')
-                    json_end = care_plan_text.rfind('}') + 1
-                    if json_start != -1 and json_end > json_start:
-                        care_plan_json = json.loads(care_plan_text[json_start:json_end])
-                    else:
-                        raise ValueError("No JSON found")
-                except:
+                    care_plan_json = parse_agent_output(AgentType.NURSING, care_plan_text)
+                except StructuredOutputError as e:
+                    logger.warning(f"⚠️ Nursing care plan output error: {e}")
                     care_plan_json = self._get_fallback_nursing_plan(patient_data)
             else:
                 care_plan_json = self._get_fallback_nursing_plan(patient_data)
             
-            # Create form data with nurse recommendations
-            form_data = {
-                "form_id": f"nursing_order_{patient_context['patient_id']}",
-                "title": "Home Health Nursing Order Form",
-                "recipient": "Home Health Agency",
-                "fields": [
-                    {
-                        "field_name": "patient_name",
-                        "field_type": "text",
-                        "label": "Patient Name",
-                        "value": patient_context['name'],
-                        "required": True
-                    },
-                    {
-                        "field_name": "primary_diagnosis",
-                        "field_type": "text",
-                        "label": "Primary Diagnosis",
-                        "value": patient_context['primary_diagnosis'],
-                        "required": True
-                    },
-                    {
-                        "field_name": "skilled_nursing_needed",
-                        "field_type": "textarea",
-                        "label": "Skilled Nursing Services Needed",
-                        "value": patient_context.get('skilled_nursing_needed', ''),
-                        "required": True
-                    },
-                    {
-                        "field_name": "visit_frequency",
-                        "field_type": "select",
-                        "label": "Visit Frequency",
-                        "value": care_plan_json.get("structured_data", {}).get("visit_frequency", "weekly"),
-                        "options": ["daily", "3x/week", "weekly", "bi-weekly", "monthly"],
-                        "required": True
-                    },
-                    {
-                        "field_name": "first_visit_target",
-                        "field_type": "text",
-                        "label": "First Visit Target",
-                        "value": care_plan_json.get("structured_data", {}).get("first_visit_target", "within 24 hours"),
-                        "required": True
-                    }
-                ],
-                "nurse_recommendations": nurse_recommendations
-            }
-            
-            print(f"📋 Final form data with nurse recommendations: {form_data}")
-            
-            return AgentResponse(
-                agent_type=AgentType.NURSING,
-                patient_id=patient_context['patient_id'],
-                structured_data=care_plan_json.get("structured_data", {}),
-                form_data=form_data,
-                recommendations=care_plan_json.get("recommendations", []),
-                next_steps=care_plan_json.get("next_steps", []),
-                external_referrals=care_plan_json.get("external_referrals", [])
-            )
+            return self._build_nursing_response(patient_context, care_plan_json, nurse_recommendations)
             
+        except deadline.DeadlineExceeded:
+            # Cut off by the request deadline: reported as a timeout, not replaced by fallback content
+            raise
         except Exception as e:
-            print(f"❌ Error in enhanced nursing agent: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception(f"❌ Error in enhanced nursing agent: {e}")
             # Fallback to basic nursing response
-            return self._get_fallback_nursing_response(patient_data, caregiver_input)
+            return await self._get_fallback_nursing_response(patient_data, caregiver_input)
+    
+    def _nursing_patient_context(self, patient_data, caregiver_input: CaregiverInput) -> Dict[str, Any]:
+        """Patient context used for nurse matching and the nursing care-plan prompt."""
+        return {
+            'name': getattr(patient_data, 'name', 'Unknown Patient'),
+            'patient_id': getattr(patient_data, 'patient_id', 'UNKNOWN'),
+            'age': getattr(patient_data, 'age', None) or getattr(patient_data, 'date_of_birth', None),
+            'gender': getattr(patient_data, 'gender', 'Unknown'),
+            'primary_diagnosis': getattr(patient_data, 'primary_icu_diagnosis', None) or getattr(patient_data, 'diagnosis', 'Not specified'),
+            'secondary_diagnoses': getattr(patient_data, 'secondary_diagnoses', None),
+            'skilled_nursing_needed': getattr(patient_data, 'skilled_nursing_needed', None),
+            'type_of_nursing_care': getattr(patient_data, 'type_of_nursing_care', None),
+            'equipment_needed': getattr(patient_data, 'equipment_needed', None),
+            'medication': getattr(patient_data, 'medication', None),
+            'route': getattr(patient_data, 'route', None),
+            'vascular_access': getattr(patient_data, 'vascular_access', None),
+            'address': getattr(patient_data, 'address', None),
+            'insurance_coverage_status': getattr(patient_data, 'insurance_coverage_status', None),
+            'special_instructions': getattr(patient_data, 'special_instructions', None),
+            'allergies': getattr(patient_data, 'allergies', None),
+            'primary_concern': caregiver_input.primary_concern
+        }
+    
+    def _build_nursing_response(self, patient_context: Dict[str, Any], care_plan_json: Dict[str, Any],
+                                nurse_recommendations) -> AgentResponse:
+        """Nursing agent response: care plan plus the home health order form with nurse recommendations."""
+        # Create form data with nurse recommendations
+        form_data = {
+            "form_id": f"nursing_order_{patient_context['patient_id']}",
+            "title": "Home Health Nursing Order Form",
+            "recipient": "Home Health Agency",
+            "fields": [
+                {
+                    "field_name": "patient_name",
+                    "field_type": "text",
+                    "label": "Patient Name",
+                    "value": patient_context['name'],
+                    "required": True
+                },
+                {
+                    "field_name": "primary_diagnosis",
+                    "field_type": "text",
+                    "label": "Primary Diagnosis",
+                    "value": patient_context['primary_diagnosis'],
+                    "required": True
+                },
+                {
+                    "field_name": "skilled_nursing_needed",
+                    "field_type": "textarea",
+                    "label": "Skilled Nursing Services Needed",
+                    "value": patient_context.get('skilled_nursing_needed', ''),
+                    "required": True
+                },
+                {
+                    "field_name": "visit_frequency",
+                    "field_type": "select",
+                    "label": "Visit Frequency",
+                    "value": care_plan_json.get("structured_data", {}).get("visit_frequency", "weekly"),
+                    "options": ["daily", "3x/week", "weekly", "bi-weekly", "monthly"],
+                    "required": True
+                },
+                {
+                    "field_name": "first_visit_target",
+                    "field_type": "text",
+                    "label": "First Visit Target",
+                    "value": care_plan_json.get("structured_data", {}).get("first_visit_target", "within 24 hours"),
+                    "required": True
+                }
+            ],
+            "nurse_recommendations": nurse_recommendations
+        }
+        
+        log_payload(logger, "📋 Final nursing form data", form_data, patient_id=patient_context.get('patient_id'))
+        
+        return AgentResponse(
+            agent_type=AgentType.NURSING,
+            patient_id=patient_context['patient_id'],
+            structured_data=care_plan_json.get("structured_data", {}),
+            form_data=form_data,
+            recommendations=care_plan_json.get("recommendations", []),
+            next_steps=care_plan_json.get("next_steps", []),
+            external_referrals=care_plan_json.get("external_referrals", [])
+        )
     
     def _get_fallback_nursing_plan(self, patient_data) -> Dict[str, Any]:
         """Fallback nursing care plan when LLM is unavailable."""
@@ -362,7 +545,7 @@ class AIService:
             ]
         }
     
-    def _get_fallback_nursing_response(self, patient_data, caregiver_input: CaregiverInput) -> AgentResponse:
+    async def _get_fallback_nursing_response(self, patient_data, caregiver_input: CaregiverInput) -> AgentResponse:
         """Fallback nursing response when enhanced agent fails."""
         try:
             # Try to get nurse recommendations even in fallback
@@ -376,9 +559,11 @@ class AIService:
                 'primary_concern': caregiver_input.primary_concern
             }
             
-            nurse_recommendations = get_nurse_recommendations_for_patient(patient_context, top_n=3)
+            nurse_recommendations = await deadline.wait_for(
+                run_blocking(get_nurse_recommendations_for_patient, patient_context, top_n=3), default=None
+            )
         except Exception as e:
-            print(f"❌ Error getting nurse recommendations in fallback: {e}")
+            logger.error(f"❌ Error getting nurse recommendations in fallback: {e}")
             nurse_recommendations = {
                 "success": False,
                 "message": "Enhanced nurse matching temporarily unavailable",
@@ -420,6 +605,8 @@ class AIService:
             external_referrals=fallback_plan["external_referrals"]
         )
     
+    @traced("process_dme_agent")
+    @timed("agent", agent="dme")
     async def process_dme_agent(self, patient_data, caregiver_input: CaregiverInput) -> AgentResponse:
         """Process patient case through DME agent."""
         
@@ -486,14 +673,16 @@ class AIService:
         """
         
         try:
-            response = await self._call_ai(prompt)
-            result = json.loads(response)
+            response = await self._call_ai(prompt, AGENT_PARSERS[AgentType.DME])
+            result = parse_agent_output(AgentType.DME, response)
             
             # Add comprehensive form autofill data
             result["form_autofill"] = self._generate_dme_form_data(patient_data, caregiver_input)
             
-        except (json.JSONDecodeError, Exception) as e:
-            print(f"DME agent error: {e}")
+        except deadline.DeadlineExceeded:
+            raise
+        except Exception as e:
+            logger.warning(f"⚠️ DME agent error: {e}")
             # Create discharge-focused fallback response
             equipment_needed = getattr(patient_data, 'equipment_needed', '') or 'mobility equipment'
             result = {
@@ -535,6 +724,8 @@ class AIService:
             external_referrals=result.get("external_referrals", [])
         )
     
+    @traced("process_pharmacy_agent")
+    @timed("agent", agent="pharmacy")
     async def process_pharmacy_agent(self, patient_data, caregiver_input: CaregiverInput) -> AgentResponse:
         """Process patient case through pharmacy agent."""
         
@@ -601,14 +792,16 @@ class AIService:
         """
         
         try:
-            response = await self._call_ai(prompt)
-            result = json.loads(response)
+            response = await self._call_ai(prompt, AGENT_PARSERS[AgentType.PHARMACY])
+            result = parse_agent_output(AgentType.PHARMACY, response)
             
             # Add comprehensive form autofill data
             result["form_autofill"] = self._generate_pharmacy_form_data(patient_data, caregiver_input)
             
-        except (json.JSONDecodeError, Exception) as e:
-            print(f"Pharmacy agent error: {e}")
+        except deadline.DeadlineExceeded:
+            raise
+        except Exception as e:
+            logger.warning(f"⚠️ Pharmacy agent error: {e}")
             # Create discharge-focused fallback response
             current_med = getattr(patient_data, 'medication', '') or 'discharge medications'
             route = getattr(patient_data, 'route', '') or ''
@@ -651,6 +844,8 @@ class AIService:
             external_referrals=result.get("external_referrals", [])
         )
     
+    @traced("process_state_agent")
+    @timed("agent", agent="state")
     async def process_state_agent(self, patient_data, caregiver_input: CaregiverInput) -> AgentResponse:
         """Process patient case through state/insurance coordination agent."""
         
@@ -711,10 +906,12 @@ class AIService:
         """
         
         try:
-            ai_response = await self._call_ai(prompt)
-            result = json.loads(ai_response)
+            ai_response = await self._call_ai(prompt, AGENT_PARSERS[AgentType.STATE])
+            result = parse_agent_output(AgentType.STATE, ai_response)
+        except deadline.DeadlineExceeded:
+            raise
         except Exception as e:
-            print(f"AI call failed for state agent: {e}")
+            logger.warning(f"⚠️ AI call failed for state agent: {e}")
             # Fallback response
             result = {
                 "structured_data": {
@@ -745,50 +942,177 @@ class AIService:
             next_steps=result.get("next_steps", []),
             external_referrals=result.get("external_referrals", [])
         )
-        """Make API call to AI provider (Google AI Studio or OpenAI)."""
-        if not self.client:
-            raise Exception("No AI API key configured")
+    
+    @traced("process_case_combined")
+    @timed("combined")
+    async def process_case_combined(self, patient_data, caregiver_input: CaregiverInput) -> Tuple[RoutingDecision, Dict[AgentType, Optional[AgentResponse]]]:
+        """Route the patient and run every recommended agent with one LLM call.
+        
+        The combined response is split back into the usual RoutingDecision and AgentResponse models.
+        Agents whose section is missing or malformed are re-run individually; if the combined response
+        is unusable, routing and all agents fall back to per-agent processing. Re-run agents cut off by
+        the request deadline are left out of the returned responses.
+        """
+        patient_context = self._nursing_patient_context(patient_data, caregiver_input)
+        nurse_task = None
+        if AgentType.NURSING in self.predict_agents(patient_data, caregiver_input):
+            # Nurse matching does not depend on the LLM output, so overlap it with the combined call
+            nurse_task = asyncio.ensure_future(self._fetch_nurse_recommendations(patient_context))
         
         try:
-            if self.ai_provider == "google":
-                # Use Google AI Studio (Gemini)
-                system_prompt = "You are a healthcare AI assistant. Always respond with valid JSON."
-                full_prompt = f"{system_prompt}\n\n{prompt}"
-                
-                response = self.client.generate_content(full_prompt)
-                response_text = response.text
-                
-                # Clean up the response text to extract JSON
-                if "```json" in response_text:
-                    # Extract JSON from markdown code blocks
-                    start = response_text.find("```json") + 7
-                    end = response_text.find("```", start)
-                    response_text = response_text[start:end].strip()
-                elif "```" in response_text:
-                    # Extract from generic code blocks
-                    start = response_text.find("```") + 3
-                    end = response_text.find("```", start)
-                    response_text = response_text[start:end].strip()
-                
-                return response_text
-                
-            elif self.ai_provider == "openai":
-                # Use OpenAI
-                response = self.client.chat.completions.create(
-                    model="gpt-3.5-turbo",
-                    messages=[
-                        {"role": "system", "content": "You are a healthcare AI assistant. Always respond with valid JSON."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    temperature=0.3
-                )
-                return response.choices[0].message.content
-            else:
-                raise Exception("No AI provider configured")
-                
+            response = await self._call_ai(self._build_combined_prompt(patient_data, caregiver_input), COMBINED_PARSER)
+            result = COMBINED_PARSER.parse(response)
+            routing_decision = self._routing_decision(patient_data.patient_id, result.routing)
+            agent_sections = result.agents
+            logger.debug(f"✅ Combined AI processing successful: {routing_decision.recommended_agents}")
         except Exception as e:
-            print(f"AI API error ({self.ai_provider}): {e}")
-            raise
+            logger.error(f"❌ Combined AI processing error, falling back to per-agent mode: {e}")
+            routing_decision = await self.route_patient(patient_data, caregiver_input)
+            agent_sections = {}
+        
+        agent_responses: Dict[AgentType, Optional[AgentResponse]] = {}
+        retry_agents = []
+        timed_out = set()
+        try:
+            for agent_type in dict.fromkeys(routing_decision.recommended_agents):
+                try:
+                    section = validate_agent_output(agent_type, agent_sections.get(agent_type.value))
+                except StructuredOutputError:
+                    retry_agents.append(agent_type)
+                    continue
+                if agent_type == AgentType.NURSING:
+                    if nurse_task is None:
+                        nurse_task = asyncio.ensure_future(self._fetch_nurse_recommendations(patient_context))
+                    agent_responses[agent_type] = self._build_nursing_response(patient_context, section, await nurse_task)
+                else:
+                    agent_responses[agent_type] = self._build_agent_response(agent_type, patient_data, section)
+        finally:
+            if nurse_task is not None and not nurse_task.done():
+                nurse_task.cancel()
+        
+        if retry_agents:
+            logger.warning(f"⚠️ Combined response missing valid sections for {[agent.value for agent in retry_agents]}, running them individually")
+            retried = await asyncio.gather(
+                *(self.process_agent(agent_type, patient_data, caregiver_input) for agent_type in retry_agents),
+                return_exceptions=True
+            )
+            for agent_type, response in zip(retry_agents, retried):
+                if isinstance(response, deadline.DeadlineExceeded):
+                    timed_out.add(agent_type)
+                agent_responses[agent_type] = None if isinstance(response, Exception) else response
+        
+        # Keep routing order
+        return routing_decision, {
+            agent_type: agent_responses.get(agent_type)
+            for agent_type in dict.fromkeys(routing_decision.recommended_agents) if agent_type not in timed_out
+        }
+    
+    def _build_combined_prompt(self, patient_data, caregiver_input: CaregiverInput) -> str:
+        """Single prompt carrying the discharge profile once, asking for routing plus every agent's output."""
+        structured_data_fields = "\n".join(
+            f"        - {agent_type.value}: {', '.join(fields)}" for agent_type, fields in STRUCTURED_DATA_FIELDS.items()
+        )
+        return f"""
+        You are a DISCHARGE PLANNING coordinator AI. Decide which coordination agents this patient needs and
+        produce each recommended agent's output in the same response.
+        
+        CRITICAL: Focus ONLY on discharge logistics and coordination - NOT ongoing clinical management.
+        
+        Patient Discharge Profile:
+        - Patient: {patient_data.name} (ID: {patient_data.patient_id})
+        - MRN: {patient_data.mrn or 'Not available'}
+        - Primary Diagnosis: {patient_data.primary_icu_diagnosis}
+        - Secondary Diagnoses: {patient_data.secondary_diagnoses or 'None'}
+        - Allergies: {patient_data.allergies or 'None'}
+        - Discharge Date: {patient_data.icu_discharge_date or 'Pending'}
+        - Insurance Status: {patient_data.insurance_coverage_status or 'Unknown'}
+        
+        Home Health: Skilled Nursing {patient_data.skilled_nursing_needed or 'Not specified'}; Visits {patient_data.nursing_visit_frequency or 'Not specified'}; Care Type {patient_data.type_of_nursing_care or 'Not specified'}; Emergency Procedures {patient_data.emergency_contact_procedure or 'None specified'}
+        Equipment: {patient_data.equipment_needed or 'None'}; Supplier {patient_data.dme_supplier or 'Not assigned'}; Delivery {patient_data.equipment_delivery_date or 'Not scheduled'}
+        Medication: {patient_data.medication or 'None'} {patient_data.dosage or ''} {patient_data.frequency or ''}; Route {patient_data.route or 'Not specified'}; Duration {patient_data.duration_of_therapy or 'Not specified'}; Vascular Access {patient_data.vascular_access or 'None'}
+        Prescriber: {patient_data.prescriber_name or 'Not specified'}; NPI {patient_data.npi_number or 'Not available'}; Contact {patient_data.prescriber_contact or 'Not available'}
+        Follow-up: {patient_data.follow_up_appointment_date or 'Not scheduled'}
+        
+        Discharge Planner Input: {caregiver_input.primary_concern}
+        Urgency: {caregiver_input.urgency_level}
+        
+        AGENTS (discharge logistics only):
+        - nursing: home health referral, 485 plan of care, first visit, caregiver education
+        - dme: home equipment orders, medical necessity, delivery before discharge, setup/training
+        - pharmacy: medication reconciliation, eRx handoff, route transition, pickup/delivery
+        - state: insurance verification, prior authorization, Medicaid/state programs
+        
+        Include an entry under "agents" ONLY for each recommended agent, keyed by agent name, with
+        2-4 short recommendations and next steps. Use these structured_data fields:
+{structured_data_fields}
+        
+        IMPORTANT: Respond ONLY with a valid JSON object:
+        {{
+            "routing": {{
+                "recommended_agents": ["nursing", "dme"],
+                "reasoning": "Discharge coordination explanation focusing ONLY on logistics",
+                "priority_score": 7,
+                "estimated_timeline": "before discharge"
+            }},
+            "agents": {{
+                "nursing": {{
+                    "structured_data": {{"home_health_referral": true, "visit_frequency": "weekly", "first_visit_target": "within 24 hours of discharge"}},
+                    "recommendations": ["Initiate home health nursing referral with 485 plan of care"],
+                    "next_steps": ["Contact home health agency for intake"],
+                    "external_referrals": ["Home Health Agency - for skilled nursing visits"]
+                }},
+                "dme": {{
+                    "structured_data": {{"equipment_category": "respiratory", "delivery_timeline": "before discharge"}},
+                    "recommendations": ["Schedule equipment delivery 24 hours before discharge"],
+                    "next_steps": ["Contact DME supplier for equipment availability"],
+                    "external_referrals": ["DME Supplier"]
+                }}
+            }}
+        }}
+        """
+    
+    @staticmethod
+    def _routing_decision(patient_id: str, routing: RoutingOutput) -> RoutingDecision:
+        """RoutingDecision for a patient from validated routing output."""
+        return RoutingDecision(patient_id=patient_id, **routing.model_dump(exclude={"patient_id"}))
+    
+    def _build_agent_response(self, agent_type: AgentType, patient_data, result: Dict[str, Any]) -> AgentResponse:
+        """DME, pharmacy or state agent response from an agent result, with the partner form attached."""
+        form_generators = {
+            AgentType.DME: self._generate_dme_form,
+            AgentType.PHARMACY: self._generate_pharmacy_form,
+            AgentType.STATE: self._generate_state_form,
+        }
+        return AgentResponse(
+            agent_type=agent_type,
+            patient_id=patient_data.patient_id,
+            structured_data=result.get("structured_data", {}),
+            form_data=form_generators[agent_type](patient_data, result),
+            recommendations=result.get("recommendations", []),
+            next_steps=result.get("next_steps", []),
+            external_referrals=result.get("external_referrals", [])
+        )
+    
+    @traced("_fetch_nurse_recommendations")
+    @timed("nurse_recommendations")
+    async def _fetch_nurse_recommendations(self, patient_context: Dict[str, Any], top_n: int = 5):
+        """Nurse recommendations for a patient context; never raises."""
+        try:
+            from app.enhanced_nursing_agent import get_nurse_recommendations_for_patient
+            return await deadline.wait_for(
+                run_blocking(get_nurse_recommendations_for_patient, patient_context, top_n=top_n), default=None
+            )
+        except Exception as e:
+            logger.error(f"❌ Error getting nurse recommendations: {e}")
+            return {
+                "success": False,
+                "message": "Enhanced nurse matching temporarily unavailable",
+                "recommendations": []
+            }
+    
+    def predict_agents(self, patient_data, caregiver_input: CaregiverInput) -> List[AgentType]:
+        """Cheap rule-based guess at the agents routing will recommend (used for speculative prefetch)."""
+        return self._fallback_routing(patient_data, caregiver_input).recommended_agents
     
     def _fallback_routing(self, patient_data, caregiver_input: CaregiverInput) -> RoutingDecision:
         """Fallback routing logic when AI is unavailable."""
@@ -854,6 +1178,7 @@ class AIService:
             estimated_timeline="24-48 hours post-discharge"
         )
     
+    @timed("form_generation", agent="nursing")
     def _generate_nursing_form(self, patient_data, ai_result: Dict) -> Dict[str, Any]:
         """Generate editable form for nursing partners."""
         return {
@@ -874,6 +1199,7 @@ class AIService:
             "recipient": getattr(patient_data, 'nurse_agency', 'Home Health Agency') or 'Home Health Agency'
         }
     
+    @timed("form_generation", agent="dme")
     def _generate_dme_form(self, patient_data, ai_result: Dict) -> Dict[str, Any]:
         """Generate editable form for DME suppliers."""
         return {
@@ -893,6 +1219,7 @@ class AIService:
             "recipient": getattr(patient_data, 'dme_supplier', 'DME Supplier') or 'DME Supplier'
         }
     
+    @timed("form_generation", agent="pharmacy")
     def _generate_pharmacy_form(self, patient_data, ai_result: Dict) -> Dict[str, Any]:
         """Generate editable form for pharmacy partners."""
         # Build medication info from comprehensive data
@@ -921,6 +1248,7 @@ class AIService:
             "recipient": "Clinical Pharmacist"
         }
     
+    @timed("form_generation", agent="state")
     def _generate_state_form(self, patient_data, ai_result: Dict) -> Dict[str, Any]:
         """Generate editable form for state/insurance coordination."""
         return {
@@ -945,36 +1273,151 @@ class AIService:
             "recipient": "Insurance Authorization Department"
         }
     
-    async def _call_ai(self, prompt: str) -> str:
-        """Make API call to AI provider (Google AI Studio or OpenAI)."""
+    @traced("_call_ai")
+    async def _call_ai(self, prompt: str, parser: Optional[StructuredOutputParser] = None) -> str:
+        """Make API call to AI provider (Google AI Studio or OpenAI), serving repeats from the response cache
+        and coalescing identical in-flight prompts into one provider call.
+        
+        Only responses that parse into the parser's schema (or as JSON when no parser is given) are cached,
+        under the model that actually served them, so a malformed or failed-over answer is not replayed.
+        With LLM_RECORD_MODE=replay responses come from the recording file and no provider is needed;
+        with LLM_RECORD_MODE=record the cache is bypassed so every prompt is recorded with a real timing.
+        """
+        recorder = get_llm_recorder()
+        if recorder is not None and recorder.replaying:
+            return await deadline.wait_for(recorder.replay("ai_service", prompt, PROMPT_TEMPLATE_VERSION))
+        
         if not self.client:
             raise Exception("No AI API key configured")
         
+        cache = get_llm_cache()
+        cache_key = make_cache_key(prompt, self.model_name, PROMPT_TEMPLATE_VERSION)
+        if cache is not None and recorder is None:
+            cached_response = cache.get(cache_key)
+            set_attribute("llm.cache_hit", cached_response is not None)
+            if cached_response is not None:
+                return cached_response
+        
+        async def fetch() -> str:
+            start = time.perf_counter()
+            # The shared call gets its own upper bound: waiters' deadlines only abandon their wait, and a hung
+            # provider call would otherwise hold the key and a limiter slot indefinitely
+            try:
+                provider, response_text = await asyncio.wait_for(self._call_with_failover(prompt, parser),
+                                                                 deadline.DEFAULT_LLM_CALL_TIMEOUT)
+            except asyncio.TimeoutError:
+                raise deadline.DeadlineExceeded(f"LLM call timed out after {deadline.DEFAULT_LLM_CALL_TIMEOUT:.0f}s")
+            if recorder is not None and response_text:
+                recorder.record("ai_service", prompt, PROMPT_TEMPLATE_VERSION, response_text,
+                                time.perf_counter() - start)
+            valid = parser.check(response_text) if parser is not None else _looks_like_json(response_text)
+            if cache is not None and response_text and valid:
+                served_model = self.model_names.get(provider, self.model_name)
+                cache.set(make_cache_key(prompt, served_model, PROMPT_TEMPLATE_VERSION), response_text)
+            return response_text
+        
+        # Identical prompts already in flight share one provider call; each waiter honours its own deadline
+        return await deadline.wait_for(self.inflight_requests.do(cache_key, fetch))
+    
+    async def _call_with_failover(self, prompt: str,
+                                  parser: Optional[StructuredOutputParser] = None) -> Tuple[str, str]:
+        """Call the primary provider, hedging or failing over to the alternate provider when configured.
+        
+        Returns (provider that answered, response text).
+        """
+        async def call(provider: str) -> Tuple[str, str]:
+            return provider, await self._call_provider(prompt, provider, parser)
+        
+        if self.hedging.enabled:
+            backup_provider = self.hedging.choose_backup(self.ai_provider, list(self.clients) or [self.ai_provider])
+            return await self.hedging.race(
+                (self.ai_provider, lambda: call(self.ai_provider)),
+                (backup_provider, lambda: call(backup_provider)),
+                lambda served: parser.check(served[1]) if parser is not None else _looks_like_json(served[1])
+            )
+        
+        try:
+            return await call(self.ai_provider)
+        except Exception as e:
+            alternates = [provider for provider in self.clients if provider != self.ai_provider]
+            if not alternates:
+                raise
+            logger.warning(f"⚠️ {self.ai_provider} call failed ({e}), failing over to {alternates[0]}")
+            self.hedging.failovers += 1
+            return await call(alternates[0])
+    
+    @traced("_call_provider")
+    async def _call_provider(self, prompt: str, provider: Optional[str] = None,
+                             parser: Optional[StructuredOutputParser] = None) -> str:
+        """Send a prompt to one provider under its shared rate limiter and circuit breaker, recording its latency.
+        
+        While the provider's circuit is open this fails immediately, so callers drop straight to their fallbacks.
+        """
+        provider = provider or self.ai_provider
+        set_attribute("llm.provider", provider or "default")
+        breaker = get_circuit_breaker(provider or "default")
+        if not breaker.allow_request():
+            raise CircuitOpenError(f"AI API call skipped: {provider} circuit open")
+        
+        limiter = get_rate_limiter(provider or "default")
+        provider_seconds = 0.0
+        
+        async def send() -> str:
+            nonlocal provider_seconds
+            sent_at = time.perf_counter()
+            try:
+                return await self._send_to_provider(prompt, provider, parser)
+            finally:
+                provider_seconds = time.perf_counter() - sent_at
+        
+        start = time.perf_counter()
         try:
-            if hasattr(self.client, 'generate_content'):  # Google AI Studio
-                response = self.client.generate_content(prompt)
-                raw_text = response.text
-                
-                # Clean markdown formatting
-                cleaned_text = raw_text.strip()
-                if cleaned_text.startswith('```json'):
-                    cleaned_text = cleaned_text[7:]
-                if cleaned_text.startswith('```'):
-                    cleaned_text = cleaned_text[3:]
-                if cleaned_text.endswith('```'):
-                    cleaned_text = cleaned_text[:-3]
-                
-                return cleaned_text.strip()
-            else:  # OpenAI
-                response = await self.client.chat.completions.create(
-                    model="gpt-3.5-turbo",
-                    messages=[{"role": "user", "content": prompt}],
-                    max_tokens=1000,
-                    temperature=0.7
-                )
-                return response.choices[0].message.content
+            response_text = await limiter.run(send, estimate_tokens(prompt))
+        except RateLimitTimeout as e:
+            # Local queueing, not a provider verdict
+            breaker.record_cancelled()
+            raise Exception(f"AI API call failed: {str(e)}")
         except Exception as e:
+            breaker.record_failure()
+            get_metrics().record_llm_failure(provider or "default")
             raise Exception(f"AI API call failed: {str(e)}")
+        except BaseException:
+            # Cancelled by a deadline or a winning hedge
+            breaker.record_cancelled()
+            raise
+        # Breaker judges provider latency only; hedging uses the caller-visible latency including queueing
+        breaker.record_success(provider_seconds)
+        self.hedging.record(provider or "default", time.perf_counter() - start)
+        get_metrics().record_llm_call(provider or "default", provider_seconds, prompt, response_text)
+        return response_text
+    
+    async def _send_to_provider(self, prompt: str, provider: Optional[str] = None,
+                                parser: Optional[StructuredOutputParser] = None) -> str:
+        """Single provider round trip, output constrained to the parser's schema; returns the cleaned response text."""
+        client = self.client if provider in (None, self.ai_provider) else self.clients[provider]
+        if hasattr(client, 'generate_content_async'):  # Google AI Studio
+            response = await client.generate_content_async(prompt, **_google_json_mode_kwargs(parser))
+            raw_text = response.text
+            
+            # Clean markdown formatting
+            cleaned_text = raw_text.strip()
+            if cleaned_text.startswith('```json'):
+                cleaned_text = cleaned_text[7:]
+            if cleaned_text.startswith('```'):
+                cleaned_text = cleaned_text[3:]
+            if cleaned_text.endswith('```'):
+                cleaned_text = cleaned_text[:-3]
+            
+            return cleaned_text.strip()
+        else:  # OpenAI
+            response = await client.chat.completions.create(
+                model=self.model_names.get("openai", OPENAI_MODEL_NAME),
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=1000,
+                temperature=0.7,
+                response_format=_openai_response_format(parser)
+            )
+            return response.choices[0].message.content
     
     def _generate_dme_form_data(self, patient_data, caregiver_input):
         """Generate comprehensive DME form autofill data based on patient information."""
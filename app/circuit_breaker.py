@@ -0,0 +1,144 @@
+"""
+Per-provider circuit breaker for LLM calls.
+After repeated failures or slow calls the circuit opens and callers go straight to the rule-based
+fallbacks (brownout) instead of waiting for the provider to fail. After a cool-down a trickle of
+probe calls is let through; enough successful probes close the circuit again.
+"""
+
+import os
+import threading
+import time
+from typing import Any, Dict
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose circuit is open."""
+
+
+class CircuitBreaker:
+    """Thread-safe closed/open/half-open breaker for one provider."""
+
+    def __init__(self, provider: str, failure_threshold: int = 5, slow_call_seconds: float = 30.0,
+                 cool_down_seconds: float = 30.0, half_open_max_calls: int = 1, success_threshold: int = 2,
+                 enabled: bool = True):
+        self.provider = provider
+        self.failure_threshold = failure_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.cool_down_seconds = cool_down_seconds
+        self.half_open_max_calls = half_open_max_calls
+        self.success_threshold = success_threshold
+        self.enabled = enabled
+
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.probe_successes = 0
+        self.probes_in_flight = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+        self.times_opened = 0
+        self.rejected_calls = 0
+        self.failures = 0
+        self.slow_calls = 0
+
+    def allow_request(self) -> bool:
+        """Whether a call may go to the provider now; in half-open state only a trickle of probes passes."""
+        if not self.enabled:
+            return True
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.cool_down_seconds:
+                self.state = HALF_OPEN
+                self.probe_successes = 0
+                self.probes_in_flight = 0
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and self.probes_in_flight < self.half_open_max_calls:
+                self.probes_in_flight += 1
+                return True
+            self.rejected_calls += 1
+            return False
+
+    def record_success(self, latency: float):
+        """Record a completed call; calls slower than slow_call_seconds count as failures."""
+        if latency > self.slow_call_seconds:
+            with self._lock:
+                self.slow_calls += 1
+            self.record_failure()
+            return
+        with self._lock:
+            self.consecutive_failures = 0
+            if self.state == HALF_OPEN:
+                self.probes_in_flight = max(0, self.probes_in_flight - 1)
+                self.probe_successes += 1
+                if self.probe_successes >= self.success_threshold:
+                    self.state = CLOSED
+
+    def record_failure(self):
+        """Record a failed call; opens the circuit at the threshold or when a probe fails."""
+        with self._lock:
+            self.failures += 1
+            self.consecutive_failures += 1
+            if self.state == HALF_OPEN:
+                self.probes_in_flight = max(0, self.probes_in_flight - 1)
+                self._open()
+            elif self.state == CLOSED and self.consecutive_failures >= self.failure_threshold:
+                self._open()
+
+    def record_cancelled(self):
+        """Release a probe slot for a call that ended without a provider verdict (cancelled, local queue timeout)."""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self.probes_in_flight = max(0, self.probes_in_flight - 1)
+
+    def _open(self):
+        """Open the circuit (caller holds the lock)."""
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.times_opened += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            retry_after = 0.0
+            if self.state == OPEN:
+                retry_after = max(0.0, self.cool_down_seconds - (time.monotonic() - self.opened_at))
+            return {
+                "provider": self.provider,
+                "enabled": self.enabled,
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "times_opened": self.times_opened,
+                "rejected_calls": self.rejected_calls,
+                "failures": self.failures,
+                "slow_calls": self.slow_calls,
+                "retry_after_seconds": round(retry_after, 1)
+            }
+
+
+# Global instances, one per provider
+circuit_breakers: Dict[str, CircuitBreaker] = {}
+_registry_lock = threading.Lock()
+
+def get_circuit_breaker(provider: str) -> CircuitBreaker:
+    """Get or create the shared circuit breaker for a provider."""
+    with _registry_lock:
+        if provider not in circuit_breakers:
+            circuit_breakers[provider] = CircuitBreaker(
+                provider,
+                failure_threshold=int(os.getenv("LLM_BREAKER_FAILURE_THRESHOLD", "5")),
+                slow_call_seconds=float(os.getenv("LLM_BREAKER_SLOW_CALL_SECONDS", "30")),
+                cool_down_seconds=float(os.getenv("LLM_BREAKER_COOL_DOWN_SECONDS", "30")),
+                half_open_max_calls=int(os.getenv("LLM_BREAKER_HALF_OPEN_PROBES", "1")),
+                success_threshold=int(os.getenv("LLM_BREAKER_SUCCESS_THRESHOLD", "2")),
+                enabled=os.getenv("LLM_BREAKER_ENABLED", "true").lower() == "true"
+            )
+        return circuit_breakers[provider]
+
+def get_circuit_breaker_stats() -> Dict[str, Any]:
+    """State of every provider breaker created so far."""
+    with _registry_lock:
+        breakers = list(circuit_breakers.values())
+    return {breaker.provider: breaker.get_stats() for breaker in breakers}
@@ -1,8 +1,271 @@
+import hashlib
+import json
+import logging
+import multiprocessing
+import numpy as np
+import openpyxl
 import pandas as pd
 import os
-from typing import List, Dict, Any, Optional
+import threading
+import time
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
+from openpyxl.cell.cell import TYPE_ERROR, TYPE_NUMERIC
+from pandas.io.parsers import TextParser
+from pydantic import TypeAdapter, ValidationError
 from app.models import ComprehensivePatientData
+from app.patient_snapshot import get_patient_snapshots, source_signature
+
+logger = logging.getLogger(__name__)
+
+# Source column names accepted for each patient field, in lookup order. Text fields take the first
+# non-empty alias; integer and date fields take the first alias present in the header.
+PATIENT_FIELD_ALIASES: Dict[str, Tuple[str, ...]] = {
+    # Basic Information
+    "patient_id": ("PatientID", "Patient ID", "patient_id", "ID"),
+    "name": ("Name", "name", "Patient Name"),
+    "gender": ("Gender", "gender", "Sex"),
+    "age": ("Age", "age"),
+    "mrn": ("MRN", "mrn", "Medical Record Number"),
+    "address": ("Address", "address", "Patient Address"),
+    "phone": ("Contact Number", "Phone", "phone", "Contact", "Phone Number"),
+    "emergency_contact": ("Emergency Contact", "emergency_contact", "Emergency Contact Name"),
+    "emergency_contact_phone": ("Emergency Contact Phone", "emergency_contact_phone", "Emergency Phone"),
+    # ICU Information
+    "icu_admission_date": ("ICU Admission Date", "icu_admission_date"),
+    "icu_discharge_date": ("ICU Discharge Date", "icu_discharge_date"),
+    "length_of_stay_days": ("Length of Stay (Days)", "length_of_stay_days", "Length of Stay"),
+    "primary_icu_diagnosis": ("Primary ICU Diagnosis", "primary_icu_diagnosis", "Primary Diagnosis", "Diagnosis"),
+    "secondary_diagnoses": ("Secondary Diagnoses", "secondary_diagnoses", "Secondary Diagnosis"),
+    "allergies": ("Allergies", "allergies", "Allergy"),
+    # Medication Information
+    "medication": ("Medication", "medication", "Drug", "Med"),
+    "dosage": ("Dosage", "dosage", "Dose"),
+    "frequency": ("Frequency", "frequency", "Freq"),
+    "route": ("Route", "route", "Administration Route"),
+    "duration_of_therapy": ("Duration of Therapy", "duration_of_therapy", "Duration"),
+    "vascular_access": ("Vascular Access", "vascular_access", "IV Access"),
+    "prescriber_name": ("Prescriber Name", "prescriber_name", "Doctor", "Physician"),
+    "prescriber_contact": ("Prescriber Contact", "prescriber_contact", "Doctor Phone"),
+    "npi_number": ("NPI Number", "npi_number", "NPI"),
+    # Nursing Care
+    "skilled_nursing_needed": ("Skilled Nursing Needed", "skilled_nursing_needed", "Nursing Required"),
+    "nursing_visit_frequency": ("Nursing Visit Frequency", "nursing_visit_frequency", "Visit Frequency"),
+    "type_of_nursing_care": ("Type of Nursing Care", "type_of_nursing_care", "Nursing Care Type"),
+    "nurse_agency": ("Nurse Agency", "nurse_agency", "Home Health Agency"),
+    "emergency_contact_procedure": ("Emergency Contact Procedure", "emergency_contact_procedure", "Emergency Procedure"),
+    # Equipment and DME
+    "equipment_needed": ("Equipment Needed", "equipment_needed", "DME Required", "Medical Equipment"),
+    "equipment_delivery_date": ("Equipment Delivery Date", "equipment_delivery_date"),
+    "dme_supplier": ("DME Supplier", "dme_supplier", "Equipment Supplier"),
+    # Additional Services
+    "physical_therapy": ("Physical Therapy", "physical_therapy", "PT"),
+    "occupational_therapy": ("Occupational Therapy", "occupational_therapy", "OT"),
+    "speech_therapy": ("Speech Therapy", "speech_therapy", "ST"),
+    "transportation_needed": ("Transportation Needed", "transportation_needed", "Transport"),
+    # Insurance and Administrative
+    "insurance_coverage_status": ("Insurance Coverage Status", "insurance_coverage_status", "Insurance Status"),
+    "follow_up_appointment_date": ("Follow-up Appointment Date", "follow_up_appointment_date"),
+    "follow_up_provider": ("Follow-up Provider", "follow_up_provider", "Follow-up Doctor"),
+    "special_instructions": ("Special Instructions", "special_instructions", "Notes", "Instructions"),
+}
+
+INT_FIELDS = {"age", "length_of_stay_days"}
+DATE_FIELDS = {"icu_admission_date", "icu_discharge_date", "equipment_delivery_date", "follow_up_appointment_date"}
+
+_PATIENT_LIST_ADAPTER = TypeAdapter(List[ComprehensivePatientData])
+
+# Bump when cell conversion changes; parsed snapshots are invalidated whenever this, the column mapping or the
+# patient model changes
+PARSER_VERSION = 2
+PARSER_SCHEMA = hashlib.sha256(json.dumps(
+    [PARSER_VERSION, PATIENT_FIELD_ALIASES, sorted(INT_FIELDS), sorted(DATE_FIELDS),
+     ComprehensivePatientData.model_json_schema()],
+    sort_keys=True
+).encode("utf-8")).hexdigest()[:16]
+
+
+def resolve_field_columns(columns) -> Dict[str, List[str]]:
+    """Map each patient model field to the aliases present in a file header (done once per file).
+
+    Fields the patient model does not store are skipped.
+    """
+    present = set(columns)
+    resolved = {}
+    for field, aliases in PATIENT_FIELD_ALIASES.items():
+        if field not in ComprehensivePatientData.model_fields:
+            continue
+        matches = [alias for alias in aliases if alias in present]
+        if field in INT_FIELDS or field in DATE_FIELDS:
+            matches = matches[:1]
+        resolved[field] = matches
+    return resolved
+
+
+def _text_column(df: pd.DataFrame, aliases: List[str]) -> np.ndarray:
+    """First non-empty alias value per row as a string ('' when every alias is empty)."""
+    values = np.full(len(df), '', dtype=object)
+    filled = np.zeros(len(df), dtype=bool)
+    for alias in aliases:
+        column = df[alias]
+        take = column.notna().to_numpy() & ~filled
+        if column.dtype == object:
+            take &= (column != '').to_numpy()
+        if not take.any():
+            continue
+        selected = column[take]
+        # str() per value, as the row path does (astype(str) would drop the time part of datetimes)
+        values[take] = (selected.map(str) if pd.api.types.is_datetime64_any_dtype(selected)
+                        else selected.astype(str)).to_numpy()
+        filled |= take
+    return values
+
+
+def _int_column(df: pd.DataFrame, aliases: List[str]) -> np.ndarray:
+    """Integer values truncated toward zero; None for empty or non-numeric cells."""
+    values = np.full(len(df), None, dtype=object)
+    if not aliases or pd.api.types.is_datetime64_any_dtype(df[aliases[0]]):
+        return values
+    numbers = np.trunc(pd.to_numeric(df[aliases[0]], errors='coerce').to_numpy(dtype=float))
+    valid = np.isfinite(numbers)
+    values[valid] = numbers[valid].astype(np.int64).tolist()
+    return values
+
+
+def _date_column(df: pd.DataFrame, aliases: List[str]) -> np.ndarray:
+    """Dates as YYYY-MM-DD strings (text cells kept as typed); None for empty cells."""
+    if not aliases:
+        return np.full(len(df), None, dtype=object)
+    column = df[aliases[0]]
+    if pd.api.types.is_datetime64_any_dtype(column):
+        values = np.full(len(df), None, dtype=object)
+        valid = column.notna().to_numpy()
+        values[valid] = column[valid].dt.strftime('%Y-%m-%d').to_numpy()
+        return values
+    # Mixed text/datetime cells: convert cell by cell
+    return np.array([DataService._safe_date(value) for value in column.tolist()], dtype=object)
+
+
+def frame_to_patient_records(df: pd.DataFrame, field_columns: Optional[Dict[str, List[str]]] = None) -> List[Dict[str, Any]]:
+    """Convert a patient DataFrame column by column into keyword dicts for ComprehensivePatientData."""
+    field_columns = field_columns if field_columns is not None else resolve_field_columns(df.columns)
+    converted = {}
+    for field, aliases in field_columns.items():
+        if field in INT_FIELDS:
+            converted[field] = _int_column(df, aliases)
+        elif field in DATE_FIELDS:
+            converted[field] = _date_column(df, aliases)
+        else:
+            converted[field] = _text_column(df, aliases)
+    fields = list(converted)
+    return [dict(zip(fields, values)) for values in zip(*(converted[field].tolist() for field in fields))]
+
+
+def records_to_patients(records: List[Dict[str, Any]]) -> List[ComprehensivePatientData]:
+    """Validate records in one batch; when some are invalid, validate row by row and skip the bad ones."""
+    try:
+        return _PATIENT_LIST_ADAPTER.validate_python(records)
+    except ValidationError:
+        pass
+    patients = []
+    for record in records:
+        try:
+            patients.append(ComprehensivePatientData(**record))
+        except Exception as e:
+            # Skip problematic rows but continue processing
+            logger.warning(f"⚠️ Skipping row due to error: {e}")
+    return patients
+
+
+def patient_fingerprint(patient: ComprehensivePatientData) -> int:
+    """Hash of every field value; equal fingerprints mean the patient's row did not change."""
+    return hash(tuple(vars(patient).values()))
+
+
+def read_patient_workbook(file_path: str) -> pd.DataFrame:
+    """Read a whole workbook with cells kept as typed (dtype=object), exactly as iter_patient_chunks does.
+
+    Without it read_excel infers a type per column, so an all-digit text column such as "0123" became 123.
+    """
+    return pd.read_excel(file_path, dtype=object)
+
+
+def _convert_cell(cell) -> Any:
+    """Cell value as pd.read_excel sees it: '' for empty cells, NaN for errors, integral numbers as int."""
+    if cell.value is None:
+        return ''
+    if cell.data_type == TYPE_ERROR:
+        return np.nan
+    if cell.data_type == TYPE_NUMERIC:
+        number = int(cell.value)
+        return number if number == cell.value else float(cell.value)
+    return cell.value
+
+
+def iter_patient_chunks(file_path: str, chunk_rows: int = 5000) -> Iterator[Tuple[int, List[ComprehensivePatientData]]]:
+    """Stream the first sheet of an .xlsx file in read-only mode, yielding (rows read so far, patients) per chunk.
+
+    Only one chunk of raw rows is held at a time; each chunk goes through the same NA handling and
+    conversion as read_patient_workbook before the columnar conversion.
+    """
+    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows()
+        header = [_convert_cell(cell) for cell in next(rows, ())]
+        while header and header[-1] == '':
+            header.pop()
+        width = len(header)
+        rows_read = 0
+        field_columns = None
+        chunk: List[List[Any]] = []
+
+        def convert(chunk: List[List[Any]]) -> List[ComprehensivePatientData]:
+            nonlocal field_columns
+            df = TextParser([header] + chunk, header=0, dtype=object).read()
+            if field_columns is None:
+                field_columns = resolve_field_columns(df.columns)
+            return records_to_patients(frame_to_patient_records(df, field_columns))
+
+        for row in rows:
+            values = [_convert_cell(cell) for cell in row[:width]]
+            rows_read += 1
+            if any(value != '' for value in values):
+                chunk.append(values + [''] * (width - len(values)))
+            if len(chunk) >= chunk_rows:
+                yield rows_read, convert(chunk)
+                chunk = []
+        if chunk:
+            yield rows_read, convert(chunk)
+    finally:
+        workbook.close()
+
+
+def parse_patient_file(file_path: str, stream_threshold_bytes: int, chunk_rows: int) -> Tuple[List[ComprehensivePatientData], Dict[str, Any]]:
+    """Parse one workbook into patients plus row count, parse time and source signature.
+
+    Module-level and free of DataService state so it can run in a worker process.
+    """
+    start = time.perf_counter()
+    signature = source_signature(file_path)
+    if file_path.endswith('.xlsx') and signature["size"] >= stream_threshold_bytes:
+        mode, rows, patients = "stream", 0, []
+        for rows, chunk in iter_patient_chunks(file_path, chunk_rows):
+            patients.extend(chunk)
+    else:
+        mode = "full"
+        df = read_patient_workbook(file_path)
+        rows = len(df)
+        patients = records_to_patients(frame_to_patient_records(df))
+    return patients, {
+        "mode": mode,
+        "rows": rows,
+        "patients": len(patients),
+        "parse_seconds": round(time.perf_counter() - start, 3),
+        "signature": signature
+    }
+
 
 class DataService:
     def __init__(self):
@@ -10,6 +273,20 @@ class DataService:
         project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         self.data_directory = os.path.join(project_root, "patient_data")
         self.patient_cache: Dict[str, ComprehensivePatientData] = {}
+        self._fingerprints: Dict[str, int] = {}
+        self.last_delta: Optional[Dict[str, Any]] = None
+        
+        # Workbooks at least this large are streamed in read-only mode, chunk by chunk
+        self.stream_threshold_bytes = int(float(os.getenv("PATIENT_STREAM_THRESHOLD_MB", "5")) * 1024 * 1024)
+        self.stream_chunk_rows = int(os.getenv("PATIENT_STREAM_CHUNK_ROWS", "5000"))
+        self.load_progress: Dict[str, Any] = {"status": "idle"}
+        self._load_lock = threading.Lock()
+        
+        # "latest" loads the newest workbook; "merged" loads every workbook, newest file wins per patient_id
+        self.load_mode = os.getenv("PATIENT_LOAD_MODE", "latest").lower()
+        self.parse_workers = int(os.getenv("PATIENT_PARSE_WORKERS", "0")) or os.cpu_count() or 1
+        self.file_stats: List[Dict[str, Any]] = []
+        self._file_patients: Dict[str, List[ComprehensivePatientData]] = {}
         
         # Ensure data directory exists
         os.makedirs(self.data_directory, exist_ok=True)
@@ -21,36 +298,187 @@ class DataService:
         """Set the directory path where Excel files are located."""
         self.data_directory = directory_path
         os.makedirs(self.data_directory, exist_ok=True)
-        print(f"📁 Data directory set to: {directory_path}")
+        logger.info(f"📁 Data directory set to: {directory_path}")
     
     def _auto_load_data(self):
-        """Automatically load the most recent Excel file from the data directory."""
+        """Automatically load the data directory (most recent Excel file, or all of them in merged mode)."""
         try:
-            excel_files = [f for f in os.listdir(self.data_directory) if f.endswith(('.xlsx', '.xls'))]
-            
-            if not excel_files:
-                print(f"📁 No Excel files found in {self.data_directory}")
-                print(f"💡 Place your patient data Excel files in: {self.data_directory}")
-                return
-            
-            # Sort by modification time, get the most recent
-            excel_files.sort(key=lambda x: os.path.getmtime(os.path.join(self.data_directory, x)), reverse=True)
-            latest_file = excel_files[0]
-            
-            file_path = os.path.join(self.data_directory, latest_file)
-            print(f"📊 Auto-loading latest patient data: {latest_file}")
-            
-            patients = self._load_excel_file(file_path)
-            
-            # Cache patients
-            self.patient_cache.clear()
-            for patient in patients:
-                self.patient_cache[patient.patient_id] = patient
-            
-            print(f"✅ Loaded {len(patients)} patients from {latest_file}")
-            
+            self.reload_data_directory()
         except Exception as e:
-            print(f"⚠️  Auto-load failed: {e}")
+            logger.warning(f"⚠️ Auto-load failed: {e}")
+    
+    def reload_data_directory(self) -> Optional[Dict[str, Any]]:
+        """Reload according to load_mode and return the applied delta."""
+        if self.load_mode == "merged":
+            return self.load_all_files()
+        return self.load_latest_file()
+    
+    def load_all_files(self) -> Optional[Dict[str, Any]]:
+        """Load every Excel file (in parallel worker processes) and merge them; the newest file wins per patient_id."""
+        excel_files = self.scan_data_files()
+        
+        if not excel_files:
+            logger.info(f"📁 No Excel files found in {self.data_directory}; place patient data Excel files there")
+            return None
+        
+        # Oldest first (ties broken by name) so newer files overwrite older ones when merging
+        ordered = sorted(excel_files, key=lambda filename: (excel_files[filename][1], filename))
+        logger.info(f"📊 Loading and merging {len(ordered)} patient data files")
+        
+        with self._load_lock:
+            self._start_progress(self.data_directory, "merged")
+            file_patients, file_stats = self._parse_files(ordered)
+            merged: Dict[str, ComprehensivePatientData] = {}
+            for filename in ordered:
+                for patient in file_patients.get(filename, []):
+                    merged[patient.patient_id] = patient
+            self._file_patients = file_patients
+            self.file_stats = file_stats
+            self._update_progress(status="loaded", files=len(ordered), rows_read=sum(stat.get("rows", 0) for stat in file_stats),
+                                  patients_loaded=len(merged))
+            delta = self._apply_patients(list(merged.values()), f"{len(ordered)} files")
+        
+        logger.info(f"✅ Loaded {len(merged)} patients from {len(ordered)} files")
+        return delta
+    
+    def _parse_files(self, filenames: List[str]) -> Tuple[Dict[str, List[ComprehensivePatientData]], List[Dict[str, Any]]]:
+        """Patients and load stats per file: snapshots first, the rest parsed across a process pool.
+
+        A file that fails to parse keeps the patients from its last successful load.
+        """
+        snapshots = get_patient_snapshots()
+        file_patients: Dict[str, List[ComprehensivePatientData]] = {}
+        stats: Dict[str, Dict[str, Any]] = {}
+        to_parse = []
+        for filename in filenames:
+            file_path = os.path.join(self.data_directory, filename)
+            start = time.perf_counter()
+            patients = snapshots.load(file_path, PARSER_SCHEMA) if snapshots is not None else None
+            if patients is None:
+                to_parse.append(filename)
+                continue
+            file_patients[filename] = patients
+            stats[filename] = {"source": "snapshot", "rows": len(patients), "patients": len(patients),
+                               "parse_seconds": round(time.perf_counter() - start, 3)}
+        
+        def parsed(filename: str, result: Tuple[List[ComprehensivePatientData], Dict[str, Any]]):
+            patients, file_stat = result
+            signature = file_stat.pop("signature")
+            file_patients[filename] = patients
+            stats[filename] = {"source": "parsed", **file_stat}
+            if snapshots is not None and patients:
+                snapshots.store(os.path.join(self.data_directory, filename), PARSER_SCHEMA, patients, signature)
+        
+        def failed(filename: str, error: Exception):
+            logger.warning(f"⚠️ Could not parse {filename}: {error}")
+            previous = self._file_patients.get(filename, [])
+            file_patients[filename] = previous
+            stats[filename] = {"source": "previous" if previous else "failed", "rows": 0, "patients": len(previous),
+                               "error": str(error)}
+        
+        def parse_inline(filename: str):
+            try:
+                parsed(filename, parse_patient_file(os.path.join(self.data_directory, filename),
+                                                    self.stream_threshold_bytes, self.stream_chunk_rows))
+            except Exception as e:
+                failed(filename, e)
+        
+        if len(to_parse) > 1 and self.parse_workers > 1:
+            # spawn: forking a process that already runs logging/executor threads can deadlock the child
+            with ProcessPoolExecutor(max_workers=min(self.parse_workers, len(to_parse)),
+                                     mp_context=multiprocessing.get_context("spawn")) as pool:
+                futures = {filename: pool.submit(parse_patient_file, os.path.join(self.data_directory, filename),
+                                                 self.stream_threshold_bytes, self.stream_chunk_rows)
+                           for filename in to_parse}
+                for filename, future in futures.items():
+                    try:
+                        parsed(filename, future.result())
+                    except BrokenProcessPool:
+                        # Workers could not start or died: parse in this process instead
+                        parse_inline(filename)
+                    except Exception as e:
+                        failed(filename, e)
+                    self._update_progress(files_done=len(stats))
+        else:
+            for filename in to_parse:
+                parse_inline(filename)
+                self._update_progress(files_done=len(stats))
+        
+        for filename in filenames:
+            logger.info(f"📄 {filename}: {stats[filename]['patients']} patients ({stats[filename]['source']})")
+        return file_patients, [{"filename": filename, **stats[filename]} for filename in filenames]
+    
+    def load_latest_file(self) -> Optional[Dict[str, Any]]:
+        """Load the most recently modified Excel file and apply it as a delta; None when there are no files."""
+        excel_files = self.scan_data_files()
+        
+        if not excel_files:
+            logger.info(f"📁 No Excel files found in {self.data_directory}; place patient data Excel files there")
+            return None
+        
+        # Most recently modified file
+        latest_file = max(excel_files, key=lambda filename: excel_files[filename][1])
+        
+        file_path = os.path.join(self.data_directory, latest_file)
+        logger.info(f"📊 Auto-loading latest patient data: {latest_file}")
+        
+        with self._load_lock:
+            patients = self._load_excel_file(file_path)
+            delta = self._apply_patients(patients, latest_file)
+        
+        logger.info(f"✅ Loaded {len(patients)} patients from {latest_file}")
+        return delta
+    
+    def scan_data_files(self) -> Dict[str, Tuple[int, int]]:
+        """Size and mtime (ns) of every Excel file in the data directory, skipping Excel lock files."""
+        scan = {}
+        for filename in os.listdir(self.data_directory):
+            if filename.endswith(('.xlsx', '.xls')) and not filename.startswith('~$'):
+                try:
+                    stat = os.stat(os.path.join(self.data_directory, filename))
+                except FileNotFoundError:
+                    continue
+                scan[filename] = (stat.st_size, stat.st_mtime_ns)
+        return scan
+    
+    def _apply_patients(self, patients: List[ComprehensivePatientData], source: str) -> Dict[str, Any]:
+        """Diff patients against the cache by patient_id and row fingerprint; apply only the changes.
+        
+        The delta is applied to a copy that replaces patient_cache in one assignment (callers hold _load_lock),
+        so readers iterating the cache never see it change size or a half-applied delta.
+        """
+        incoming = {patient.patient_id: patient for patient in patients}
+        fingerprints = {patient_id: patient_fingerprint(patient) for patient_id, patient in incoming.items()}
+        patient_cache = dict(self.patient_cache)
+        
+        inserted = updated = 0
+        for patient_id, fingerprint in fingerprints.items():
+            previous = self._fingerprints.get(patient_id)
+            if previous == fingerprint:
+                continue
+            if previous is None:
+                inserted += 1
+            else:
+                updated += 1
+            patient_cache[patient_id] = incoming[patient_id]
+        
+        deleted = [patient_id for patient_id in self._fingerprints if patient_id not in fingerprints]
+        for patient_id in deleted:
+            patient_cache.pop(patient_id, None)
+        self.patient_cache = patient_cache
+        self._fingerprints = fingerprints
+        
+        self.last_delta = {
+            "source": source,
+            "inserted": inserted,
+            "updated": updated,
+            "deleted": len(deleted),
+            "unchanged": len(fingerprints) - inserted - updated,
+            "applied_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        }
+        if inserted or updated or deleted:
+            logger.info(f"🔄 Patient delta from {source}: +{inserted} ~{updated} -{len(deleted)}")
+        return self.last_delta
     
     def get_available_files(self) -> List[Dict[str, Any]]:
         """Get list of available Excel files in the data directory."""
@@ -74,7 +502,7 @@ class DataService:
             return file_info
             
         except Exception as e:
-            print(f"Error getting available files: {e}")
+            logger.error(f"❌ Error getting available files: {e}")
             return []
     
     def load_specific_file(self, filename: str) -> int:
@@ -84,15 +512,12 @@ class DataService:
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"File not found: {filename}")
         
-        print(f"📊 Loading patient data from: {filename}")
-        patients = self._load_excel_file(file_path)
-        
-        # Cache patients
-        self.patient_cache.clear()
-        for patient in patients:
-            self.patient_cache[patient.patient_id] = patient
+        logger.info(f"📊 Loading patient data from: {filename}")
+        with self._load_lock:
+            patients = self._load_excel_file(file_path)
+            self._apply_patients(patients, filename)
         
-        print(f"✅ Loaded {len(patients)} patients from {filename}")
+        logger.info(f"✅ Loaded {len(patients)} patients from {filename}")
         return len(patients)
     
     def refresh_data(self) -> int:
@@ -101,100 +526,95 @@ class DataService:
         return len(self.patient_cache)
     
     def _load_excel_file(self, file_path: str) -> List[ComprehensivePatientData]:
-        """Load and parse Excel file into patient data objects."""
+        """Load and parse Excel file into patient data objects (from its parsed snapshot when unchanged).
+
+        Workbooks above the streaming threshold are read row by row in read-only mode instead of being
+        materialized as a whole DataFrame; load_progress tracks rows read either way.
+        """
+        snapshots = get_patient_snapshots()
+        if snapshots is not None:
+            self._start_progress(file_path, "snapshot")
+            patients = snapshots.load(file_path, PARSER_SCHEMA)
+            if patients is not None:
+                self._update_progress(status="loaded", patients_loaded=len(patients))
+                logger.info(f"⚡ Loaded {len(patients)} patients from parsed snapshot of {os.path.basename(file_path)}")
+                return patients
+        
+        self._start_progress(file_path, "full")
         try:
-            # Read Excel file
-            df = pd.read_excel(file_path)
-            
-            # Basic check for completely empty file
-            if df.empty:
-                raise ValueError("Excel file is empty")
-            
-            patients = []
-            for _, row in df.iterrows():
-                try:
-                    patient = self._row_to_comprehensive_patient_data(row)
-                    patients.append(patient)
-                except Exception as e:
-                    # Skip problematic rows but continue processing
-                    print(f"⚠️  Warning: Skipping row due to error: {e}")
-                    continue
+            signature = source_signature(file_path)
+            if file_path.endswith('.xlsx') and signature["size"] >= self.stream_threshold_bytes:
+                patients = self._stream_excel_file(file_path)
+            else:
+                # Read Excel file
+                df = read_patient_workbook(file_path)
+                
+                # Basic check for completely empty file
+                if df.empty:
+                    raise ValueError("Excel file is empty")
+                
+                # Columnar conversion: aliases are resolved once per header and whole columns are coerced
+                patients = records_to_patients(frame_to_patient_records(df))
+                self._update_progress(rows_read=len(df), patients_loaded=len(patients))
             
             if not patients:
                 raise ValueError("No valid patient data could be processed from the file")
             
+            if snapshots is not None:
+                snapshots.store(file_path, PARSER_SCHEMA, patients, signature)
+            
+            self._update_progress(status="loaded")
             return patients
             
         except Exception as e:
+            self._update_progress(status="failed", error=str(e))
             raise Exception(f"Error loading Excel file: {str(e)}")
     
+    def _stream_excel_file(self, file_path: str) -> List[ComprehensivePatientData]:
+        """Convert an .xlsx file chunk by chunk; only one chunk of raw rows is in memory at a time."""
+        filename = os.path.basename(file_path)
+        self._start_progress(file_path, "stream")
+        patients: List[ComprehensivePatientData] = []
+        rows_read = 0
+        for rows_read, chunk in iter_patient_chunks(file_path, self.stream_chunk_rows):
+            patients.extend(chunk)
+            self._update_progress(rows_read=rows_read, patients_loaded=len(patients))
+            logger.info(f"📊 {filename}: {rows_read:,} rows read, {len(patients):,} patients")
+        if not rows_read:
+            raise ValueError("Excel file is empty")
+        return patients
+    
+    def _start_progress(self, file_path: str, mode: str):
+        self.load_progress = {
+            "file": os.path.basename(file_path), "mode": mode, "status": "loading",
+            "rows_read": 0, "patients_loaded": 0, "started_at": time.time(), "elapsed_seconds": 0.0
+        }
+    
+    def _update_progress(self, **fields):
+        """Publish load progress as a new dict so readers never see a half-updated one."""
+        progress = {**self.load_progress, **fields}
+        progress["elapsed_seconds"] = round(time.time() - progress["started_at"], 3)
+        self.load_progress = progress
+    
     def _row_to_comprehensive_patient_data(self, row) -> ComprehensivePatientData:
-        """Convert a pandas row to ComprehensivePatientData object."""
-        
-        # Helper function to get value from multiple possible column names
-        def get_value(row, *possible_names):
-            for name in possible_names:
-                if name in row and pd.notna(row[name]) and row[name] != '':
-                    return str(row[name])
-            return ''
-        
-        return ComprehensivePatientData(
-            # Basic Information
-            patient_id=get_value(row, 'PatientID', 'Patient ID', 'patient_id', 'ID'),
-            name=get_value(row, 'Name', 'name', 'Patient Name'),
-            gender=get_value(row, 'Gender', 'gender', 'Sex'),
-            age=self._safe_int(row.get('Age', row.get('age'))),
-            mrn=get_value(row, 'MRN', 'mrn', 'Medical Record Number'),
-            address=get_value(row, 'Address', 'address', 'Patient Address'),
-            phone=get_value(row, 'Contact Number', 'Phone', 'phone', 'Contact', 'Phone Number'),
-            emergency_contact=get_value(row, 'Emergency Contact', 'emergency_contact', 'Emergency Contact Name'),
-            emergency_contact_phone=get_value(row, 'Emergency Contact Phone', 'emergency_contact_phone', 'Emergency Phone'),
-            
-            # ICU Information
-            icu_admission_date=self._safe_date(row.get('ICU Admission Date', row.get('icu_admission_date'))),
-            icu_discharge_date=self._safe_date(row.get('ICU Discharge Date', row.get('icu_discharge_date'))),
-            length_of_stay_days=self._safe_int(row.get('Length of Stay (Days)', row.get('length_of_stay_days', row.get('Length of Stay')))),
-            primary_icu_diagnosis=get_value(row, 'Primary ICU Diagnosis', 'primary_icu_diagnosis', 'Primary Diagnosis', 'Diagnosis'),
-            secondary_diagnoses=get_value(row, 'Secondary Diagnoses', 'secondary_diagnoses', 'Secondary Diagnosis'),
-            allergies=get_value(row, 'Allergies', 'allergies', 'Allergy'),
-            
-            # Medication Information
-            medication=get_value(row, 'Medication', 'medication', 'Drug', 'Med'),
-            dosage=get_value(row, 'Dosage', 'dosage', 'Dose'),
-            frequency=get_value(row, 'Frequency', 'frequency', 'Freq'),
-            route=get_value(row, 'Route', 'route', 'Administration Route'),
-            duration_of_therapy=get_value(row, 'Duration of Therapy', 'duration_of_therapy', 'Duration'),
-            vascular_access=get_value(row, 'Vascular Access', 'vascular_access', 'IV Access'),
-            prescriber_name=get_value(row, 'Prescriber Name', 'prescriber_name', 'Doctor', 'Physician'),
-            prescriber_contact=get_value(row, 'Prescriber Contact', 'prescriber_contact', 'Doctor Phone'),
-            npi_number=get_value(row, 'NPI Number', 'npi_number', 'NPI'),
-            
-            # Nursing Care
-            skilled_nursing_needed=get_value(row, 'Skilled Nursing Needed', 'skilled_nursing_needed', 'Nursing Required'),
-            nursing_visit_frequency=get_value(row, 'Nursing Visit Frequency', 'nursing_visit_frequency', 'Visit Frequency'),
-            type_of_nursing_care=get_value(row, 'Type of Nursing Care', 'type_of_nursing_care', 'Nursing Care Type'),
-            nurse_agency=get_value(row, 'Nurse Agency', 'nurse_agency', 'Home Health Agency'),
-            emergency_contact_procedure=get_value(row, 'Emergency Contact Procedure', 'emergency_contact_procedure', 'Emergency Procedure'),
-            
-            # Equipment and DME
-            equipment_needed=get_value(row, 'Equipment Needed', 'equipment_needed', 'DME Required', 'Medical Equipment'),
-            equipment_delivery_date=self._safe_date(row.get('Equipment Delivery Date', row.get('equipment_delivery_date'))),
-            dme_supplier=get_value(row, 'DME Supplier', 'dme_supplier', 'Equipment Supplier'),
-            
-            # Additional Services
-            physical_therapy=get_value(row, 'Physical Therapy', 'physical_therapy', 'PT'),
-            occupational_therapy=get_value(row, 'Occupational Therapy', 'occupational_therapy', 'OT'),
-            speech_therapy=get_value(row, 'Speech Therapy', 'speech_therapy', 'ST'),
-            transportation_needed=get_value(row, 'Transportation Needed', 'transportation_needed', 'Transport'),
-            
-            # Insurance and Administrative
-            insurance_coverage_status=get_value(row, 'Insurance Coverage Status', 'insurance_coverage_status', 'Insurance Status'),
-            follow_up_appointment_date=self._safe_date(row.get('Follow-up Appointment Date', row.get('follow_up_appointment_date'))),
-            follow_up_provider=get_value(row, 'Follow-up Provider', 'follow_up_provider', 'Follow-up Doctor'),
-            special_instructions=get_value(row, 'Special Instructions', 'special_instructions', 'Notes', 'Instructions')
-        )
-    
-    def _safe_int(self, value) -> Optional[int]:
+        """Convert a single pandas row to ComprehensivePatientData (row-at-a-time path; files use the columnar path)."""
+        values = {}
+        for field, aliases in PATIENT_FIELD_ALIASES.items():
+            if field in INT_FIELDS:
+                present = [alias for alias in aliases if alias in row]
+                values[field] = self._safe_int(row[present[0]] if present else None)
+            elif field in DATE_FIELDS:
+                present = [alias for alias in aliases if alias in row]
+                values[field] = self._safe_date(row[present[0]] if present else None)
+            else:
+                values[field] = next(
+                    (str(row[alias]) for alias in aliases if alias in row and pd.notna(row[alias]) and row[alias] != ''),
+                    ''
+                )
+        return ComprehensivePatientData(**values)
+    
+    @staticmethod
+    def _safe_int(value) -> Optional[int]:
         """Safely convert value to integer."""
         if pd.isna(value) or value == '' or value is None:
             return None
@@ -203,7 +623,8 @@ class DataService:
         except (ValueError, TypeError):
             return None
     
-    def _safe_date(self, value) -> Optional[str]:
+    @staticmethod
+    def _safe_date(value) -> Optional[str]:
         """Safely convert value to date string."""
         if pd.isna(value) or value == '' or value is None:
             return None
@@ -217,9 +638,10 @@ class DataService:
     # Keep existing methods for compatibility
     def get_patient(self, patient_id: str) -> ComprehensivePatientData:
         """Retrieve patient data from cache."""
-        if patient_id not in self.patient_cache:
+        patient = self.patient_cache.get(patient_id)
+        if patient is None:
             raise ValueError(f"Patient {patient_id} not found")
-        return self.patient_cache[patient_id]
+        return patient
     
     def list_patients(self) -> List[ComprehensivePatientData]:
         """List all cached patient data."""
@@ -227,16 +649,21 @@ class DataService:
     
     def get_patient_summary(self) -> Dict[str, Any]:
         """Get summary of loaded patient data."""
-        if not self.patient_cache:
+        patient_cache = self.patient_cache  # one snapshot for the whole summary
+        if not patient_cache:
             return {
                 "total_patients": 0,
                 "data_directory": self.data_directory,
                 "status": "No data loaded",
+                "load_progress": self.load_progress,
+                "last_delta": self.last_delta,
+                "load_mode": self.load_mode,
+                "files": self.file_stats,
                 "available_files": self.get_available_files()
             }
         
         return {
-            "total_patients": len(self.patient_cache),
+            "total_patients": len(patient_cache),
             "data_directory": self.data_directory,
             "patients": [
                 {
@@ -244,8 +671,12 @@ class DataService:
                     "name": patient.name,
                     "diagnosis": patient.primary_icu_diagnosis
                 }
-                for patient in self.patient_cache.values()
+                for patient in patient_cache.values()
             ],
             "status": "Data loaded successfully",
+            "load_progress": self.load_progress,
+            "last_delta": self.last_delta,
+            "load_mode": self.load_mode,
+            "files": self.file_stats,
             "available_files": self.get_available_files()
         }
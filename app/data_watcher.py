@@ -0,0 +1,102 @@
+"""
+Background watcher for the patient data directory.
+Polls the size and mtime of every workbook in DataService.data_directory (no inotify dependency,
+and it works on network shares). When the directory changes and then stays unchanged for one more
+poll, so a file still being copied is not read half-written, the patients are reloaded and applied
+as a delta (inserts/updates/deletes by patient_id and row fingerprint).
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class DataDirectoryWatcher:
+    """Polling watcher that delta-reloads DataService when its workbooks change."""
+
+    def __init__(self, data_service, interval_seconds: float = 5.0):
+        self.data_service = data_service
+        self.interval_seconds = interval_seconds
+        self._applied: Optional[Dict[str, Tuple[int, int]]] = None
+        self._pending: Optional[Dict[str, Tuple[int, int]]] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.polls = 0
+        self.reloads = 0
+        self.errors = 0
+        self.totals = {"inserted": 0, "updated": 0, "deleted": 0}
+        self.last_change_at: Optional[float] = None
+
+    def poll_once(self) -> Optional[Dict[str, Any]]:
+        """Scan once; returns the applied delta when a settled change was reloaded, else None."""
+        self.polls += 1
+        current = self.data_service.scan_data_files()
+        if self._applied is None:
+            self._applied = current
+            return None
+        if current == self._applied:
+            self._pending = None
+            return None
+        if current != self._pending:
+            # Changed since the last poll: wait until it settles
+            self._pending = current
+            return None
+
+        self._applied, self._pending = current, None
+        self.last_change_at = time.time()
+        try:
+            delta = self.data_service.reload_data_directory()
+        except Exception as e:
+            # Not retried until the directory changes again
+            self.errors += 1
+            logger.warning(f"⚠️ Reload after data directory change failed: {e}")
+            return None
+        if delta is None:
+            return None
+        self.reloads += 1
+        for key in self.totals:
+            self.totals[key] += delta[key]
+        return delta
+
+    def _run(self):
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                self.poll_once()
+            except Exception as e:
+                self.errors += 1
+                logger.warning(f"⚠️ Data directory poll failed: {e}")
+
+    def start(self):
+        """Take the current directory state as loaded and start polling in a daemon thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._applied = self.data_service.scan_data_files()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="data-directory-watcher", daemon=True)
+        self._thread.start()
+        logger.info(f"👀 Watching {self.data_service.data_directory} every {self.interval_seconds}s")
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._thread is not None and self._thread.is_alive(),
+            "data_directory": self.data_service.data_directory,
+            "interval_seconds": self.interval_seconds,
+            "watched_files": len(self._applied or {}),
+            "change_pending": self._pending is not None,
+            "polls": self.polls,
+            "reloads": self.reloads,
+            "errors": self.errors,
+            "delta_totals": dict(self.totals),
+            "last_delta": self.data_service.last_delta,
+            "last_change_at": self.last_change_at
+        }
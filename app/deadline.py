@@ -0,0 +1,71 @@
+"""
+Request deadlines propagated through the discharge pipeline.
+The deadline lives in a context variable, so agent tasks and executor work started
+while handling a request inherit it automatically.
+"""
+
+import asyncio
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Upper bound for any single LLM call, even when the request carries no deadline
+DEFAULT_LLM_CALL_TIMEOUT = float(os.getenv("LLM_CALL_TIMEOUT_SECONDS", "60"))
+
+_request_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when the request deadline (or per-call timeout) passes before work completes."""
+
+
+@contextmanager
+def request_deadline(timeout_seconds: Optional[float]):
+    """Set the deadline for work done inside this block (no-op when timeout_seconds is None)."""
+    if timeout_seconds is None:
+        yield
+        return
+    deadline = time.monotonic() + max(0.0, timeout_seconds)
+    current = _request_deadline.get()
+    # A nested block can only tighten the deadline, never extend it
+    token = _request_deadline.set(deadline if current is None else min(current, deadline))
+    try:
+        yield
+    finally:
+        _request_deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current deadline (None when no deadline is set)."""
+    deadline = _request_deadline.get()
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+def effective_timeout(default: Optional[float] = None) -> Optional[float]:
+    """The tighter of the remaining request time and a default per-call timeout."""
+    left = remaining()
+    if left is None:
+        return default
+    return left if default is None else min(left, default)
+
+
+async def wait_for(awaitable: Awaitable[T], default: Optional[float] = DEFAULT_LLM_CALL_TIMEOUT) -> T:
+    """Await within the current deadline, raising DeadlineExceeded when it passes."""
+    timeout = effective_timeout(default)
+    if timeout is not None and timeout <= 0:
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        raise DeadlineExceeded("Request deadline already exceeded")
+    try:
+        return await asyncio.wait_for(awaitable, timeout)
+    except DeadlineExceeded:
+        # Raised by the awaited work itself (an inner bound), not by this wait
+        raise
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded(f"Deadline exceeded after {timeout:.2f}s")
@@ -7,24 +7,36 @@ import pandas as pd
 import numpy as np
 import json
 import os
+import time
 from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 import logging
 from pathlib import Path
-import google.generativeai as genai
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 import pickle
 from dotenv import load_dotenv
+from app.llm_cache import get_llm_cache, make_cache_key
+from app.rate_limiter import get_rate_limiter, estimate_tokens, RateLimitTimeout
+from app.circuit_breaker import get_circuit_breaker
+from app.fake_llm import FAKE_MODEL_NAME
+from app.llm_clients import generate_blocking, get_llm_clients
+from app.metrics import get_metrics, timed
+from app.tracing import set_attribute, traced
+from app.logging_config import configure_logging, shutdown_logging
+from app.llm_recorder import get_llm_recorder
+from app import deadline
 
 # Load environment variables
 load_dotenv()
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Bump when the nurse ranking prompt changes so cached rankings are not reused
+RECOMMENDATION_PROMPT_VERSION = "2024.1"
+NURSE_MODEL_NAME = "gemini-1.5-flash"
+
 @dataclass
 class NurseProfile:
     """Structured nurse profile for recommendations."""
@@ -90,18 +102,25 @@ class NurseRAGSystem:
         
         # Initialize Google AI
         self.ai_client = None
+        self.ai_provider = "google"
         self._init_ai_client()
         
         # Load and index nurse profiles
         self.refresh_nurse_data()
     
     def _init_ai_client(self):
-        """Initialize Google AI client."""
-        google_api_key = os.getenv("GOOGLE_AI_API_KEY")
-        if google_api_key:
+        """Get the nurse-ranking model from the shared LLM client registry."""
+        registry = get_llm_clients()
+        providers = registry.providers()
+        self.model_name = NURSE_MODEL_NAME
+        if "fake" in providers:
+            self.ai_client = registry.get_client("fake", FAKE_MODEL_NAME)
+            self.ai_provider = "fake"
+            self.model_name = FAKE_MODEL_NAME
+            logger.info("🧪 Using local fake LLM provider for nurse ranking")
+        elif "google" in providers:
             try:
-                genai.configure(api_key=google_api_key)
-                self.ai_client = genai.GenerativeModel('gemini-1.5-flash')
+                self.ai_client = registry.get_client("google", NURSE_MODEL_NAME)
                 logger.info("✅ Google AI client initialized successfully")
             except Exception as e:
                 logger.error(f"❌ Failed to initialize Google AI: {e}")
@@ -195,6 +214,8 @@ class NurseRAGSystem:
             logger.error(f"❌ Error refreshing nurse data: {e}")
             return False
     
+    @traced("retrieve_candidates")
+    @timed("retrieval")
     def retrieve_candidates(self, patient_context: str, top_k: int = 10) -> List[NurseProfile]:
         """Retrieve top-K nurse candidates using semantic similarity."""
         if self.profile_vectors is None or not self.profile_texts:
@@ -214,13 +235,15 @@ class NurseRAGSystem:
             # Return corresponding nurse profiles
             candidates = [self.nurse_profiles[i] for i in top_indices]
             
-            logger.info(f"✅ Retrieved {len(candidates)} nurse candidates")
+            logger.debug(f"✅ Retrieved {len(candidates)} nurse candidates")
             return candidates
             
         except Exception as e:
             logger.error(f"❌ Error retrieving candidates: {e}")
             return []
     
+    @traced("apply_hard_filters")
+    @timed("hard_filters")
     def apply_hard_filters(self, candidates: List[NurseProfile], filters: Dict[str, Any]) -> List[NurseProfile]:
         """Apply hard filters to candidate list - with preferred vs required distinction."""
         filtered = []
@@ -268,7 +291,7 @@ class NurseRAGSystem:
             # Note: Preferred filters (preferred_certifications, preferred_payer) are handled in scoring
             filtered.append(nurse)
         
-        logger.info(f"✅ Applied hard filters: {len(candidates)} → {len(filtered)} candidates")
+        logger.debug(f"✅ Applied hard filters: {len(candidates)} → {len(filtered)} candidates")
         return filtered
     
     def get_nurse_recommendations(self, patient_context: Dict[str, Any], top_n: int = 5, top_k_retrieve: int = 15) -> List[NurseRecommendation]:
@@ -392,9 +415,14 @@ class NurseRAGSystem:
         
         return filters
     
+    @traced("_get_llm_recommendations")
+    @timed("nurse_ranking")
     def _get_llm_recommendations(self, patient_context: Dict[str, Any], candidates: List[NurseProfile], top_n: int) -> List[NurseRecommendation]:
         """Use LLM to score and rank nurse candidates."""
-        if not self.ai_client:
+        set_attribute("candidates", len(candidates))
+        recorder = get_llm_recorder()
+        replaying = recorder is not None and recorder.replaying
+        if not self.ai_client and not replaying:
             logger.error("❌ No AI client available for recommendations")
             return self._fallback_recommendations(candidates, top_n, patient_context)
         
@@ -402,20 +430,71 @@ class NurseRAGSystem:
             # Prepare prompt
             prompt = self._create_recommendation_prompt(patient_context, candidates, top_n)
             
-            # Get LLM response
-            response = self.ai_client.generate_content(prompt)
-            
-            if not response or not response.text:
+            # Get LLM response (replayed from a recording, or served from the response cache when the prompt
+            # repeats; recording bypasses the cache so every ranking is captured with its real latency)
+            cache = get_llm_cache() if recorder is None else None
+            # Keyed by the model actually ranking, so fake-provider rankings never answer for Gemini
+            cache_key = make_cache_key(prompt, self.model_name, RECOMMENDATION_PROMPT_VERSION)
+            if replaying:
+                response_text = recorder.replay_blocking("nurse_ranking", prompt, RECOMMENDATION_PROMPT_VERSION)
+            else:
+                response_text = cache.get(cache_key) if cache is not None else None
+            
+            fetched = False
+            if response_text is None:
+                # Brownout: skip the LLM while the provider's circuit is open
+                breaker = get_circuit_breaker(self.ai_provider)
+                if not breaker.allow_request():
+                    logger.warning(f"⚠️ {self.ai_provider} circuit open, using fallback nurse ranking")
+                    return self._fallback_recommendations(candidates, top_n, patient_context)
+                
+                # Share the provider's rate limiter with AIService (this runs in a worker thread)
+                provider_seconds = 0.0
+                
+                def generate():
+                    nonlocal provider_seconds
+                    # The worker thread inherits the request deadline; the provider call itself is bounded by it
+                    timeout = deadline.effective_timeout(deadline.DEFAULT_LLM_CALL_TIMEOUT)
+                    if timeout is not None and timeout <= 0:
+                        raise deadline.DeadlineExceeded("Request deadline already exceeded")
+                    sent_at = time.perf_counter()
+                    try:
+                        return generate_blocking(self.ai_client, prompt, timeout)
+                    finally:
+                        provider_seconds = time.perf_counter() - sent_at
+                
+                try:
+                    response = get_rate_limiter(self.ai_provider).run_blocking(generate, estimate_tokens(prompt))
+                except RateLimitTimeout:
+                    breaker.record_cancelled()
+                    raise
+                except Exception:
+                    breaker.record_failure()
+                    get_metrics().record_llm_failure(self.ai_provider)
+                    raise
+                breaker.record_success(provider_seconds)
+                response_text = response.text if response else ""
+                get_metrics().record_llm_call(self.ai_provider, provider_seconds, prompt, response_text)
+                if recorder is not None and response_text:
+                    recorder.record("nurse_ranking", prompt, RECOMMENDATION_PROMPT_VERSION, response_text,
+                                    provider_seconds)
+                fetched = True
+            
+            if not response_text:
                 logger.error("❌ Empty response from LLM")
                 return self._fallback_recommendations(candidates, top_n, patient_context)
             
             # Parse LLM response
-            recommendations = self._parse_llm_response(response.text, candidates)
+            recommendations = self._parse_llm_response(response_text, candidates)
             
             if not recommendations:
                 logger.warning("⚠️ Failed to parse LLM response, using fallback")
                 return self._fallback_recommendations(candidates, top_n, patient_context)
             
+            # Cache only rankings that parsed, so a malformed response is not served for the whole TTL
+            if fetched and cache is not None:
+                cache.set(cache_key, response_text)
+            
             return recommendations[:top_n]
             
         except Exception as e:
@@ -538,7 +617,7 @@ class NurseRAGSystem:
                 
                 recommendations.append(recommendation)
             
-            logger.info(f"✅ Parsed {len(recommendations)} recommendations from LLM")
+            logger.debug(f"✅ Parsed {len(recommendations)} recommendations from LLM")
             return recommendations
             
         except Exception as e:
@@ -648,7 +727,7 @@ class NurseRAGSystem:
         # Sort by score (highest first)
         recommendations.sort(key=lambda x: x.match_score, reverse=True)
         
-        logger.info(f"✅ Generated {len(recommendations)} enhanced fallback recommendations")
+        logger.debug(f"✅ Generated {len(recommendations)} enhanced fallback recommendations")
         return recommendations
 
 # Global instance
@@ -781,4 +860,6 @@ def run_test_cases():
 
 if __name__ == "__main__":
     # Run test cases
+    configure_logging()
     run_test_cases()
+    shutdown_logging()
@@ -0,0 +1,313 @@
+"""
+Local deterministic stand-in for the Gemini and OpenAI clients.
+Returns schema-valid JSON for routing (single, packed, combined), each agent and nurse ranking,
+with configurable latency distributions, error and 429 rates, so the pipeline can be load-tested offline.
+
+Responses depend only on the prompt; latency and injected failures come from a seeded RNG.
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+FAKE_MODEL_NAME = "fake-llm"
+
+
+class FakeProviderError(Exception):
+    """Injected provider failure (looks like a 503)."""
+
+    status_code = 503
+
+
+class FakeRateLimitError(Exception):
+    """Injected rate-limit response (looks like a 429)."""
+
+    status_code = 429
+
+
+def fake_provider_enabled() -> bool:
+    return os.getenv("LLM_FAKE_PROVIDER", "false").lower() == "true"
+
+
+class FakeLLMBehaviour:
+    """Latency and failure injection shared by every fake client."""
+
+    def __init__(self, latency_seconds: float = 0.5, latency_jitter: float = 0.5, distribution: str = "lognormal",
+                 error_rate: float = 0.0, rate_limit_rate: float = 0.0, seed: int = 0):
+        self.latency_seconds = latency_seconds
+        self.latency_jitter = latency_jitter
+        self.distribution = distribution
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+        self.calls = 0
+        self.errors = 0
+        self.rate_limited = 0
+
+    @classmethod
+    def from_env(cls) -> "FakeLLMBehaviour":
+        return cls(
+            latency_seconds=float(os.getenv("LLM_FAKE_LATENCY_SECONDS", "0.5")),
+            latency_jitter=float(os.getenv("LLM_FAKE_LATENCY_JITTER", "0.5")),
+            distribution=os.getenv("LLM_FAKE_LATENCY_DISTRIBUTION", "lognormal"),
+            error_rate=float(os.getenv("LLM_FAKE_ERROR_RATE", "0")),
+            rate_limit_rate=float(os.getenv("LLM_FAKE_RATE_LIMIT_RATE", "0")),
+            seed=int(os.getenv("LLM_FAKE_SEED", "0"))
+        )
+
+    def next_call(self) -> float:
+        """Draw this call's latency, raising an injected error or 429 when one is due."""
+        with self._lock:
+            self.calls += 1
+            roll = self._random.random()
+            if roll < self.rate_limit_rate:
+                self.rate_limited += 1
+                raise FakeRateLimitError("429 Resource has been exhausted (fake provider)")
+            if roll < self.rate_limit_rate + self.error_rate:
+                self.errors += 1
+                raise FakeProviderError("503 Service Unavailable (fake provider)")
+            return self._draw_latency()
+
+    def _draw_latency(self) -> float:
+        """Latency sample (caller holds the lock): fixed, uniform (± jitter) or lognormal (median, sigma=jitter)."""
+        if self.distribution == "fixed" or self.latency_seconds <= 0:
+            return max(0.0, self.latency_seconds)
+        if self.distribution == "uniform":
+            spread = self.latency_seconds * self.latency_jitter
+            return max(0.0, self._random.uniform(self.latency_seconds - spread, self.latency_seconds + spread))
+        return self._random.lognormvariate(math.log(self.latency_seconds), self.latency_jitter)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "errors": self.errors,
+                "rate_limited": self.rate_limited,
+                "distribution": self.distribution,
+                "latency_seconds": self.latency_seconds
+            }
+
+
+# ---- Deterministic responses ----
+
+_AGENT_PROMPT_MARKERS = [
+    ("nursing", "HOME HEALTH NURSING coordination agent"),
+    ("dme", "DME (Durable Medical Equipment) coordination agent"),
+    ("pharmacy", "PHARMACY TRANSITION coordination agent"),
+    ("state", "STATE/INSURANCE coordination agent"),
+]
+
+_AGENT_OUTPUTS = {
+    "nursing": {
+        "structured_data": {
+            "home_health_referral": True, "visit_frequency": "weekly", "care_plan_485_required": True,
+            "wound_care_protocol": False, "vital_signs_monitoring": True, "caregiver_education_needed": True,
+            "first_visit_target": "within 24 hours of discharge"
+        },
+        "recommendations": ["Initiate home health nursing referral with 485 plan of care",
+                            "Schedule first nursing visit within 24 hours of discharge"],
+        "next_steps": ["Contact home health agency for intake", "Prepare discharge education materials"],
+        "external_referrals": ["Home Health Agency - for skilled nursing visits"]
+    },
+    "dme": {
+        "structured_data": {
+            "equipment_category": "general", "medical_necessity_documented": True,
+            "insurance_authorization_required": True, "delivery_timeline": "before discharge",
+            "setup_training_needed": True, "duration_of_need": "ongoing", "physician_order_required": True
+        },
+        "recommendations": ["Obtain physician order with diagnosis code and medical necessity",
+                            "Schedule equipment delivery 24 hours before discharge"],
+        "next_steps": ["Contact DME supplier for equipment availability", "Submit prior authorization to insurance"],
+        "external_referrals": ["DME Supplier"]
+    },
+    "pharmacy": {
+        "structured_data": {
+            "medication_reconciliation_needed": True, "erx_handoff_required": True, "route_transition": "no_transition",
+            "insurance_coverage_verified": False, "pickup_delivery_arranged": False,
+            "allergy_alerts_documented": True, "duration_confirmed": True
+        },
+        "recommendations": ["Complete medication reconciliation with discharge medications",
+                            "Coordinate eRx handoff to the patient's community pharmacy"],
+        "next_steps": ["Contact community pharmacy for medication availability",
+                       "Arrange prescription pickup or delivery"],
+        "external_referrals": ["Community Pharmacy"]
+    },
+    "state": {
+        "structured_data": {
+            "prior_auth_required": True, "medicaid_waiver_eligible": False, "insurance_coverage_verified": False,
+            "state_program_referral_needed": False, "authorization_timeline": "3-5 business days",
+            "appeals_process_available": True
+        },
+        "recommendations": ["Verify insurance coverage for discharge services",
+                            "Submit required prior authorization forms"],
+        "next_steps": ["Contact insurance benefits department", "Complete authorization paperwork"],
+        "external_referrals": ["Insurance Authorization Department"]
+    },
+}
+
+_MISSING = re.compile(r"(?:none|not\b|n/a|unknown)", re.I)
+
+
+def _field(text: str, label: str) -> Optional[str]:
+    """Value after a profile label ("Label: value", "label=value" or "Label value" in the combined prompt)."""
+    match = re.search(label + r"\s*[:=]?\s*([^|;\n]*)", text, re.I)
+    return match.group(1).strip() if match else None
+
+
+def _route_profile(text: str) -> List[str]:
+    """Rule-of-thumb routing from a profile rendered in any of the routing prompt formats."""
+    agents = []
+    nursing = _field(text, r"(?:Skilled Nursing(?: Required| Needed)?\b|skilled_nursing)")
+    if nursing and nursing.lower().startswith("yes"):
+        agents.append("nursing")
+    equipment = _field(text, r"(?:Equipment for Home:|\bEquipment:|equipment=)")
+    if equipment and not _MISSING.match(equipment):
+        agents.append("dme")
+    medication = _field(text, r"(?:Discharge Medication:|\bMedication:|medication=)")
+    if medication and not _MISSING.match(medication):
+        agents.append("pharmacy")
+    insurance = _field(text, r"(?:Insurance Status:|insurance=)")
+    if insurance and insurance.lower() in ("pending", "denied", "unknown"):
+        agents.append("state")
+    return agents or ["nursing"]
+
+
+def _routing_entry(text: str, digest: int) -> Dict[str, Any]:
+    agents = _route_profile(text)
+    return {
+        "recommended_agents": agents,
+        "reasoning": f"Discharge coordination for {', '.join(agents)} logistics before the patient goes home",
+        "priority_score": 3 + digest % 6,
+        "estimated_timeline": "24-48 hours post-discharge"
+    }
+
+
+def _nurse_ranking(prompt: str, digest: int) -> Dict[str, Any]:
+    nurse_ids = list(dict.fromkeys(re.findall(r"\(ID:\s*([^)]+)\)", prompt)))
+    top_match = re.search(r"Rank the top (\d+)", prompt)
+    top_n = int(top_match.group(1)) if top_match else 5
+    ranked = sorted(nurse_ids, key=lambda nurse_id: hashlib.sha256(f"{digest}:{nurse_id}".encode()).hexdigest())
+    return {
+        "recommendations": [
+            {
+                "nurse_id": nurse_id,
+                "match_score": 95 - 7 * rank,
+                "rationale": "Clinical experience and certifications match the patient's discharge needs",
+                "key_strengths": ["Relevant specialty experience", "Serves the patient's area"],
+                "potential_concerns": [],
+                "availability_match": "Available during required hours",
+                "distance_estimate": "Within coverage radius"
+            }
+            for rank, nurse_id in enumerate(ranked[:top_n])
+        ]
+    }
+
+
+def fake_response(prompt: str) -> str:
+    """Schema-valid JSON response for any prompt this service sends; identical prompts get identical responses."""
+    digest = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8], 16)
+
+    if "AVAILABLE NURSES" in prompt:
+        return json.dumps(_nurse_ranking(prompt, digest))
+    if '"decisions"' in prompt:
+        entries = []
+        for line in prompt.splitlines():
+            match = re.search(r"patient_id=([^|\s]+)", line)
+            if match:
+                entries.append({"patient_id": match.group(1), **_routing_entry(line, digest)})
+        return json.dumps({"decisions": entries})
+    if '"routing"' in prompt and '"agents"' in prompt:
+        routing = _routing_entry(prompt, digest)
+        return json.dumps({
+            "routing": routing,
+            "agents": {agent: _AGENT_OUTPUTS[agent] for agent in routing["recommended_agents"]}
+        })
+    for agent, marker in _AGENT_PROMPT_MARKERS:
+        if marker in prompt:
+            return json.dumps(_AGENT_OUTPUTS[agent])
+    if "recommended_agents" in prompt:
+        return json.dumps(_routing_entry(prompt, digest))
+    return "{}"
+
+
+# ---- Client stand-ins ----
+
+class FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeGenerativeModel:
+    """Stand-in for google.generativeai.GenerativeModel (sync and async generate_content)."""
+
+    def __init__(self, model_name: str = FAKE_MODEL_NAME, behaviour: Optional[FakeLLMBehaviour] = None):
+        self.model_name = model_name
+        self.behaviour = behaviour or get_fake_behaviour()
+
+    def generate_content(self, prompt: str, timeout: Optional[float] = None, **kwargs) -> FakeResponse:
+        latency = self.behaviour.next_call()
+        if timeout is not None and latency > timeout:
+            time.sleep(timeout)
+            raise TimeoutError(f"Fake provider call exceeded {timeout}s")
+        time.sleep(latency)
+        return FakeResponse(fake_response(prompt))
+
+    async def generate_content_async(self, prompt: str, **kwargs) -> FakeResponse:
+        await asyncio.sleep(self.behaviour.next_call())
+        return FakeResponse(fake_response(prompt))
+
+
+class _FakeMessage:
+    def __init__(self, content: str):
+        self.content = content
+
+
+class _FakeChoice:
+    def __init__(self, content: str):
+        self.message = _FakeMessage(content)
+
+
+class _FakeCompletion:
+    def __init__(self, content: str):
+        self.choices = [_FakeChoice(content)]
+
+
+class _FakeCompletions:
+    def __init__(self, behaviour: FakeLLMBehaviour):
+        self.behaviour = behaviour
+
+    async def create(self, model: str, messages: List[Dict[str, str]], **kwargs) -> _FakeCompletion:
+        await asyncio.sleep(self.behaviour.next_call())
+        return _FakeCompletion(fake_response("\n".join(message["content"] for message in messages)))
+
+
+class _FakeChat:
+    def __init__(self, behaviour: FakeLLMBehaviour):
+        self.completions = _FakeCompletions(behaviour)
+
+
+class FakeAsyncOpenAI:
+    """Stand-in for openai.AsyncOpenAI (chat.completions.create only)."""
+
+    def __init__(self, behaviour: Optional[FakeLLMBehaviour] = None, **kwargs):
+        self.chat = _FakeChat(behaviour or get_fake_behaviour())
+
+
+# Global instance
+fake_behaviour = None
+
+def get_fake_behaviour() -> FakeLLMBehaviour:
+    """Get or create the shared latency/failure injection settings."""
+    global fake_behaviour
+    if fake_behaviour is None:
+        fake_behaviour = FakeLLMBehaviour.from_env()
+    return fake_behaviour
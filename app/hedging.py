@@ -0,0 +1,198 @@
+"""
+Hedged LLM requests.
+After a percentile-based delay with no answer, a backup request is sent (same or alternate provider);
+the first valid response wins and the other request is cancelled.
+"""
+
+import asyncio
+import bisect
+import os
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+# Latency bucket upper bounds in seconds (roughly log-spaced, covering typical LLM round trips)
+DEFAULT_LATENCY_BUCKETS = [
+    0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 4.0, 5.0,
+    7.5, 10.0, 15.0, 20.0, 30.0, 45.0, 60.0, 120.0
+]
+
+
+class LatencyHistogram:
+    """Thread-safe fixed-bucket latency histogram with percentile estimates."""
+
+    def __init__(self, buckets: Optional[List[float]] = None):
+        self.buckets = list(buckets or DEFAULT_LATENCY_BUCKETS)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.total = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+            self.count += 1
+            self.total += seconds
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Upper bound of the bucket containing the p-th percentile (None when empty)."""
+        with self._lock:
+            if self.count == 0:
+                return None
+            rank = self.count * p / 100.0
+            cumulative = 0
+            for i, bucket_count in enumerate(self.counts):
+                cumulative += bucket_count
+                if cumulative >= rank and bucket_count:
+                    return self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+            return self.buckets[-1]
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "buckets": self.buckets,
+                "counts": list(self.counts),
+                "count": self.count,
+                "sum": self.total
+            }
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99)
+        }
+
+
+class HedgingPolicy:
+    """Decides when to send a backup request and races primary against backup."""
+
+    def __init__(self, enabled: bool = False, percentile: float = 95, default_delay: float = 5.0,
+                 min_delay: float = 0.5, min_samples: int = 20, backup_provider: str = "alternate"):
+        self.enabled = enabled
+        self.percentile = percentile
+        self.default_delay = default_delay
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.backup_provider = backup_provider
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+        self.hedged_calls = 0
+        self.hedges_fired = 0
+        self.backup_wins = 0
+        self.failovers = 0
+
+    def histogram(self, provider: str) -> LatencyHistogram:
+        with self._lock:
+            if provider not in self.histograms:
+                self.histograms[provider] = LatencyHistogram()
+            return self.histograms[provider]
+
+    def record(self, provider: str, seconds: float):
+        self.histogram(provider).record(seconds)
+
+    def hedge_delay(self, provider: str) -> float:
+        """Delay before hedging: the provider's latency percentile once enough samples exist."""
+        histogram = self.histogram(provider)
+        if histogram.count < self.min_samples:
+            return self.default_delay
+        return max(self.min_delay, histogram.percentile(self.percentile) or self.default_delay)
+
+    def choose_backup(self, primary: str, available: List[str]) -> str:
+        """Backup provider: an alternate one when configured and available, otherwise the primary again."""
+        if self.backup_provider == "alternate":
+            for provider in available:
+                if provider != primary:
+                    return provider
+        return primary
+
+    async def race(self, primary: Tuple[str, Callable[[], Awaitable[str]]],
+                   backup: Tuple[str, Callable[[], Awaitable[str]]],
+                   is_valid: Callable[[str], bool]) -> str:
+        """Run primary; start backup after the hedge delay (or as soon as primary fails); first valid result wins.
+        
+        Callers record latencies via record() so the histograms also cover unhedged calls.
+        """
+        self.hedged_calls += 1
+        primary_provider, primary_func = primary
+        backup_provider, backup_func = backup
+
+        start = time.perf_counter()
+        delay = self.hedge_delay(primary_provider)
+        tasks = {asyncio.ensure_future(primary_func()): "primary"}
+        backup_started = False
+        invalid_result = None
+        last_error: Optional[Exception] = None
+
+        def start_backup():
+            nonlocal backup_started
+            backup_started = True
+            tasks[asyncio.ensure_future(backup_func())] = "backup"
+
+        try:
+            while tasks or not backup_started:
+                if not tasks:
+                    # Primary already failed or returned junk - fail over immediately
+                    self.failovers += 1
+                    start_backup()
+                    continue
+
+                timeout = None if backup_started else max(0.0, delay - (time.perf_counter() - start))
+                done, _ = await asyncio.wait(set(tasks), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    self.hedges_fired += 1
+                    start_backup()
+                    continue
+
+                for task in done:
+                    role = tasks.pop(task)
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        last_error = e
+                        continue
+                    if is_valid(result):
+                        if role == "backup":
+                            self.backup_wins += 1
+                        return result
+                    if invalid_result is None:
+                        invalid_result = result
+
+            if invalid_result is not None:
+                return invalid_result
+            raise last_error or Exception("Hedged request failed")
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            providers = list(self.histograms.items())
+        return {
+            "enabled": self.enabled,
+            "percentile": self.percentile,
+            "backup_provider": self.backup_provider,
+            "hedged_calls": self.hedged_calls,
+            "hedges_fired": self.hedges_fired,
+            "backup_wins": self.backup_wins,
+            "failovers": self.failovers,
+            "providers": {
+                provider: {**histogram.summary(), "hedge_delay": self.hedge_delay(provider)}
+                for provider, histogram in providers
+            }
+        }
+
+
+def create_hedging_policy() -> HedgingPolicy:
+    """Build the hedging policy from LLM_HEDGE_* environment settings."""
+    return HedgingPolicy(
+        enabled=os.getenv("LLM_HEDGING_ENABLED", "false").lower() == "true",
+        percentile=float(os.getenv("LLM_HEDGE_PERCENTILE", "95")),
+        default_delay=float(os.getenv("LLM_HEDGE_DEFAULT_DELAY_SECONDS", "5")),
+        min_delay=float(os.getenv("LLM_HEDGE_MIN_DELAY_SECONDS", "0.5")),
+        min_samples=int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20")),
+        backup_provider=os.getenv("LLM_HEDGE_BACKUP_PROVIDER", "alternate")
+    )
@@ -0,0 +1,232 @@
+"""
+Content-addressed cache for LLM responses.
+Two tiers: an in-memory LRU in front of an on-disk SQLite store, both bounded by size and TTL.
+Disk writes (inserts, access-time updates, expiry and eviction) go through a write-behind queue
+drained by a background thread, so callers on the event loop never wait for a SQLite commit.
+"""
+
+import hashlib
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Write-behind operations applied per transaction at most
+_WRITE_BATCH = 256
+
+
+def make_cache_key(prompt: str, model: str, template_version: str) -> str:
+    """Hash prompt, model name and prompt-template version into a cache key."""
+    digest = hashlib.sha256()
+    for part in (model or "", template_version or "", prompt):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class LLMResponseCache:
+    """Two-tier (memory LRU + SQLite) LLM response cache with hit/miss counters."""
+
+    def __init__(self, db_path: Optional[str] = None, ttl_seconds: float = 86400,
+                 max_memory_entries: int = 512, max_disk_entries: int = 10000):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+
+        self._memory: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._writes: "queue.Queue[Optional[Tuple]]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_entries = 0
+        self.write_errors = 0
+
+        if db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            self._conn = self._connect()
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL, "
+                "created_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_access ON llm_cache(last_access)")
+            self._conn.commit()
+            # Row count is tracked in memory from here on
+            self.disk_entries = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+            self._writer = threading.Thread(target=self._write_loop, name="llm-cache-writer", daemon=True)
+            self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        # WAL lets lookups read while the writer thread commits
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for a key, or None on miss/expiry."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                response, created_at = entry
+                if now - created_at <= self.ttl_seconds:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    return response
+                del self._memory[key]
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT response, created_at FROM llm_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    response, created_at = row
+                    if now - created_at <= self.ttl_seconds:
+                        self._writes.put(("touch", key, now))
+                        self._remember(key, response, created_at)
+                        self.disk_hits += 1
+                        return response
+                    self._writes.put(("delete", key))
+
+            self.misses += 1
+            return None
+
+    def set(self, key: str, response: str):
+        """Store a response in memory now and on disk in the background, evicting least recently used entries."""
+        now = time.time()
+        with self._lock:
+            self._remember(key, response, now)
+        if self._conn is not None:
+            self._writes.put(("put", key, response, now))
+
+    def _remember(self, key: str, response: str, created_at: float):
+        """Insert into the memory tier (caller holds the lock)."""
+        self._memory[key] = (response, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def _write_loop(self):
+        conn = self._connect()
+        try:
+            while True:
+                ops = [self._writes.get()]
+                while ops[-1] is not None and len(ops) < _WRITE_BATCH:
+                    try:
+                        ops.append(self._writes.get_nowait())
+                    except queue.Empty:
+                        break
+                try:
+                    for op in ops:
+                        if op is not None:
+                            self._apply(conn, op)
+                    conn.commit()
+                except sqlite3.Error as e:
+                    conn.rollback()
+                    self.disk_entries = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+                    self.write_errors += 1
+                    logger.warning(f"⚠️ LLM cache write failed: {e}")
+                finally:
+                    for _ in ops:
+                        self._writes.task_done()
+                if ops[-1] is None:
+                    return
+        finally:
+            conn.close()
+
+    def _apply(self, conn: sqlite3.Connection, op: Tuple):
+        kind, key = op[0], op[1]
+        if kind == "put":
+            _, _, response, now = op
+            exists = conn.execute("SELECT 1 FROM llm_cache WHERE key = ?", (key,)).fetchone() is not None
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, response, created_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, response, now, now)
+            )
+            if not exists:
+                self.disk_entries += 1
+            if self.disk_entries > self.max_disk_entries:
+                overflow = self.disk_entries - self.max_disk_entries
+                deleted = conn.execute(
+                    "DELETE FROM llm_cache WHERE key IN "
+                    "(SELECT key FROM llm_cache ORDER BY last_access ASC LIMIT ?)",
+                    (overflow,)
+                ).rowcount
+                self.disk_entries -= deleted
+                self.evictions += deleted
+        elif kind == "touch":
+            conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (op[2], key))
+        elif kind == "delete":
+            self.disk_entries -= conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,)).rowcount
+        elif kind == "clear":
+            conn.execute("DELETE FROM llm_cache")
+            self.disk_entries = 0
+
+    def flush(self):
+        """Block until every queued disk write has been committed."""
+        if self._writer is not None:
+            self._writes.join()
+
+    def close(self):
+        """Commit queued writes and stop the writer thread."""
+        if self._writer is not None and self._writer.is_alive():
+            self._writes.put(None)
+            self._writer.join()
+
+    def clear(self):
+        """Drop every cached response."""
+        with self._lock:
+            self._memory.clear()
+        if self._conn is not None:
+            self._writes.put(("clear", None))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current tier sizes."""
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "memory_entries": len(self._memory),
+                "disk_entries": self.disk_entries,
+                "pending_writes": self._writes.qsize(),
+                "write_errors": self.write_errors,
+                "ttl_seconds": self.ttl_seconds
+            }
+
+
+# Global instance
+llm_cache = None
+
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    """Get or create the global LLM response cache (None when LLM_CACHE_ENABLED=false)."""
+    global llm_cache
+    if os.getenv("LLM_CACHE_ENABLED", "true").lower() != "true":
+        return None
+    if llm_cache is None:
+        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        llm_cache = LLMResponseCache(
+            db_path=os.getenv("LLM_CACHE_PATH", os.path.join(project_root, ".cache", "llm_cache.sqlite3")),
+            ttl_seconds=float(os.getenv("LLM_CACHE_TTL_SECONDS", "86400")),
+            max_memory_entries=int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "512")),
+            max_disk_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000"))
+        )
+    return llm_cache
@@ -0,0 +1,192 @@
+"""
+Process-wide registry of LLM provider clients.
+AIService and NurseRAGSystem get their clients here, so the Gemini SDK is configured once, the OpenAI
+client shares one pooled keep-alive HTTP connection pool, and connections can be warmed at startup
+instead of on the first patient request.
+"""
+
+import asyncio
+import inspect
+import logging
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import google.generativeai as genai
+import httpx
+from google.generativeai.types import generation_types
+from openai import AsyncOpenAI
+
+from app.fake_llm import FAKE_MODEL_NAME, FakeGenerativeModel, fake_provider_enabled
+from app.llm_executor import run_blocking
+
+logger = logging.getLogger(__name__)
+
+
+def generate_blocking(model: Any, prompt: str, timeout: Optional[float], **kwargs) -> Any:
+    """Synchronous generate_content bounded by timeout seconds (None: the SDK default).
+
+    Newer Gemini SDKs take request_options={"timeout": ...}; 0.3.x does not, so the request is sent
+    through the model's underlying API client, whose calls accept a timeout directly.
+    """
+    if timeout is None:
+        return model.generate_content(prompt, **kwargs)
+    if "request_options" in inspect.signature(model.generate_content).parameters:
+        return model.generate_content(prompt, request_options={"timeout": timeout}, **kwargs)
+    if isinstance(model, genai.GenerativeModel):
+        request = model._prepare_request(contents=prompt, **kwargs)
+        if model._client is None:
+            from google.generativeai import client as genai_client
+            model._client = genai_client.get_default_generative_client()
+        return generation_types.GenerateContentResponse.from_response(
+            model._client.generate_content(request, timeout=timeout)
+        )
+    return model.generate_content(prompt, timeout=timeout, **kwargs)
+
+
+class LLMClientRegistry:
+    """Shared, lazily created provider clients; one Gemini model object per model name."""
+
+    def __init__(self, google_api_key: Optional[str] = None, openai_api_key: Optional[str] = None,
+                 use_fake: bool = False, max_connections: int = 100, max_keepalive_connections: int = 20,
+                 keepalive_expiry: float = 30.0, timeout_seconds: float = 60.0):
+        self.google_api_key = google_api_key
+        self.openai_api_key = openai_api_key
+        self.use_fake = use_fake
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.timeout_seconds = timeout_seconds
+
+        self._lock = threading.Lock()
+        self._google_configured = False
+        self._models: Dict[Tuple[str, str], Any] = {}
+        self._openai_client: Optional[AsyncOpenAI] = None
+        self.warm_up_results: Dict[str, str] = {}
+
+    @classmethod
+    def from_env(cls) -> "LLMClientRegistry":
+        return cls(
+            google_api_key=os.getenv("GOOGLE_AI_API_KEY"),
+            openai_api_key=os.getenv("OPENAI_API_KEY"),
+            use_fake=fake_provider_enabled(),
+            max_connections=int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "100")),
+            max_keepalive_connections=int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", "20")),
+            keepalive_expiry=float(os.getenv("LLM_HTTP_KEEPALIVE_SECONDS", "30")),
+            timeout_seconds=float(os.getenv("LLM_HTTP_TIMEOUT_SECONDS", "60"))
+        )
+
+    @property
+    def config_key(self) -> Tuple[Any, ...]:
+        """Credentials and provider selection; the global registry is rebuilt when these change."""
+        return (self.use_fake, self.google_api_key, self.openai_api_key)
+
+    def providers(self) -> List[str]:
+        """Configured providers in preference order; the fake provider replaces the real ones."""
+        if self.use_fake:
+            return ["fake"]
+        providers = []
+        if self.google_api_key:
+            providers.append("google")
+        if self.openai_api_key:
+            providers.append("openai")
+        return providers
+
+    def get_client(self, provider: str, model_name: Optional[str] = None) -> Any:
+        """Shared client for a provider (a model object for Gemini and the fake, the AsyncOpenAI client for OpenAI)."""
+        with self._lock:
+            if provider == "openai":
+                if self._openai_client is None:
+                    self._openai_client = self._create_openai_client()
+                return self._openai_client
+
+            key = (provider, model_name or FAKE_MODEL_NAME)
+            if key not in self._models:
+                if provider == "fake":
+                    self._models[key] = FakeGenerativeModel(key[1])
+                elif provider == "google":
+                    if not self._google_configured:
+                        genai.configure(api_key=self.google_api_key)
+                        self._google_configured = True
+                    self._models[key] = genai.GenerativeModel(key[1])
+                else:
+                    raise ValueError(f"Unknown LLM provider: {provider}")
+            return self._models[key]
+
+    def _create_openai_client(self) -> AsyncOpenAI:
+        """AsyncOpenAI over one pooled keep-alive HTTP client (caller holds the lock)."""
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+                keepalive_expiry=self.keepalive_expiry
+            ),
+            timeout=httpx.Timeout(self.timeout_seconds)
+        )
+        return AsyncOpenAI(api_key=self.openai_api_key, http_client=http_client)
+
+    async def warm_up(self, timeout: float = 5.0) -> Dict[str, str]:
+        """Open provider connections with a no-generation call per client so the first request skips the handshakes.
+
+        Failures are logged and reported, never raised; the provider is still used normally.
+        """
+        with self._lock:
+            models = [(key, model) for key, model in self._models.items() if key[0] == "google"]
+            openai_client = self._openai_client
+
+        async def warm(name: str, call):
+            try:
+                await asyncio.wait_for(call(), timeout)
+                self.warm_up_results[name] = "ok"
+            except Exception as e:
+                logger.warning(f"⚠️ LLM warm-up for {name} failed: {e}")
+                self.warm_up_results[name] = f"failed: {e}"
+
+        warm_ups = []
+        for (_, model_name), model in models:
+            # Gemini's async and sync SDK paths use separate channels; nurse ranking uses the sync one
+            warm_ups.append(warm(f"google:{model_name}:async", lambda model=model: model.count_tokens_async("ping")))
+            warm_ups.append(warm(f"google:{model_name}:sync",
+                                 lambda model=model: run_blocking(model.count_tokens, "ping")))
+        if openai_client is not None:
+            warm_ups.append(warm("openai", openai_client.models.list))
+        await asyncio.gather(*warm_ups)
+        return dict(self.warm_up_results)
+
+    async def aclose(self):
+        """Close pooled connections (called on application shutdown)."""
+        with self._lock:
+            openai_client, self._openai_client = self._openai_client, None
+        if openai_client is not None:
+            await openai_client.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            clients = [f"{provider}:{model_name}" for provider, model_name in self._models]
+            if self._openai_client is not None:
+                clients.append("openai")
+        return {
+            "providers": self.providers(),
+            "clients": clients,
+            "http_pool": {
+                "max_connections": self.max_connections,
+                "max_keepalive_connections": self.max_keepalive_connections,
+                "keepalive_expiry_seconds": self.keepalive_expiry,
+                "timeout_seconds": self.timeout_seconds
+            },
+            "warm_up": dict(self.warm_up_results)
+        }
+
+
+# Global instance
+llm_clients = None
+_registry_lock = threading.Lock()
+
+def get_llm_clients() -> LLMClientRegistry:
+    """Get or create the process-wide client registry (rebuilt if credentials or LLM_FAKE_PROVIDER change)."""
+    global llm_clients
+    with _registry_lock:
+        registry = LLMClientRegistry.from_env()
+        if llm_clients is None or llm_clients.config_key != registry.config_key:
+            llm_clients = registry
+        return llm_clients
@@ -0,0 +1,40 @@
+"""
+Bounded executor for blocking work that must not run on the event loop.
+Used for synchronous SDK calls and CPU-bound steps (TF-IDF retrieval, nurse ranking).
+"""
+
+import asyncio
+import contextvars
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Get or create the shared bounded executor."""
+    global _executor
+    if _executor is None:
+        max_workers = int(os.getenv("LLM_EXECUTOR_MAX_WORKERS", "32"))
+        _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm-worker")
+    return _executor
+
+
+async def run_blocking(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a blocking callable in the shared executor and await its result.
+    
+    The caller's context (e.g. the request deadline) is carried into the worker thread.
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(get_executor(), functools.partial(context.run, func, *args, **kwargs))
+
+
+def shutdown_executor():
+    """Shut down the shared executor (called on application shutdown)."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False)
+        _executor = None
@@ -0,0 +1,145 @@
+"""
+Record/replay of LLM traffic.
+In record mode every provider response is appended, with its latency, to a JSONL file; in replay mode
+responses are served from that file by prompt hash (optionally with the recorded latency) so the pipeline
+can be measured against production-shaped responses without network access or token spend.
+
+Only a hash of each prompt is stored, never the prompt text.
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+from app.llm_cache import make_cache_key
+
+OFF = "off"
+RECORD = "record"
+REPLAY = "replay"
+
+
+class ReplayMissError(Exception):
+    """No recording exists for a prompt being replayed."""
+
+
+class LLMRecorder:
+    """Append-only recorder and deterministic replayer for LLM responses."""
+
+    def __init__(self, path: str, mode: str = RECORD, replay_timing: bool = False):
+        self.path = path
+        self.mode = mode
+        self.replay_timing = replay_timing
+        self._lock = threading.Lock()
+        self._recordings: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self._replay_positions: Dict[str, int] = defaultdict(int)
+
+        self.recorded = 0
+        self.replayed = 0
+        self.misses = 0
+
+        if mode == REPLAY:
+            self._load()
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == REPLAY
+
+    @staticmethod
+    def make_key(channel: str, prompt: str, template_version: str) -> str:
+        """Model-independent key, so recordings replay regardless of which provider is configured."""
+        return make_cache_key(prompt, channel, template_version)
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as recording_file:
+            for line in recording_file:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn final line from an interrupted recording
+                self._recordings[entry["key"]].append(entry)
+
+    def record(self, channel: str, prompt: str, template_version: str, response: str, latency: float):
+        """Append one prompt/response exchange."""
+        if self.mode != RECORD:
+            return
+        entry = {
+            "key": self.make_key(channel, prompt, template_version),
+            "channel": channel,
+            "recorded_at": round(time.time(), 3),
+            "latency": round(latency, 4),
+            "response": response
+        }
+        line = json.dumps(entry, separators=(",", ":")) + "\n"
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as recording_file:
+                recording_file.write(line)
+            self.recorded += 1
+
+    def _next_entry(self, channel: str, prompt: str, template_version: str) -> Dict[str, Any]:
+        """Recorded entry for a prompt; repeats of a prompt replay its recordings in order, then the last one."""
+        key = self.make_key(channel, prompt, template_version)
+        with self._lock:
+            entries = self._recordings.get(key)
+            if not entries:
+                self.misses += 1
+                raise ReplayMissError(f"No {channel} recording for prompt {key[:12]}")
+            position = self._replay_positions[key]
+            self._replay_positions[key] = position + 1
+            self.replayed += 1
+            return entries[min(position, len(entries) - 1)]
+
+    async def replay(self, channel: str, prompt: str, template_version: str) -> str:
+        entry = self._next_entry(channel, prompt, template_version)
+        if self.replay_timing:
+            await asyncio.sleep(entry["latency"])
+        return entry["response"]
+
+    def replay_blocking(self, channel: str, prompt: str, template_version: str) -> str:
+        """Thread variant of replay() for synchronous callers."""
+        entry = self._next_entry(channel, prompt, template_version)
+        if self.replay_timing:
+            time.sleep(entry["latency"])
+        return entry["response"]
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "path": self.path,
+                "replay_timing": self.replay_timing,
+                "recorded": self.recorded,
+                "replayed": self.replayed,
+                "misses": self.misses,
+                "recorded_prompts": len(self._recordings)
+            }
+
+
+# Global instance
+llm_recorder = None
+
+def replay_enabled() -> bool:
+    """Whether LLM responses are being replayed (no provider client is needed)."""
+    return os.getenv("LLM_RECORD_MODE", OFF).lower() == REPLAY
+
+def get_llm_recorder() -> Optional[LLMRecorder]:
+    """Get or create the global recorder (None when LLM_RECORD_MODE is off)."""
+    global llm_recorder
+    mode = os.getenv("LLM_RECORD_MODE", OFF).lower()
+    if mode not in (RECORD, REPLAY):
+        return None
+    if llm_recorder is None or llm_recorder.mode != mode:
+        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        llm_recorder = LLMRecorder(
+            path=os.getenv("LLM_RECORD_PATH", os.path.join(project_root, ".cache", "llm_recordings.jsonl")),
+            mode=mode,
+            replay_timing=os.getenv("LLM_REPLAY_TIMING", "false").lower() == "true"
+        )
+    return llm_recorder
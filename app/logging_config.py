@@ -0,0 +1,168 @@
+"""
+Structured, non-blocking logging.
+Request handlers only put records on a bounded in-memory queue; a background QueueListener
+formats them (JSON lines or plain text) and writes them to stdout. Large payloads (patient
+context, nurse recommendations, form data) are logged at DEBUG, sampled and truncated, and
+serialized only when they will actually be written.
+"""
+
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Optional
+
+from app.tracing import current_span
+
+# LogRecord attributes that are not user-supplied `extra` fields
+_STANDARD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "trace_id"}
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line: timestamp, level, logger, message, trace id, exception and extra fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        if getattr(record, "trace_id", None):
+            entry["trace_id"] = record.trace_id
+        entry.update({key: value for key, value in vars(record).items() if key not in _STANDARD_ATTRIBUTES})
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class StructuredQueueHandler(QueueHandler):
+    """Queue handler that never blocks the caller: records are dropped (and counted) when the queue is full."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Resolve the message, traceback and trace id in the caller's context; extra fields are kept."""
+        record = copy.copy(record)
+        record.msg, record.args = record.getMessage(), None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        span = current_span()
+        record.trace_id = span.trace.trace_id if span else None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _StdoutHandler(logging.StreamHandler):
+    """Writes to the current sys.stdout, which may be replaced after startup (e.g. by test runners)."""
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+class LoggingPipeline:
+    """Root logger wiring: queue handler on the request path, listener thread writing to the stream."""
+
+    def __init__(self, level: str = "INFO", log_format: str = "json", queue_size: int = 10000,
+                 payload_sample_rate: float = 0.1, payload_max_chars: int = 2000, stream=None):
+        self.level = level.upper()
+        self.log_format = log_format
+        self.payload_sample_rate = payload_sample_rate
+        self.payload_max_chars = payload_max_chars
+        self.stream_handler = logging.StreamHandler(stream) if stream else _StdoutHandler()
+        self.stream_handler.setFormatter(JSONFormatter() if log_format == "json" else logging.Formatter(
+            "%(asctime)s %(levelname)s %(name)s: %(message)s"))
+        self.queue_handler = StructuredQueueHandler(queue.Queue(maxsize=queue_size))
+        self.listener = QueueListener(self.queue_handler.queue, self.stream_handler, respect_handler_level=True)
+
+    @classmethod
+    def from_env(cls) -> "LoggingPipeline":
+        return cls(
+            level=os.getenv("LOG_LEVEL", "INFO"),
+            log_format=os.getenv("LOG_FORMAT", "json").lower(),
+            queue_size=int(os.getenv("LOG_QUEUE_SIZE", "10000")),
+            payload_sample_rate=float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", "0.1")),
+            payload_max_chars=int(os.getenv("LOG_PAYLOAD_MAX_CHARS", "2000"))
+        )
+
+    def start(self):
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(self.queue_handler)
+        root.setLevel(self.level)
+        self.listener.start()
+
+    def stop(self):
+        """Flush queued records and detach from the root logger."""
+        logging.getLogger().removeHandler(self.queue_handler)
+        self.listener.stop()
+
+
+# Global instance
+logging_pipeline: Optional[LoggingPipeline] = None
+_pipeline_lock = threading.Lock()
+
+def pipeline_enabled() -> bool:
+    """LOG_PIPELINE_ENABLED, defaulting to off under pytest so test output keeps pytest's own log capture."""
+    default = "false" if "pytest" in sys.modules else "true"
+    return os.getenv("LOG_PIPELINE_ENABLED", default).lower() == "true"
+
+def configure_logging() -> Optional[LoggingPipeline]:
+    """Install the queue-backed logging pipeline on the root logger (idempotent; None when disabled)."""
+    global logging_pipeline
+    if not pipeline_enabled():
+        return None
+    with _pipeline_lock:
+        if logging_pipeline is None:
+            logging_pipeline = LoggingPipeline.from_env()
+            logging_pipeline.start()
+        return logging_pipeline
+
+def shutdown_logging():
+    """Flush and stop the logging pipeline (called on application shutdown)."""
+    global logging_pipeline
+    with _pipeline_lock:
+        if logging_pipeline is not None:
+            logging_pipeline.stop()
+            logging_pipeline = None
+
+
+def log_payload(logger: logging.Logger, label: str, payload: Any, level: int = logging.DEBUG, **fields):
+    """Log a large payload, sampled and truncated; nothing is serialized when the record would be skipped."""
+    if not logger.isEnabledFor(level):
+        return
+    sample_rate = logging_pipeline.payload_sample_rate if logging_pipeline else 1.0
+    if random.random() >= sample_rate:
+        return
+    max_chars = logging_pipeline.payload_max_chars if logging_pipeline else 2000
+    text = payload if isinstance(payload, str) else json.dumps(payload, default=str, ensure_ascii=False)
+    truncated = len(text) > max_chars
+    logger.log(level, label, extra={
+        **fields,
+        "payload": text[:max_chars] + ("…" if truncated else ""),
+        "payload_chars": len(text),
+        "payload_truncated": truncated
+    })
+
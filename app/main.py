@@ -1,9 +1,13 @@
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, HTTPException, Request, Header
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from fastapi.encoders import jsonable_encoder
+import asyncio
+import logging
 import os
 import sys
-from typing import List
+import time
+from typing import Any, Dict, List, Optional, Tuple
 import json
 from dotenv import load_dotenv
 
@@ -12,10 +16,28 @@ load_dotenv()
 
 from app.models import (
     PatientData, ComprehensivePatientData, CaregiverInput, RoutingRequest, RoutingDecision, 
-    AgentResponse, AgentType
+    AgentResponse, AgentType, BatchRoutingRequest
 )
 from app.ai_service import AIService
 from app.data_service import DataService
+from app.patient_snapshot import get_patient_snapshots
+from app.data_watcher import DataDirectoryWatcher
+from app.llm_executor import run_blocking, shutdown_executor
+from app.llm_cache import get_llm_cache
+from app.speculation import SpeculationStats, route_with_speculation
+from app.rate_limiter import get_rate_limiter_stats
+from app.circuit_breaker import get_circuit_breaker_stats
+from app.structured_output import get_structured_output_stats as structured_output_stats
+from app.llm_recorder import get_llm_recorder
+from app.llm_clients import get_llm_clients
+from app.metrics import get_metrics
+from app.tracing import TracingMiddleware, get_tracer
+from app.logging_config import configure_logging, shutdown_logging
+from app import deadline
+
+# Queue-backed structured logging, installed before the services below start logging
+configure_logging()
+logger = logging.getLogger(__name__)
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -24,6 +46,9 @@ app = FastAPI(
     version="2.0.0"
 )
 
+# Trace every /api request (route -> agents -> LLM -> nurse RAG spans)
+app.add_middleware(TracingMiddleware)
+
 # Add CORS middleware for React frontend
 app.add_middleware(
     CORSMiddleware,
@@ -41,6 +66,49 @@ app.add_middleware(
 # Initialize services
 ai_service = AIService()
 data_service = DataService()
+data_watcher = DataDirectoryWatcher(data_service, float(os.getenv("PATIENT_WATCH_INTERVAL_SECONDS", "5")))
+speculation_stats = SpeculationStats()
+
+# Launch rule-predicted agents while LLM routing is still running (overridable per request)
+SPECULATIVE_AGENT_PREFETCH = os.getenv("SPECULATIVE_AGENT_PREFETCH", "false").lower() == "true"
+
+# Produce routing plus all agent outputs with a single LLM call (overridable per request)
+COMBINED_AGENT_MODE = os.getenv("COMBINED_AGENT_MODE", "false").lower() == "true"
+
+# Poll the data directory and apply changed workbooks as patient deltas
+PATIENT_WATCH_ENABLED = os.getenv("PATIENT_WATCH_ENABLED", "false").lower() == "true"
+
+# Open LLM provider connections at startup so the first patient request skips the handshakes
+LLM_WARMUP_ON_STARTUP = os.getenv("LLM_WARMUP_ON_STARTUP", "true").lower() == "true"
+
+def _warm_up_nurse_matching():
+    """Import nurse matching (sklearn, roster) and build its index, so the first request's deadline does not pay for it."""
+    try:
+        from app.enhanced_nursing_agent import get_nursing_rag_system
+        get_nursing_rag_system()
+    except Exception as e:
+        logger.warning(f"⚠️ Nurse matching warm-up failed: {e}")
+
+@app.on_event("startup")
+async def startup_event():
+    """Warm up nurse matching and the shared LLM clients, and start the data directory watcher."""
+    await run_blocking(_warm_up_nurse_matching)
+    if PATIENT_WATCH_ENABLED:
+        data_watcher.start()
+    if LLM_WARMUP_ON_STARTUP:
+        await get_llm_clients().warm_up(float(os.getenv("LLM_WARMUP_TIMEOUT_SECONDS", "5")))
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release background worker threads and pooled LLM connections, and flush queued traces and logs."""
+    data_watcher.stop()
+    cache = get_llm_cache()
+    if cache is not None:
+        cache.close()
+    await get_llm_clients().aclose()
+    get_tracer().shutdown()
+    shutdown_executor()
+    shutdown_logging()
 
 @app.get("/")
 async def root():
@@ -55,15 +123,101 @@ async def root():
             "data_status": "/api/data-status",
             "patients": "/api/patients",
             "available_files": "/api/available-files",
-            "process_complete_case": "/api/process-complete-case"
+            "process_complete_case": "/api/process-complete-case",
+            "process_complete_case_stream": "/api/process-complete-case/stream",
+            "route_batch": "/api/route-batch"
         },
         "frontend": "http://localhost:3003"
     }
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint."""
-    return {"status": "healthy", "service": "routing-ai-agent-api", "version": "2.0.0"}
+    """Health check endpoint.
+    
+    Reports `degraded` while every configured LLM provider's circuit is open (brownout to rule-based logic).
+    """
+    breakers = get_circuit_breaker_stats()
+    provider_states = [breakers[provider]["state"] for provider in ai_service.clients if provider in breakers]
+    brownout = bool(provider_states) and all(state == "open" for state in provider_states)
+    return {
+        "status": "degraded" if brownout else "healthy",
+        "service": "routing-ai-agent-api",
+        "version": "2.0.0",
+        "llm_brownout": brownout,
+        "circuit_breakers": breakers
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Per-stage, per-agent and per-provider latency histograms, token counts and cache hit ratio for Prometheus."""
+    return PlainTextResponse(get_metrics().render_prometheus(), media_type="text/plain; version=0.0.4")
+
+@app.get("/api/metrics/stats")
+async def get_metrics_stats():
+    """Get p50/p95/p99 latency per stage, agent type and provider, token totals and cache hit ratio."""
+    return get_metrics().get_summary()
+
+@app.get("/api/traces")
+async def get_recent_traces(limit: int = 20, min_duration_ms: float = 0.0):
+    """Get recent request traces span by span, newest first (optionally only slower than min_duration_ms)."""
+    return {**get_tracer().get_stats(), "traces": get_tracer().recent_traces(limit, min_duration_ms)}
+
+@app.get("/api/traces/{trace_id}")
+async def get_trace(trace_id: str):
+    """Get one recent trace by the id returned in the X-Trace-Id response header."""
+    trace = get_tracer().get_trace(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Trace not found")
+    return trace
+
+@app.get("/api/llm-cache/stats")
+async def get_llm_cache_stats():
+    """Get LLM response cache hit/miss counters and in-flight coalescing counts."""
+    cache = get_llm_cache()
+    if cache is None:
+        return {"enabled": False, "single_flight": ai_service.inflight_requests.get_stats()}
+    return {"enabled": True, **cache.get_stats(), "single_flight": ai_service.inflight_requests.get_stats()}
+
+@app.get("/api/speculation/stats")
+async def get_speculation_stats():
+    """Get speculative agent prefetch hit rate and wasted call counts."""
+    return {"enabled_by_default": SPECULATIVE_AGENT_PREFETCH, **speculation_stats.get_stats()}
+
+@app.get("/api/rate-limits")
+async def get_rate_limits():
+    """Get per-provider rate limiter state (bucket levels, adaptive concurrency, 429 counts)."""
+    return {"providers": get_rate_limiter_stats()}
+
+@app.get("/api/hedging/stats")
+async def get_hedging_stats():
+    """Get per-provider latency percentiles, hedge thresholds and hedge/failover counts."""
+    return ai_service.hedging.get_stats()
+
+@app.get("/api/structured-output/stats")
+async def get_structured_output_stats():
+    """Get per-schema counts of LLM outputs parsed directly, parsed after local repair, and rejected."""
+    return {"schemas": structured_output_stats()}
+
+@app.get("/api/llm-clients/stats")
+async def get_llm_client_stats():
+    """Get the shared LLM clients, HTTP pool settings and startup warm-up results."""
+    return get_llm_clients().get_stats()
+
+@app.get("/api/llm-recorder/stats")
+async def get_llm_recorder_stats():
+    """Get record/replay mode and counts of recorded, replayed and missed LLM responses."""
+    recorder = get_llm_recorder()
+    if recorder is None:
+        return {"mode": "off"}
+    return recorder.get_stats()
+
+@app.post("/api/llm-cache/clear")
+async def clear_llm_cache():
+    """Drop all cached LLM responses."""
+    cache = get_llm_cache()
+    if cache is not None:
+        cache.clear()
+    return {"message": "LLM response cache cleared"}
 
 # Data Management Endpoints
 @app.get("/api/data-status")
@@ -71,6 +225,16 @@ async def get_data_status():
     """Get current data loading status and available files."""
     return data_service.get_patient_summary()
 
+@app.get("/api/load-progress")
+async def get_load_progress():
+    """Get progress of the current or last patient file load (mode, rows read, patients loaded)."""
+    return data_service.load_progress
+
+@app.get("/api/data-watcher/stats")
+async def get_data_watcher_stats():
+    """Get data directory watcher state and insert/update/delete counts of applied patient deltas."""
+    return {"enabled": PATIENT_WATCH_ENABLED, **data_watcher.get_stats()}
+
 @app.get("/api/available-files")
 async def get_available_files():
     """Get list of available Excel files in the data directory."""
@@ -83,11 +247,12 @@ async def get_available_files():
 async def load_specific_file(filename: str):
     """Load a specific Excel file from the data directory."""
     try:
-        patient_count = data_service.load_specific_file(filename)
+        patient_count = await asyncio.to_thread(data_service.load_specific_file, filename)
         return {
             "message": f"Successfully loaded {patient_count} patients from {filename}",
             "patient_count": patient_count,
-            "filename": filename
+            "filename": filename,
+            "delta": data_service.last_delta
         }
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail=f"File not found: {filename}")
@@ -98,14 +263,31 @@ async def load_specific_file(filename: str):
 async def refresh_data():
     """Refresh data by reloading the most recent file."""
     try:
-        patient_count = data_service.refresh_data()
+        patient_count = await asyncio.to_thread(data_service.refresh_data)
         return {
             "message": f"Data refreshed successfully. Loaded {patient_count} patients.",
-            "patient_count": patient_count
+            "patient_count": patient_count,
+            "delta": data_service.last_delta
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error refreshing data: {str(e)}")
 
+@app.get("/api/patient-snapshots/stats")
+async def get_patient_snapshot_stats():
+    """Get parsed-snapshot hits, stale/missing snapshots and the last snapshot load time."""
+    snapshots = get_patient_snapshots()
+    if snapshots is None:
+        return {"enabled": False}
+    return {"enabled": True, **snapshots.get_stats()}
+
+@app.post("/api/patient-snapshots/clear")
+async def clear_patient_snapshots():
+    """Delete parsed snapshots so the next load re-reads the Excel files."""
+    snapshots = get_patient_snapshots()
+    if snapshots is not None:
+        snapshots.clear()
+    return {"message": "Patient snapshots cleared"}
+
 @app.post("/api/set-data-directory")
 async def set_data_directory(request: Request):
     """Set the data directory path."""
@@ -233,72 +415,417 @@ async def process_state_agent(request: RoutingRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"State agent failed: {str(e)}")
 
+async def _run_agent(agent_type: AgentType, patient_data, caregiver_input: CaregiverInput):
+    """Run one agent, isolating failures so the other agents can still complete.
+    
+    DeadlineExceeded propagates so the agent is reported as a timeout rather than as failed or completed.
+    """
+    try:
+        response = await ai_service.process_agent(agent_type, patient_data, caregiver_input)
+        if not response:
+            logger.warning(f"⚠️ No response from {agent_type} agent")
+        return response
+    except deadline.DeadlineExceeded:
+        logger.warning(f"⏱️ {agent_type} agent cut off by the request deadline")
+        raise
+    except Exception as agent_error:
+        logger.error(f"❌ Error processing {agent_type} agent: {str(agent_error)}")
+        return None
+
+def _completed_task(result) -> asyncio.Future:
+    """Already-resolved future, so precomputed agent results flow through the same collection path."""
+    future = asyncio.get_running_loop().create_future()
+    future.set_result(result)
+    return future
+
+def _timed_out_task() -> asyncio.Future:
+    """Already-failed future for an agent the request deadline cut off before it produced a result."""
+    future = asyncio.get_running_loop().create_future()
+    future.set_exception(deadline.DeadlineExceeded("Agent cut off by the request deadline"))
+    return future
+
+def _timed_out(task: asyncio.Future) -> bool:
+    """Whether an agent task was cut off by the request deadline (still running, cancelled or DeadlineExceeded)."""
+    return not task.done() or task.cancelled() or isinstance(task.exception(), deadline.DeadlineExceeded)
+
+async def _start_agents(patient_data, caregiver_input: CaregiverInput, speculative: bool, combined: bool = False):
+    """Route the patient and start every recommended agent; returns routing and one task per agent."""
+    if combined:
+        routing_decision, agent_responses = await ai_service.process_case_combined(patient_data, caregiver_input)
+        return routing_decision, {
+            agent_type: _completed_task(agent_responses[agent_type]) if agent_type in agent_responses
+            else _timed_out_task()
+            for agent_type in dict.fromkeys(routing_decision.recommended_agents)
+        }
+    
+    if speculative:
+        return await route_with_speculation(ai_service, patient_data, caregiver_input, _run_agent, speculation_stats)
+    
+    routing_decision = await ai_service.route_patient(patient_data, caregiver_input)
+    return routing_decision, _launch_agents(routing_decision, patient_data, caregiver_input)
+
+def _launch_agents(routing_decision: RoutingDecision, patient_data, caregiver_input: CaregiverInput) -> Dict[AgentType, asyncio.Task]:
+    """Start one task per recommended agent of an existing routing decision."""
+    return {
+        agent_type: asyncio.ensure_future(_run_agent(agent_type, patient_data, caregiver_input))
+        for agent_type in dict.fromkeys(routing_decision.recommended_agents)
+    }
+
+def _request_timeout(body_timeout: Optional[float], header_timeout: Optional[float]) -> Optional[float]:
+    """Tightest of the body `deadline_seconds` and the `X-Request-Timeout` header (seconds)."""
+    timeouts = [t for t in (body_timeout, header_timeout) if t is not None and t > 0]
+    return min(timeouts) if timeouts else None
+
+async def _collect_agents(agent_tasks: Dict[AgentType, asyncio.Task]):
+    """Wait for agents until the request deadline; returns responses plus a per-agent status marker."""
+    if agent_tasks:
+        _, pending = await asyncio.wait(agent_tasks.values(), timeout=deadline.remaining())
+        for task in pending:
+            task.cancel()
+    
+    agent_responses = []
+    agent_status = []
+    for agent_type, task in agent_tasks.items():
+        if _timed_out(task):
+            agent_status.append({"agent_type": agent_type, "status": "timeout"})
+        elif task.result():
+            agent_responses.append(task.result())
+            agent_status.append({"agent_type": agent_type, "status": "completed"})
+        else:
+            agent_status.append({"agent_type": agent_type, "status": "failed"})
+    return agent_responses, agent_status
+
 @app.post("/api/process-complete-case")
-async def process_complete_case(request: RoutingRequest):
-    """Complete end-to-end processing: routing + all recommended agents."""
+async def process_complete_case(
+    request: RoutingRequest,
+    speculative: Optional[bool] = None,
+    combined: Optional[bool] = None,
+    x_request_timeout: Optional[float] = Header(None)
+):
+    """Complete end-to-end processing: routing + all recommended agents.
+    
+    `combined=true` produces routing and every agent's output with a single LLM call.
+    With a deadline (`deadline_seconds` in the body or `X-Request-Timeout` header) the response
+    contains whichever agents finished in time; the rest are marked `timeout` in `agent_status`.
+    """
     
     try:
         # Get patient data from cache
         patient_data = data_service.get_patient(request.patient_data.patient_id)
         
-        # Step 1: Get routing decision
-        routing_decision = await ai_service.route_patient(
-            patient_data,
-            request.caregiver_input
-        )
-        
-        # Step 2: Process through all recommended agents
-        agent_responses = []
+        with deadline.request_deadline(_request_timeout(request.deadline_seconds, x_request_timeout)):
+            # Step 1: Get routing decision and start the recommended agents concurrently
+            routing_decision, agent_tasks = await _start_agents(
+                patient_data,
+                request.caregiver_input,
+                SPECULATIVE_AGENT_PREFETCH if speculative is None else speculative,
+                COMBINED_AGENT_MODE if combined is None else combined
+            )
+            
+            # Step 2: Collect agent results until the deadline (results keep routing order)
+            agent_responses, agent_status = await _collect_agents(agent_tasks)
         
-        for agent_type in routing_decision.recommended_agents:
-            try:
-                response = None
-                
-                if agent_type == AgentType.NURSING:
-                    response = await ai_service.process_nursing_agent(
-                        patient_data, request.caregiver_input
-                    )
-                elif agent_type == AgentType.DME:
-                    response = await ai_service.process_dme_agent(
-                        patient_data, request.caregiver_input
-                    )
-                elif agent_type == AgentType.PHARMACY:
-                    response = await ai_service.process_pharmacy_agent(
-                        patient_data, request.caregiver_input
-                    )
-                elif agent_type == AgentType.STATE:
-                    response = await ai_service.process_state_agent(
-                        patient_data, request.caregiver_input
-                    )
-                else:
-                    # Handle unknown agent types
-                    print(f"⚠️ Unknown agent type: {agent_type}")
-                    continue
-                
-                if response:
-                    agent_responses.append(response)
-                else:
-                    print(f"⚠️ No response from {agent_type} agent")
-                    
-            except Exception as agent_error:
-                print(f"❌ Error processing {agent_type} agent: {str(agent_error)}")
-                # Continue processing other agents instead of failing completely
-                continue
+        timed_out_agents = [status["agent_type"] for status in agent_status if status["status"] == "timeout"]
         
         return {
             "routing_decision": routing_decision,
             "agent_responses": agent_responses,
-            "status": "success",
+            "status": "partial" if timed_out_agents else "success",
             "processed_agents": len(agent_responses),
-            "total_recommended": len(routing_decision.recommended_agents)
+            "total_recommended": len(routing_decision.recommended_agents),
+            "agent_status": agent_status,
+            "timed_out_agents": timed_out_agents
         }
         
     except Exception as e:
-        print(f"❌ Complete case processing error: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"❌ Complete case processing error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Complete case processing failed: {str(e)}")
 
+def _sse_event(event: str, data) -> str:
+    """Format one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+@app.post("/api/process-complete-case/stream")
+async def process_complete_case_stream(
+    request: RoutingRequest,
+    speculative: Optional[bool] = None,
+    combined: Optional[bool] = None,
+    x_request_timeout: Optional[float] = Header(None)
+):
+    """Streaming variant of complete case processing (server-sent events).
+    
+    Emits `routing_decision` as soon as routing finishes, then one `agent_response`
+    (or `agent_error`) per agent in completion order, an `agent_timeout` for each agent
+    still running at the deadline, then a final `complete` summary.
+    """
+    
+    try:
+        patient_data = data_service.get_patient(request.patient_data.patient_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    
+    timeout_seconds = _request_timeout(request.deadline_seconds, x_request_timeout)
+    
+    async def event_stream():
+        start_time = time.perf_counter()
+        pending = set()
+        with deadline.request_deadline(timeout_seconds):
+            try:
+                routing_decision, tasks_by_agent = await _start_agents(
+                    patient_data,
+                    request.caregiver_input,
+                    SPECULATIVE_AGENT_PREFETCH if speculative is None else speculative,
+                    COMBINED_AGENT_MODE if combined is None else combined
+                )
+                agent_tasks = {task: agent_type for agent_type, task in tasks_by_agent.items()}
+                pending = set(agent_tasks)
+                yield _sse_event("routing_decision", routing_decision)
+                processed_agents = 0
+                timed_out_agents = []
+                
+                while pending:
+                    done, pending = await asyncio.wait(
+                        pending, timeout=deadline.remaining(), return_when=asyncio.FIRST_COMPLETED
+                    )
+                    if not done:
+                        for task in pending:
+                            task.cancel()
+                            timed_out_agents.append(agent_tasks[task])
+                            yield _sse_event("agent_timeout", {
+                                "agent_type": agent_tasks[task],
+                                "message": f"{agent_tasks[task].value} agent did not finish before the deadline"
+                            })
+                        pending = set()
+                        break
+                    for task in done:
+                        if _timed_out(task):
+                            timed_out_agents.append(agent_tasks[task])
+                            yield _sse_event("agent_timeout", {
+                                "agent_type": agent_tasks[task],
+                                "message": f"{agent_tasks[task].value} agent did not finish before the deadline"
+                            })
+                            continue
+                        response = task.result()
+                        if response:
+                            processed_agents += 1
+                            yield _sse_event("agent_response", response)
+                        else:
+                            yield _sse_event("agent_error", {
+                                "agent_type": agent_tasks[task],
+                                "message": f"{agent_tasks[task].value} agent did not return a response"
+                            })
+                
+                yield _sse_event("complete", {
+                    "status": "partial" if timed_out_agents else "success",
+                    "processed_agents": processed_agents,
+                    "total_recommended": len(routing_decision.recommended_agents),
+                    "timed_out_agents": timed_out_agents,
+                    "elapsed_ms": round((time.perf_counter() - start_time) * 1000, 1)
+                })
+            except Exception as e:
+                logger.exception(f"❌ Streaming case processing error: {str(e)}")
+                yield _sse_event("error", {"status": "error", "detail": f"Complete case processing failed: {str(e)}"})
+            finally:
+                # Client disconnected or processing failed - stop agents that are still running
+                for task in pending:
+                    task.cancel()
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def _batch_patient_ids(request: BatchRoutingRequest) -> List[str]:
+    """Patient IDs to process: the whole loaded census or the requested IDs (deduplicated, in order)."""
+    if request.all_loaded:
+        return [patient.patient_id for patient in data_service.list_patients()]
+    return list(dict.fromkeys(request.patient_ids))
+
+def _batch_caregiver_input(patient_id: str, request: BatchRoutingRequest) -> CaregiverInput:
+    return CaregiverInput(patient_id=patient_id, **request.caregiver_defaults.model_dump())
+
+def _packed_batch_cases(patient_ids: List[str], request: BatchRoutingRequest) -> List[Tuple[Any, CaregiverInput]]:
+    """Known batch patients to route with packed multi-patient prompts (empty unless pack_size > 1 outside combined mode)."""
+    combined = COMBINED_AGENT_MODE if request.combined is None else request.combined
+    if request.pack_size <= 1 or (request.include_agents and combined):
+        return []
+    
+    cases = []
+    for patient_id in patient_ids:
+        try:
+            cases.append((data_service.get_patient(patient_id), _batch_caregiver_input(patient_id, request)))
+        except ValueError:
+            continue  # reported as not_found per patient
+    return cases
+
+async def _process_batch_patient(patient_id: str, request: BatchRoutingRequest, semaphore: asyncio.Semaphore,
+                                 routing_decision: Optional[RoutingDecision] = None):
+    """Route (and optionally run agents for) one patient of a batch; never raises.
+    
+    A routing decision already produced by packed routing is reused instead of routing again.
+    """
+    async with semaphore:
+        start_time = time.perf_counter()
+        result = {"patient_id": patient_id}
+        try:
+            patient_data = data_service.get_patient(patient_id)
+            caregiver_input = _batch_caregiver_input(patient_id, request)
+            
+            if request.include_agents and routing_decision is not None:
+                agent_responses, agent_status = await _collect_agents(
+                    _launch_agents(routing_decision, patient_data, caregiver_input)
+                )
+                result.update({
+                    "agent_responses": agent_responses,
+                    "agent_status": agent_status,
+                    "processed_agents": len(agent_responses)
+                })
+                timed_out = any(status["status"] == "timeout" for status in agent_status)
+            elif request.include_agents:
+                routing_decision, agent_tasks = await _start_agents(
+                    patient_data,
+                    caregiver_input,
+                    SPECULATIVE_AGENT_PREFETCH,
+                    COMBINED_AGENT_MODE if request.combined is None else request.combined
+                )
+                agent_responses, agent_status = await _collect_agents(agent_tasks)
+                result.update({
+                    "agent_responses": agent_responses,
+                    "agent_status": agent_status,
+                    "processed_agents": len(agent_responses)
+                })
+                timed_out = any(status["status"] == "timeout" for status in agent_status)
+            else:
+                if routing_decision is None:
+                    routing_decision = await ai_service.route_patient(patient_data, caregiver_input)
+                timed_out = False
+            
+            result.update({
+                "status": "partial" if timed_out else "success",
+                "routing_decision": routing_decision
+            })
+        except ValueError as e:
+            result.update({"status": "not_found", "error": str(e)})
+        except Exception as e:
+            logger.error(f"❌ Batch processing error for patient {patient_id}: {str(e)}")
+            result.update({"status": "error", "error": str(e)})
+        
+        result["elapsed_ms"] = round((time.perf_counter() - start_time) * 1000, 1)
+        return result
+
+def _batch_summary(results: List[Dict], elapsed_seconds: float) -> Dict:
+    """Aggregate counts and timing for a batch."""
+    patient_times = [result["elapsed_ms"] for result in results]
+    statuses = [result["status"] for result in results]
+    return {
+        "total_patients": len(results),
+        "succeeded": statuses.count("success"),
+        "partial": statuses.count("partial"),
+        "not_found": statuses.count("not_found"),
+        "failed": statuses.count("error"),
+        "elapsed_ms": round(elapsed_seconds * 1000, 1),
+        "avg_patient_ms": round(sum(patient_times) / len(patient_times), 1) if patient_times else 0.0,
+        "max_patient_ms": max(patient_times) if patient_times else 0.0,
+        "patients_per_second": round(len(results) / elapsed_seconds, 2) if elapsed_seconds > 0 else 0.0
+    }
+
+@app.post("/api/route-batch")
+async def route_batch(request: BatchRoutingRequest):
+    """Route a list of patients (or the whole loaded census) with bounded concurrency."""
+    patient_ids = _batch_patient_ids(request)
+    if not patient_ids:
+        raise HTTPException(status_code=400, detail="Provide patient_ids or set all_loaded to true")
+    
+    start_time = time.perf_counter()
+    semaphore = asyncio.Semaphore(request.max_concurrency)
+    with deadline.request_deadline(request.deadline_seconds):
+        cases = _packed_batch_cases(patient_ids, request)
+        routing_decisions = await ai_service.route_patients_packed(cases, request.pack_size, semaphore) if cases else {}
+        results = await asyncio.gather(*(
+            _process_batch_patient(patient_id, request, semaphore, routing_decisions.get(patient_id))
+            for patient_id in patient_ids
+        ))
+    
+    return {
+        "results": results,
+        "summary": _batch_summary(results, time.perf_counter() - start_time)
+    }
+
+@app.post("/api/route-batch/stream")
+async def route_batch_stream(request: BatchRoutingRequest):
+    """Streaming batch routing: one `patient_result` event per patient as it completes, then a `complete` summary.
+    
+    If packed routing fails, a `pack_error` event lists the patients that are routed individually instead.
+    """
+    patient_ids = _batch_patient_ids(request)
+    if not patient_ids:
+        raise HTTPException(status_code=400, detail="Provide patient_ids or set all_loaded to true")
+    
+    async def event_stream():
+        start_time = time.perf_counter()
+        semaphore = asyncio.Semaphore(request.max_concurrency)
+        pending = set()
+        with deadline.request_deadline(request.deadline_seconds):
+            
+            started = set()
+            
+            def start(patient_id: str, routing_decision: Optional[RoutingDecision] = None) -> asyncio.Future:
+                started.add(patient_id)
+                return asyncio.ensure_future(_process_batch_patient(patient_id, request, semaphore, routing_decision))
+            
+            # Packed patients start as soon as their own pack is routed, not after every pack
+            cases = _packed_batch_cases(patient_ids, request)
+            packed_ids = {patient_data.patient_id for patient_data, _ in cases}
+            packs = ai_service.iter_packed_routing(cases, request.pack_size, semaphore)
+            next_pack = asyncio.ensure_future(packs.__anext__()) if cases else None
+            try:
+                pending = {start(patient_id) for patient_id in patient_ids if patient_id not in packed_ids}
+                if next_pack is not None:
+                    pending.add(next_pack)
+                results = []
+                while pending:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        if task is next_pack:
+                            try:
+                                pack_decisions = task.result()
+                            except StopAsyncIteration:
+                                next_pack = None
+                                continue
+                            except Exception as e:
+                                # The pack iterator is finished after a failure: route its unrouted patients one by one
+                                next_pack = None
+                                rerouted = [patient_id for patient_id in packed_ids if patient_id not in started]
+                                logger.error(f"❌ Packed routing failed, routing {len(rerouted)} patients individually: {e}")
+                                yield _sse_event("pack_error", {
+                                    "detail": f"Packed routing failed: {str(e)}",
+                                    "rerouted_patients": rerouted
+                                })
+                                pending.update(start(patient_id) for patient_id in rerouted)
+                                continue
+                            pending.update(start(patient_id, decision) for patient_id, decision in pack_decisions.items())
+                            next_pack = asyncio.ensure_future(packs.__anext__())
+                            pending.add(next_pack)
+                            continue
+                        results.append(task.result())
+                        yield _sse_event("patient_result", task.result())
+                yield _sse_event("complete", _batch_summary(results, time.perf_counter() - start_time))
+            finally:
+                # Client disconnected or the stream ended: stop patient work, let the pack iterator unwind, then close it
+                for task in pending:
+                    task.cancel()
+                if next_pack is not None:
+                    next_pack.cancel()
+                    await asyncio.gather(next_pack, return_exceptions=True)
+                await packs.aclose()
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.get("/api/sample-data")
 async def get_sample_data():
     """Get information about data directory and expected format."""
@@ -0,0 +1,196 @@
+"""
+In-process metrics registry.
+Latency histograms per pipeline stage, agent type and provider, token counts per LLM call and
+cache hit ratios, exposed as JSON summaries (p50/p95/p99) and in Prometheus text format at /metrics.
+"""
+
+import asyncio
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from app.hedging import LatencyHistogram
+from app.llm_cache import get_llm_cache
+from app.rate_limiter import estimate_tokens
+
+METRIC_PREFIX = "routing_ai_"
+
+STAGE_SECONDS = "stage_duration_seconds"
+LLM_CALL_SECONDS = "llm_call_duration_seconds"
+LLM_CALL_TOKENS = "llm_call_tokens"
+LLM_TOKENS_TOTAL = "llm_tokens_total"
+LLM_CALLS_TOTAL = "llm_calls_total"
+
+# Token-count bucket upper bounds for per-call prompt/response sizes
+TOKEN_BUCKETS = [50, 100, 250, 500, 750, 1000, 1500, 2000, 3000, 4000, 6000, 8000, 16000, 32000]
+
+_HELP = {
+    STAGE_SECONDS: "Wall-clock time per pipeline stage (routing, agent, retrieval, nurse_ranking, form_generation, ...)",
+    LLM_CALL_SECONDS: "Provider round-trip time per LLM call",
+    LLM_CALL_TOKENS: "Estimated tokens per LLM call (about 4 characters per token)",
+    LLM_TOKENS_TOTAL: "Estimated LLM tokens sent and received",
+    LLM_CALLS_TOTAL: "LLM provider calls by outcome",
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items() if value is not None))
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class MetricsRegistry:
+    """Thread-safe labelled histograms and counters."""
+
+    def __init__(self):
+        self.histograms: Dict[Tuple[str, Labels], LatencyHistogram] = {}
+        self.counters: Dict[Tuple[str, Labels], float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, value: float, buckets: Optional[List[float]] = None, **labels):
+        """Record a value in the histogram for name and labels (created on first use)."""
+        key = (name, _labels(labels))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = LatencyHistogram(buckets)
+        histogram.record(value)
+
+    def increment(self, name: str, value: float = 1, **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    @contextmanager
+    def timer(self, stage: str, **labels) -> Iterator[None]:
+        """Record the wall-clock time of a block as a stage duration."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(STAGE_SECONDS, time.perf_counter() - start, stage=stage, **labels)
+
+    def record_llm_call(self, provider: str, seconds: float, prompt: str, response: str):
+        """Record latency and estimated token counts for one successful provider call."""
+        prompt_tokens = estimate_tokens(prompt, max_output_tokens=0)
+        response_tokens = estimate_tokens(response or "", max_output_tokens=0)
+        self.observe(LLM_CALL_SECONDS, seconds, provider=provider)
+        self.observe(LLM_CALL_TOKENS, prompt_tokens, TOKEN_BUCKETS, provider=provider, direction="prompt")
+        self.observe(LLM_CALL_TOKENS, response_tokens, TOKEN_BUCKETS, provider=provider, direction="response")
+        self.increment(LLM_TOKENS_TOTAL, prompt_tokens, provider=provider, direction="prompt")
+        self.increment(LLM_TOKENS_TOTAL, response_tokens, provider=provider, direction="response")
+        self.increment(LLM_CALLS_TOTAL, provider=provider, outcome="success")
+
+    def record_llm_failure(self, provider: str):
+        self.increment(LLM_CALLS_TOTAL, provider=provider, outcome="error")
+
+    def _items(self):
+        with self._lock:
+            return sorted(self.histograms.items()), sorted(self.counters.items())
+
+    def get_summary(self) -> Dict[str, Any]:
+        """Percentile summaries and counter values, grouped by metric name."""
+        histograms, counters = self._items()
+        summary: Dict[str, List[Dict[str, Any]]] = {}
+        for (name, labels), histogram in histograms:
+            summary.setdefault(name, []).append({**dict(labels), **histogram.summary()})
+        for (name, labels), value in counters:
+            summary.setdefault(name, []).append({**dict(labels), "value": value})
+        summary["llm_cache"] = get_llm_cache_metrics()
+        return summary
+
+    def render_prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+        histograms, counters = self._items()
+        lines: List[str] = []
+        declared = set()
+
+        def declare(name: str, metric_type: str):
+            if name not in declared:
+                declared.add(name)
+                lines.append(f"# HELP {METRIC_PREFIX}{name} {_HELP.get(name, name)}")
+                lines.append(f"# TYPE {METRIC_PREFIX}{name} {metric_type}")
+
+        for (name, labels), histogram in histograms:
+            declare(name, "histogram")
+            snapshot = histogram.snapshot()
+            cumulative = 0
+            for upper_bound, count in zip(snapshot["buckets"] + ["+Inf"], snapshot["counts"]):
+                cumulative += count
+                le = upper_bound if upper_bound == "+Inf" else _format_value(upper_bound)
+                lines.append(f"{METRIC_PREFIX}{name}_bucket{_format_labels(labels, ('le', le))} {cumulative}")
+            lines.append(f"{METRIC_PREFIX}{name}_sum{_format_labels(labels)} {_format_value(snapshot['sum'])}")
+            lines.append(f"{METRIC_PREFIX}{name}_count{_format_labels(labels)} {snapshot['count']}")
+
+        for (name, labels), value in counters:
+            declare(name, "counter")
+            lines.append(f"{METRIC_PREFIX}{name}{_format_labels(labels)} {_format_value(value)}")
+
+        cache = get_llm_cache_metrics()
+        if cache:
+            declare("llm_cache_lookups_total", "counter")
+            for result in ("memory_hits", "disk_hits", "misses"):
+                lines.append(f'{METRIC_PREFIX}llm_cache_lookups_total{{result="{result}"}} {cache[result]}')
+            declare("llm_cache_hit_ratio", "gauge")
+            lines.append(f"{METRIC_PREFIX}llm_cache_hit_ratio {_format_value(cache['hit_ratio'])}")
+
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+
+def get_llm_cache_metrics() -> Dict[str, Any]:
+    """Response cache hit/miss counters ({} when the cache is disabled)."""
+    cache = get_llm_cache()
+    if cache is None:
+        return {}
+    stats = cache.get_stats()
+    return {key: stats[key] for key in ("memory_hits", "disk_hits", "misses", "hit_ratio")}
+
+
+def timed(stage: str, **labels) -> Callable:
+    """Decorator recording each call of a sync or async function as a stage duration."""
+    def decorator(func: Callable) -> Callable:
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with get_metrics().timer(stage, **labels):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with get_metrics().timer(stage, **labels):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# Global instance
+metrics = None
+_registry_lock = threading.Lock()
+
+def get_metrics() -> MetricsRegistry:
+    """Get or create the process-wide metrics registry."""
+    global metrics
+    with _registry_lock:
+        if metrics is None:
+            metrics = MetricsRegistry()
+        return metrics
@@ -88,6 +88,25 @@ class CaregiverInput(BaseModel):
 class RoutingRequest(BaseModel):
     patient_data: ComprehensivePatientData  # Updated to use comprehensive model
     caregiver_input: CaregiverInput
+    deadline_seconds: Optional[float] = Field(None, gt=0, description="End-to-end time budget for processing")
+
+class BatchCaregiverDefaults(BaseModel):
+    """Caregiver input shared by every patient in a batch routing request."""
+    urgency_level: str = Field("medium", description="low, medium, high")
+    primary_concern: str = "Discharge coordination"
+    requested_services: List[str] = []
+    additional_notes: Optional[str] = None
+    contact_preference: str = "phone"
+
+class BatchRoutingRequest(BaseModel):
+    patient_ids: List[str] = []
+    all_loaded: bool = Field(False, description="Route every patient in the loaded census")
+    caregiver_defaults: BatchCaregiverDefaults = BatchCaregiverDefaults()
+    include_agents: bool = Field(True, description="Run the recommended agents, not just routing")
+    combined: Optional[bool] = Field(None, description="Single LLM call per patient for routing and all agents")
+    max_concurrency: int = Field(4, ge=1, le=32)
+    pack_size: int = Field(1, ge=1, le=25, description="Patients per routing prompt (packed routing when > 1)")
+    deadline_seconds: Optional[float] = Field(None, gt=0, description="Time budget for the whole batch")
 
 class RoutingDecision(BaseModel):
     patient_id: str
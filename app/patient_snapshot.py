@@ -0,0 +1,142 @@
+"""
+Parsed-snapshot cache for patient workbooks.
+Reading .xlsx through openpyxl dominates startup and /api/refresh-data, so the validated patients of
+each workbook are pickled next to the LLM cache, keyed by the workbook's absolute path, size and
+mtime (plus the parser schema). An unchanged workbook is then loaded from its snapshot without
+opening it. Snapshots are local, trusted files written by this service only.
+"""
+
+import hashlib
+import logging
+import os
+import pickle
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from app.models import ComprehensivePatientData
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = 1
+
+
+def source_signature(source_path: str) -> Dict[str, Any]:
+    """Identity of a workbook on disk: absolute path, size and modification time."""
+    stat = os.stat(source_path)
+    return {"path": os.path.abspath(source_path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+class PatientSnapshotCache:
+    """One snapshot file per source workbook; a snapshot is used only while its signature still matches."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.writes = 0
+        self.errors = 0
+        self.last_load_seconds: Optional[float] = None
+
+    def _snapshot_path(self, source_path: str) -> str:
+        digest = hashlib.sha256(os.path.abspath(source_path).encode("utf-8")).hexdigest()[:32]
+        return os.path.join(self.directory, f"{digest}.pkl")
+
+    def load(self, source_path: str, schema: str) -> Optional[List[ComprehensivePatientData]]:
+        """Patients from the snapshot of source_path, or None when missing, stale or unreadable."""
+        start = time.perf_counter()
+        snapshot_path = self._snapshot_path(source_path)
+        try:
+            signature = source_signature(source_path)
+            with open(snapshot_path, "rb") as snapshot_file:
+                snapshot = pickle.load(snapshot_file)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        except Exception as e:
+            logger.warning(f"⚠️ Unreadable patient snapshot {snapshot_path}: {e}")
+            with self._lock:
+                self.errors += 1
+            return None
+
+        if (snapshot.get("format") != SNAPSHOT_FORMAT or snapshot.get("schema") != schema
+                or snapshot.get("source") != signature):
+            with self._lock:
+                self.stale += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+            self.last_load_seconds = time.perf_counter() - start
+        return snapshot["patients"]
+
+    def store(self, source_path: str, schema: str, patients: List[ComprehensivePatientData],
+              signature: Optional[Dict[str, Any]] = None):
+        """Write the snapshot atomically; signature should be taken before parsing so a concurrent edit is not masked."""
+        snapshot_path = self._snapshot_path(source_path)
+        temp_path = f"{snapshot_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            snapshot = {
+                "format": SNAPSHOT_FORMAT,
+                "schema": schema,
+                "source": signature or source_signature(source_path),
+                "created_at": time.time(),
+                "patients": patients
+            }
+            with open(temp_path, "wb") as snapshot_file:
+                pickle.dump(snapshot, snapshot_file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, snapshot_path)
+            with self._lock:
+                self.writes += 1
+        except Exception as e:
+            logger.warning(f"⚠️ Could not write patient snapshot for {source_path}: {e}")
+            with self._lock:
+                self.errors += 1
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def clear(self):
+        """Delete every snapshot file."""
+        if not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            if name.endswith(".pkl"):
+                os.remove(os.path.join(self.directory, name))
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses + self.stale
+            snapshots = [name for name in os.listdir(self.directory) if name.endswith(".pkl")] \
+                if os.path.isdir(self.directory) else []
+            return {
+                "directory": self.directory,
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale": self.stale,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "writes": self.writes,
+                "errors": self.errors,
+                "snapshots": len(snapshots),
+                "last_load_seconds": round(self.last_load_seconds, 4) if self.last_load_seconds is not None else None
+            }
+
+
+# Global instance
+patient_snapshots = None
+
+def get_patient_snapshots() -> Optional[PatientSnapshotCache]:
+    """Get or create the global snapshot cache (None when PATIENT_SNAPSHOT_ENABLED=false)."""
+    global patient_snapshots
+    if os.getenv("PATIENT_SNAPSHOT_ENABLED", "true").lower() != "true":
+        return None
+    if patient_snapshots is None:
+        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        patient_snapshots = PatientSnapshotCache(
+            os.getenv("PATIENT_SNAPSHOT_DIR", os.path.join(project_root, ".cache", "patient_snapshots"))
+        )
+    return patient_snapshots
@@ -0,0 +1,293 @@
+"""
+Provider-aware rate limiting for LLM calls.
+Requests/min and tokens/min token buckets plus AIMD adaptive concurrency driven by 429s and latency.
+Callers queue for capacity instead of failing; rate-limit errors are retried with backoff.
+"""
+
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitTimeout(Exception):
+    """Raised when capacity did not free up within the maximum queue wait."""
+
+
+def estimate_tokens(prompt: str, max_output_tokens: int = 1000) -> int:
+    """Rough token estimate (about 4 characters per token) for prompt plus expected output."""
+    return len(prompt) // 4 + max_output_tokens
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Detect provider quota/429 errors across the OpenAI and Google SDKs."""
+    if getattr(error, "status_code", None) == 429 or getattr(error, "code", None) == 429:
+        return True
+    if type(error).__name__ in ("RateLimitError", "ResourceExhausted", "TooManyRequests"):
+        return True
+    message = str(error).lower()
+    return "429" in message or "quota" in message or "rate limit" in message
+
+
+def _wake(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at rate_per_minute."""
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate_per_second = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate_per_second)
+        self.updated_at = now
+
+    def time_until_available(self, amount: float) -> float:
+        """Seconds until `amount` tokens are available (0 if available now)."""
+        with self._lock:
+            self._refill(time.monotonic())
+            amount = min(amount, self.capacity)
+            if self.tokens >= amount:
+                return 0.0
+            return (amount - self.tokens) / self.rate_per_second
+
+    def consume(self, amount: float):
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens -= min(amount, self.capacity)
+
+    def available(self) -> float:
+        with self._lock:
+            self._refill(time.monotonic())
+            return self.tokens
+
+
+class ProviderRateLimiter:
+    """Rate limiter for one LLM provider, shared by every component that calls it."""
+
+    def __init__(self, provider: str, requests_per_minute: float = 60, tokens_per_minute: float = 120000,
+                 max_concurrency: int = 8, min_concurrency: int = 1, latency_target: float = 10.0,
+                 max_wait: float = 60.0, max_retries: int = 3):
+        self.provider = provider
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.concurrency_limit = float(max_concurrency)
+        self.latency_target = latency_target
+        self.max_wait = max_wait
+        self.max_retries = max_retries
+
+        self.in_flight = 0
+        self._lock = threading.Lock()
+        # Callers waiting for a concurrency slot: (loop, future) for coroutines, Event for threads
+        self._waiters: List[Union[Tuple[asyncio.AbstractEventLoop, asyncio.Future], threading.Event]] = []
+
+        self.total_requests = 0
+        self.total_queued_seconds = 0.0
+        self.rate_limited_responses = 0
+        self.retries = 0
+        self.timeouts = 0
+
+    def _try_acquire(self, estimated_tokens: int, waiter=None) -> Optional[float]:
+        """Take capacity if available; otherwise return how long to wait for the buckets to refill,
+        or None when every concurrency slot is taken (the waiter is then registered to be woken on release)."""
+        with self._lock:
+            if self.in_flight >= max(self.min_concurrency, int(self.concurrency_limit)):
+                self._waiters.append(waiter)
+                return None
+            wait = max(self.request_bucket.time_until_available(1),
+                       self.token_bucket.time_until_available(estimated_tokens))
+            if wait > 0:
+                return wait
+            self.request_bucket.consume(1)
+            self.token_bucket.consume(estimated_tokens)
+            self.in_flight += 1
+            self.total_requests += 1
+            return 0.0
+
+    def _remove_waiter(self, waiter):
+        with self._lock:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def _timed_out(self, start: float, wait: float) -> bool:
+        if time.monotonic() - start + wait <= self.max_wait:
+            return False
+        self.timeouts += 1
+        return True
+
+    async def acquire(self, estimated_tokens: int):
+        """Wait (without blocking the event loop) until a request slot is available."""
+        loop = asyncio.get_running_loop()
+        start = time.monotonic()
+        while True:
+            waiter = (loop, loop.create_future())
+            wait = self._try_acquire(estimated_tokens, waiter)
+            if wait == 0:
+                self.total_queued_seconds += time.monotonic() - start
+                return
+            if self._timed_out(start, wait or 0.0):
+                self._remove_waiter(waiter)
+                raise RateLimitTimeout(f"{self.provider} capacity not available within {self.max_wait}s")
+            if wait is not None:
+                await asyncio.sleep(min(wait, 1.0))
+                continue
+            try:
+                await asyncio.wait_for(waiter[1], self.max_wait - (time.monotonic() - start))
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                self._remove_waiter(waiter)
+
+    def acquire_blocking(self, estimated_tokens: int):
+        """Thread variant of acquire() for synchronous callers running in worker threads."""
+        start = time.monotonic()
+        while True:
+            waiter = threading.Event()
+            wait = self._try_acquire(estimated_tokens, waiter)
+            if wait == 0:
+                self.total_queued_seconds += time.monotonic() - start
+                return
+            if self._timed_out(start, wait or 0.0):
+                self._remove_waiter(waiter)
+                raise RateLimitTimeout(f"{self.provider} capacity not available within {self.max_wait}s")
+            if wait is not None:
+                time.sleep(min(wait, 1.0))
+                continue
+            waiter.wait(self.max_wait - (time.monotonic() - start))
+            self._remove_waiter(waiter)
+
+    def _adapt(self, latency: float, rate_limited: bool):
+        if rate_limited:
+            self.rate_limited_responses += 1
+            self.concurrency_limit = max(self.min_concurrency, self.concurrency_limit / 2)
+        elif latency > self.latency_target:
+            self.concurrency_limit = max(self.min_concurrency, self.concurrency_limit * 0.9)
+        else:
+            self.concurrency_limit = min(self.max_concurrency, self.concurrency_limit + 1 / self.concurrency_limit)
+
+    def release(self, latency: float, rate_limited: bool = False, adapt: bool = True):
+        """Return the slot, adapt the concurrency limit (AIMD) and wake callers waiting for a slot."""
+        with self._lock:
+            self.in_flight = max(0, self.in_flight - 1)
+            if adapt:
+                self._adapt(latency, rate_limited)
+            waiters, self._waiters = self._waiters, []
+        for waiter in waiters:
+            if isinstance(waiter, threading.Event):
+                waiter.set()
+                continue
+            loop, future = waiter
+            try:
+                loop.call_soon_threadsafe(_wake, future)
+            except RuntimeError:
+                pass  # the waiter's loop has closed
+
+    def _backoff(self, attempt: int) -> float:
+        return min(30.0, (2 ** attempt) * (0.5 + random.random()))
+
+    async def run(self, func: Callable[[], Awaitable[Any]], estimated_tokens: int) -> Any:
+        """Await func() under the limiter, retrying rate-limit errors with exponential backoff."""
+        for attempt in range(self.max_retries + 1):
+            await self.acquire(estimated_tokens)
+            start = time.monotonic()
+            try:
+                result = await func()
+            except Exception as e:
+                rate_limited = is_rate_limit_error(e)
+                self.release(time.monotonic() - start, rate_limited=rate_limited)
+                if rate_limited and attempt < self.max_retries:
+                    self.retries += 1
+                    delay = self._backoff(attempt)
+                    logger.warning(f"⚠️ {self.provider} rate limited, retrying in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+                    continue
+                raise
+            except BaseException:
+                # Cancelled (lost hedge, expired deadline): free the slot without adapting the limit
+                self.release(time.monotonic() - start, adapt=False)
+                raise
+            self.release(time.monotonic() - start)
+            return result
+
+    def run_blocking(self, func: Callable[[], Any], estimated_tokens: int) -> Any:
+        """Thread variant of run() for synchronous SDK calls."""
+        for attempt in range(self.max_retries + 1):
+            self.acquire_blocking(estimated_tokens)
+            start = time.monotonic()
+            try:
+                result = func()
+            except Exception as e:
+                rate_limited = is_rate_limit_error(e)
+                self.release(time.monotonic() - start, rate_limited=rate_limited)
+                if rate_limited and attempt < self.max_retries:
+                    self.retries += 1
+                    delay = self._backoff(attempt)
+                    logger.warning(f"⚠️ {self.provider} rate limited, retrying in {delay:.1f}s")
+                    time.sleep(delay)
+                    continue
+                raise
+            except BaseException:
+                self.release(time.monotonic() - start, adapt=False)
+                raise
+            self.release(time.monotonic() - start)
+            return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "provider": self.provider,
+                "in_flight": self.in_flight,
+                "concurrency_limit": round(self.concurrency_limit, 2),
+                "max_concurrency": self.max_concurrency,
+                "requests_available": round(self.request_bucket.available(), 2),
+                "tokens_available": round(self.token_bucket.available(), 2),
+                "total_requests": self.total_requests,
+                "total_queued_seconds": round(self.total_queued_seconds, 3),
+                "rate_limited_responses": self.rate_limited_responses,
+                "retries": self.retries,
+                "timeouts": self.timeouts
+            }
+
+
+def _provider_setting(name: str, provider: str, default: str) -> str:
+    """Read NAME_PROVIDER, falling back to NAME, then the default."""
+    return os.getenv(f"{name}_{provider.upper()}", os.getenv(name, default))
+
+
+# Global instances, one per provider
+rate_limiters: Dict[str, ProviderRateLimiter] = {}
+_registry_lock = threading.Lock()
+
+def get_rate_limiter(provider: str) -> ProviderRateLimiter:
+    """Get or create the shared rate limiter for a provider."""
+    with _registry_lock:
+        if provider not in rate_limiters:
+            rate_limiters[provider] = ProviderRateLimiter(
+                provider,
+                requests_per_minute=float(_provider_setting("LLM_REQUESTS_PER_MINUTE", provider, "60")),
+                tokens_per_minute=float(_provider_setting("LLM_TOKENS_PER_MINUTE", provider, "120000")),
+                max_concurrency=int(_provider_setting("LLM_MAX_CONCURRENCY", provider, "8")),
+                latency_target=float(_provider_setting("LLM_LATENCY_TARGET_SECONDS", provider, "10")),
+                max_wait=float(_provider_setting("LLM_MAX_QUEUE_WAIT_SECONDS", provider, "60")),
+                max_retries=int(_provider_setting("LLM_MAX_RETRIES", provider, "3"))
+            )
+        return rate_limiters[provider]
+
+def get_rate_limiter_stats() -> Dict[str, Any]:
+    """Stats for every provider limiter created so far."""
+    with _registry_lock:
+        limiters = list(rate_limiters.values())
+    return {limiter.provider: limiter.get_stats() for limiter in limiters}
@@ -0,0 +1,62 @@
+"""
+Request coalescing for identical in-flight async calls.
+Concurrent callers with the same key share one upstream call and all receive its result.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+
+class SingleFlight:
+    """Deduplicate concurrent calls that share a key; the shared call is cancelled once nobody waits for it."""
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._waiters: Dict[asyncio.Future, int] = {}
+        self.leaders = 0
+        self.coalesced = 0
+        self.abandoned = 0
+
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Run func() for this key unless an identical call is already in flight, then share its result."""
+        task = self._inflight.get(key)
+        if task is None or task.done():
+            task = asyncio.ensure_future(func())
+            self._inflight[key] = task
+            task.add_done_callback(lambda finished: self._forget(key, finished))
+            self.leaders += 1
+        else:
+            self.coalesced += 1
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            # Shield so one cancelled waiter does not cancel the shared call for everyone else
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self._waiters[task] == 1 and not task.done():
+                # Last waiter gone (deadline or client disconnect): stop the upstream call and free the key now,
+                # so a later identical call starts fresh instead of joining a cancelled one
+                task.cancel()
+                if self._inflight.get(key) is task:
+                    del self._inflight[key]
+                self.abandoned += 1
+            raise
+        finally:
+            self._waiters[task] -= 1
+            if not self._waiters[task]:
+                del self._waiters[task]
+
+    def _forget(self, key: str, finished: asyncio.Future):
+        if self._inflight.get(key) is finished:
+            del self._inflight[key]
+        # Mark the exception as retrieved in case every waiter was cancelled
+        if not finished.cancelled():
+            finished.exception()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Counts of upstream calls made, calls coalesced onto them, calls abandoned by every waiter, and calls in flight."""
+        return {
+            "upstream_calls": self.leaders,
+            "coalesced_calls": self.coalesced,
+            "abandoned_calls": self.abandoned,
+            "in_flight": len(self._inflight)
+        }
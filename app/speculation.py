@@ -0,0 +1,104 @@
+"""
+Speculative agent prefetch.
+Launches the agents predicted by the rule-based routing signals while the LLM routing call
+is still running, keeps the ones routing confirms and cancels the rest.
+"""
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from app.models import AgentType, CaregiverInput, RoutingDecision
+
+AgentRunner = Callable[[AgentType, Any, CaregiverInput], Awaitable[Any]]
+
+
+class SpeculationStats:
+    """Counters for speculation hit rate and wasted agent calls."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.cases = 0
+        self.launched = 0
+        self.confirmed = 0
+        self.cancelled = 0
+        self.wasted_completed = 0
+        self.missed = 0
+
+    def record(self, launched: int, confirmed: int, cancelled: int, wasted_completed: int, missed: int):
+        with self._lock:
+            self.cases += 1
+            self.launched += launched
+            self.confirmed += confirmed
+            self.cancelled += cancelled
+            self.wasted_completed += wasted_completed
+            self.missed += missed
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            needed = self.confirmed + self.missed
+            return {
+                "cases": self.cases,
+                "launched": self.launched,
+                "confirmed": self.confirmed,
+                "cancelled": self.cancelled,
+                "wasted_completed": self.wasted_completed,
+                "missed": self.missed,
+                # Share of launched agents that routing kept
+                "precision": round(self.confirmed / self.launched, 4) if self.launched else 0.0,
+                # Share of needed agents that were already running when routing returned
+                "hit_rate": round(self.confirmed / needed, 4) if needed else 0.0
+            }
+
+
+async def route_with_speculation(
+    ai_service,
+    patient_data,
+    caregiver_input: CaregiverInput,
+    run_agent: AgentRunner,
+    stats: SpeculationStats
+) -> Tuple[RoutingDecision, Dict[AgentType, asyncio.Task]]:
+    """Route the patient while the predicted agents already run; return routing and one task per recommended agent."""
+    predicted = list(dict.fromkeys(ai_service.predict_agents(patient_data, caregiver_input)))
+    speculative_tasks = {
+        agent_type: asyncio.ensure_future(run_agent(agent_type, patient_data, caregiver_input))
+        for agent_type in predicted
+    }
+
+    try:
+        routing_decision = await ai_service.route_patient(patient_data, caregiver_input)
+    except BaseException:
+        for task in speculative_tasks.values():
+            task.cancel()
+        raise
+
+    recommended = list(dict.fromkeys(routing_decision.recommended_agents))
+    cancelled = wasted_completed = missed = 0
+
+    for agent_type, task in speculative_tasks.items():
+        if agent_type in recommended:
+            continue
+        if task.done():
+            wasted_completed += 1
+            if not task.cancelled():
+                task.exception()  # retrieved so an unneeded agent's deadline error is not logged as unhandled
+        else:
+            task.cancel()
+            cancelled += 1
+
+    agent_tasks = {}
+    for agent_type in recommended:
+        task = speculative_tasks.get(agent_type)
+        if task is None:
+            task = asyncio.ensure_future(run_agent(agent_type, patient_data, caregiver_input))
+            missed += 1
+        agent_tasks[agent_type] = task
+
+    stats.record(
+        launched=len(speculative_tasks),
+        confirmed=len(recommended) - missed,
+        cancelled=cancelled,
+        wasted_completed=wasted_completed,
+        missed=missed
+    )
+    return routing_decision, agent_tasks
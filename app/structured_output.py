@@ -0,0 +1,356 @@
+"""
+Schema-constrained parsing of LLM output.
+Output schemas are Pydantic models whose validators are compiled once at import; responses go through a
+strict JSON parse first and a cheap local repair pass (code fences, prose, trailing commas, Python literals,
+truncated brackets) before validation. Outcome counters show how often each step was needed.
+"""
+
+import json
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, ValidationError, field_validator
+
+from app.models import AgentType
+
+
+class StructuredOutputError(ValueError):
+    """LLM output could not be parsed or did not match its schema."""
+
+
+# ---- Output schemas ----
+
+class RoutingOutput(BaseModel):
+    """RoutingDecision as produced by the LLM (patient_id is filled in by the caller)."""
+    recommended_agents: List[AgentType] = Field(..., min_length=1)
+    reasoning: str
+    priority_score: int = Field(..., ge=1, le=10)
+    estimated_timeline: str
+
+    @field_validator("recommended_agents", mode="before")
+    @classmethod
+    def _normalize_agents(cls, value):
+        return [str(agent).strip().lower() for agent in value] if isinstance(value, list) else value
+
+
+class PackedRoutingEntry(RoutingOutput):
+    patient_id: str
+
+
+class NursingStructuredData(BaseModel):
+    model_config = ConfigDict(extra="allow")
+    home_health_referral: Optional[bool] = None
+    visit_frequency: Optional[str] = None
+    care_plan_485_required: Optional[bool] = None
+    wound_care_protocol: Optional[bool] = None
+    vital_signs_monitoring: Optional[bool] = None
+    caregiver_education_needed: Optional[bool] = None
+    first_visit_target: Optional[str] = None
+
+
+class DMEStructuredData(BaseModel):
+    model_config = ConfigDict(extra="allow")
+    equipment_category: Optional[str] = None
+    medical_necessity_documented: Optional[bool] = None
+    insurance_authorization_required: Optional[bool] = None
+    delivery_timeline: Optional[str] = None
+    setup_training_needed: Optional[bool] = None
+    duration_of_need: Optional[str] = None
+    physician_order_required: Optional[bool] = None
+
+
+class PharmacyStructuredData(BaseModel):
+    model_config = ConfigDict(extra="allow")
+    medication_reconciliation_needed: Optional[bool] = None
+    erx_handoff_required: Optional[bool] = None
+    route_transition: Optional[str] = None
+    insurance_coverage_verified: Optional[bool] = None
+    pickup_delivery_arranged: Optional[bool] = None
+    allergy_alerts_documented: Optional[bool] = None
+    duration_confirmed: Optional[bool] = None
+
+
+class StateStructuredData(BaseModel):
+    model_config = ConfigDict(extra="allow")
+    prior_auth_required: Optional[bool] = None
+    medicaid_waiver_eligible: Optional[bool] = None
+    insurance_coverage_verified: Optional[bool] = None
+    state_program_referral_needed: Optional[bool] = None
+    authorization_timeline: Optional[str] = None
+    appeals_process_available: Optional[bool] = None
+
+
+# Field lists given to the LLM, in the per-agent and combined prompts alike
+STRUCTURED_DATA_FIELDS = {
+    AgentType.NURSING: list(NursingStructuredData.model_fields),
+    AgentType.DME: list(DMEStructuredData.model_fields),
+    AgentType.PHARMACY: list(PharmacyStructuredData.model_fields),
+    AgentType.STATE: list(StateStructuredData.model_fields),
+}
+
+
+class AgentOutput(BaseModel):
+    """Common shape of every agent's LLM output (the AgentResponse fields the LLM fills in)."""
+    structured_data: Dict[str, Any]
+    recommendations: List[str]
+    next_steps: List[str]
+    external_referrals: List[str] = []
+
+
+class NursingAgentOutput(AgentOutput):
+    structured_data: NursingStructuredData
+
+
+class DMEAgentOutput(AgentOutput):
+    structured_data: DMEStructuredData
+
+
+class PharmacyAgentOutput(AgentOutput):
+    structured_data: PharmacyStructuredData
+
+
+class StateAgentOutput(AgentOutput):
+    structured_data: StateStructuredData
+
+
+class PackedRoutingOutput(BaseModel):
+    """Packed routing response; entries are validated one by one so a bad entry only re-queues its patient."""
+    decisions: List[PackedRoutingEntry]
+
+
+class CombinedOutput(BaseModel):
+    """Combined-mode response; agent sections are validated one by one so a bad section only affects its agent."""
+    routing: RoutingOutput
+    agents: Dict[str, Any] = {}
+
+
+# ---- Local repair ----
+
+_FENCE_RE = re.compile(r"```(?:json|JSON)?\s*(.*?)(?:```|$)", re.S)
+_LITERAL_RE = re.compile(r"(True|False|None)\b")
+_PY_LITERALS = {"True": "true", "False": "false", "None": "null"}
+_SMART_QUOTES = str.maketrans({"“": '"', "”": '"', "‘": "'", "’": "'"})
+
+
+def _strip_trailing_comma(out: List[str]):
+    """Drop a comma (and whitespace) at the end of the output buffer."""
+    i = len(out) - 1
+    while i >= 0 and out[i].isspace():
+        i -= 1
+    if i >= 0 and out[i] == ",":
+        del out[i:]
+
+
+def repair_json(text: str) -> str:
+    """Best-effort local fix-up of almost-JSON LLM output.
+
+    Keeps only the first top-level object/array, converts Python literals, drops trailing commas and
+    `//` comments, escapes raw newlines inside strings and closes brackets left open by truncation.
+    """
+    text = (text or "").strip().translate(_SMART_QUOTES)
+    fence = _FENCE_RE.search(text)
+    if fence:
+        text = fence.group(1).strip()
+    starts = [i for i in (text.find("{"), text.find("[")) if i != -1]
+    if not starts:
+        return text
+    text = text[min(starts):]
+
+    out: List[str] = []
+    stack: List[str] = []
+    in_string = False
+    escape = False
+    i = 0
+    while i < len(text):
+        ch = text[i]
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+            elif ch == "\n":
+                ch = "\\n"
+            out.append(ch)
+        elif ch == '"':
+            in_string = True
+            out.append(ch)
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+            out.append(ch)
+        elif ch in "}]":
+            _strip_trailing_comma(out)
+            if stack:
+                out.append(stack.pop())
+            if not stack:
+                break  # end of the top-level value; ignore trailing prose
+        elif text.startswith("//", i):
+            newline = text.find("\n", i)
+            i = len(text) if newline == -1 else newline
+            continue
+        else:
+            literal = _LITERAL_RE.match(text, i)
+            if literal and not (out and (out[-1].isalnum() or out[-1] == "_")):
+                out.append(_PY_LITERALS[literal.group(1)])
+                i = literal.end()
+                continue
+            out.append(ch)
+        i += 1
+
+    # Close whatever truncation left open
+    if in_string:
+        out.append('"')
+    _strip_trailing_comma(out)
+    if "".join(out).rstrip().endswith(":"):
+        out.append("null")
+    out.extend(reversed(stack))
+    return "".join(out)
+
+
+def load_json(text: str) -> Tuple[Any, bool]:
+    """Parse LLM output as JSON, repairing locally if needed; returns (data, repaired)."""
+    try:
+        return json.loads(text), False
+    except (TypeError, json.JSONDecodeError):
+        pass
+    try:
+        return json.loads(repair_json(text)), True
+    except json.JSONDecodeError as e:
+        raise StructuredOutputError(f"Response is not valid JSON: {e}")
+
+
+# ---- Provider schemas ----
+
+_OPENAPI_KEYS = {"type", "format", "description", "enum", "items", "properties", "required", "minItems",
+                 "maxItems", "minimum", "maximum", "nullable"}
+
+
+def _to_openapi_subset(schema: Dict[str, Any], defs: Dict[str, Any]) -> Dict[str, Any]:
+    """Inline $refs, fold Optional[X] (anyOf X/null) into nullable X and drop keys outside the OpenAPI subset."""
+    if "$ref" in schema:
+        schema = {**defs[schema["$ref"].rsplit("/", 1)[-1]], **{k: v for k, v in schema.items() if k != "$ref"}}
+    if "anyOf" in schema:
+        options = [option for option in schema["anyOf"] if option.get("type") != "null"]
+        nullable = len(options) < len(schema["anyOf"])
+        schema = {**options[0], **{k: v for k, v in schema.items() if k != "anyOf"}}
+        if nullable:
+            schema["nullable"] = True
+    if "$ref" in schema or "anyOf" in schema:
+        return _to_openapi_subset(schema, defs)
+
+    result = {}
+    for key, value in schema.items():
+        if key not in _OPENAPI_KEYS:
+            continue
+        if key == "properties":
+            value = {name: _to_openapi_subset(prop, defs) for name, prop in value.items()}
+        elif key == "items":
+            value = _to_openapi_subset(value, defs)
+        elif key in ("minItems", "maxItems", "minimum", "maximum") and isinstance(value, float):
+            value = int(value)
+        result[key] = value
+    return result
+
+
+# ---- Compiled parsers ----
+
+class StructuredOutputParser:
+    """Parses and validates one output schema, counting direct, repaired and failed parses."""
+
+    def __init__(self, name: str, model: Type[BaseModel]):
+        self.name = name
+        self.model = model
+        self.adapter = TypeAdapter(model)  # validator compiled once, reused for every response
+        self.json_schema = model.model_json_schema()  # sent to providers that constrain output to a schema
+        self._inline_schema: Optional[Dict[str, Any]] = None
+        self.parsed = 0
+        self.repaired = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+
+    def parse(self, text: str):
+        """Parse response text into the schema model; raises StructuredOutputError."""
+        try:
+            data, repaired = load_json(text)
+        except StructuredOutputError:
+            self._count("failed")
+            raise
+        return self.validate(data, repaired)
+
+    def validate(self, data: Any, repaired: bool = False):
+        """Validate already-decoded data against the schema; raises StructuredOutputError."""
+        try:
+            result = self.adapter.validate_python(data)
+        except ValidationError as e:
+            self._count("failed")
+            raise StructuredOutputError(f"{self.name} output failed validation: {e.error_count()} error(s)") from e
+        self._count("repaired" if repaired else "parsed")
+        return result
+
+    def check(self, text: str) -> bool:
+        """Whether response text parses into the schema (not counted in the parse stats)."""
+        try:
+            self.adapter.validate_python(load_json(text)[0])
+            return True
+        except (StructuredOutputError, ValidationError):
+            return False
+
+    def inline_schema(self) -> Dict[str, Any]:
+        """json_schema with $refs resolved and only the OpenAPI subset Gemini's response_schema accepts."""
+        if self._inline_schema is None:
+            self._inline_schema = _to_openapi_subset(self.json_schema, self.json_schema.get("$defs", {}))
+        return self._inline_schema
+
+    def _count(self, outcome: str):
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.parsed + self.repaired + self.failed
+            return {
+                "parsed": self.parsed,
+                "repaired": self.repaired,
+                "failed": self.failed,
+                "failure_rate": round(self.failed / total, 4) if total else 0.0
+            }
+
+
+ROUTING_PARSER = StructuredOutputParser("routing", RoutingOutput)
+PACKED_ROUTING_PARSER = StructuredOutputParser("packed_routing", PackedRoutingEntry)
+PACKED_ROUTING_RESPONSE_PARSER = StructuredOutputParser("packed_routing_response", PackedRoutingOutput)
+COMBINED_PARSER = StructuredOutputParser("combined", CombinedOutput)
+AGENT_PARSERS = {
+    AgentType.NURSING: StructuredOutputParser("nursing", NursingAgentOutput),
+    AgentType.DME: StructuredOutputParser("dme", DMEAgentOutput),
+    AgentType.PHARMACY: StructuredOutputParser("pharmacy", PharmacyAgentOutput),
+    AgentType.STATE: StructuredOutputParser("state", StateAgentOutput),
+}
+
+
+def parse_agent_output(agent_type: AgentType, text: str) -> Dict[str, Any]:
+    """Parse one agent's LLM output into the plain dict the agent processors work with."""
+    return AGENT_PARSERS[agent_type].parse(text).model_dump(exclude_none=True)
+
+
+def validate_agent_output(agent_type: AgentType, data: Any) -> Dict[str, Any]:
+    """Validate an already-decoded agent section (combined mode) into a plain dict."""
+    return AGENT_PARSERS[agent_type].validate(data).model_dump(exclude_none=True)
+
+
+def parse_packed_routing(text: str) -> List[Any]:
+    """Decode a packed routing response into its list of raw entries ({"decisions": [...]} or a bare array)."""
+    data, _ = load_json(text)
+    if isinstance(data, dict):
+        data = data.get("decisions", [])
+    if not isinstance(data, list):
+        raise StructuredOutputError("Packed routing response has no list of decisions")
+    return data
+
+
+def get_structured_output_stats() -> Dict[str, Any]:
+    """Parse outcome counters for every output schema."""
+    parsers = [ROUTING_PARSER, PACKED_ROUTING_PARSER, COMBINED_PARSER, *AGENT_PARSERS.values()]
+    return {parser.name: parser.get_stats() for parser in parsers}
@@ -0,0 +1,346 @@
+"""
+Request tracing for the discharge pipeline.
+Each /api request gets a trace; nested spans (routing, agents, LLM calls, nurse retrieval and ranking)
+are tracked through a context variable, so agent tasks and executor work started inside a span become
+its children. Finished traces are kept in memory for /api/traces and exported in OTLP/JSON form to a
+local JSONL file and/or an OpenTelemetry collector.
+"""
+
+import asyncio
+import functools
+import json
+import logging
+import os
+import queue
+import random
+import secrets
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "routing-ai-agent-api"
+
+
+class Span:
+    """One timed operation within a trace."""
+
+    def __init__(self, trace: "Trace", name: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.trace = trace
+        self.name = name
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.attributes = dict(attributes)
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def end(self, error: Optional[BaseException] = None):
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+        self.end_ns = time.time_ns()
+        self.trace.add(self)
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 2 if self.parent_id is None else 1,  # SERVER for the request span, INTERNAL otherwise
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or self.start_ns),
+            "attributes": [_otlp_attribute(key, value) for key, value in self.attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1}
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+class Trace:
+    """Finished spans of one request; thread-safe because agent work runs in tasks and worker threads."""
+
+    def __init__(self):
+        self.trace_id = secrets.token_hex(16)
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def add(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """OTLP/JSON ExportTraceServiceRequest body, accepted by OpenTelemetry collectors at /v1/traces."""
+        with self._lock:
+            spans = [span.to_otlp() for span in self.spans]
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [_otlp_attribute("service.name", SERVICE_NAME)]},
+                "scopeSpans": [{"scope": {"name": __name__}, "spans": spans}]
+            }]
+        }
+
+    def summary(self) -> Dict[str, Any]:
+        """Spans as a readable tree-ordered list with offsets from the request start."""
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span.start_ns)
+        if not spans:
+            return {"trace_id": self.trace_id, "spans": []}
+        start_ns = spans[0].start_ns
+        depths: Dict[str, int] = {}
+        rendered = []
+        for span in spans:
+            depths[span.span_id] = depths.get(span.parent_id, -1) + 1
+            rendered.append({
+                "name": span.name,
+                "span_id": span.span_id,
+                "parent_span_id": span.parent_id,
+                "depth": depths[span.span_id],
+                "start_offset_ms": round((span.start_ns - start_ns) / 1e6, 2),
+                "duration_ms": round(span.duration_ms, 2),
+                "attributes": span.attributes,
+                "error": span.error
+            })
+        root = next((span for span in spans if span.parent_id is None), spans[0])
+        return {"trace_id": self.trace_id, "name": root.name, "duration_ms": round(root.duration_ms, 2),
+                "spans": rendered}
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def set_attribute(key: str, value: Any):
+    """Set an attribute on the current span (no-op outside a trace)."""
+    span = _current_span.get()
+    if span is not None:
+        span.set_attribute(key, value)
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Optional[Span]]:
+    """Child span of the current span; a no-op outside a traced request."""
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+    child = Span(parent.trace, name, parent.span_id, attributes)
+    token = _current_span.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.end(e)
+        raise
+    else:
+        child.end()
+    finally:
+        _current_span.reset(token)
+
+
+def traced(name: str) -> Callable:
+    """Decorator running each call of a sync or async function in a span."""
+    def decorator(func: Callable) -> Callable:
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class Tracer:
+    """Starts request traces, keeps recent ones and exports finished traces off the request path."""
+
+    def __init__(self, enabled: bool = True, sample_rate: float = 1.0, export_path: Optional[str] = None,
+                 otlp_endpoint: Optional[str] = None, recent_limit: int = 100):
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.export_path = export_path
+        self.otlp_endpoint = otlp_endpoint
+        self.recent: Deque[Trace] = deque(maxlen=recent_limit)
+        self._lock = threading.Lock()
+        self._export_queue: "queue.Queue[Optional[Trace]]" = queue.Queue()
+        self._export_thread: Optional[threading.Thread] = None
+
+        self.traces_started = 0
+        self.traces_exported = 0
+        self.export_errors = 0
+
+    @classmethod
+    def from_env(cls) -> "Tracer":
+        return cls(
+            enabled=os.getenv("TRACING_ENABLED", "true").lower() == "true",
+            sample_rate=float(os.getenv("TRACE_SAMPLE_RATE", "1.0")),
+            export_path=os.getenv("TRACE_EXPORT_PATH") or None,
+            otlp_endpoint=os.getenv("TRACE_OTLP_ENDPOINT") or None,
+            recent_limit=int(os.getenv("TRACE_RECENT_LIMIT", "100"))
+        )
+
+    @contextmanager
+    def start_trace(self, name: str, **attributes) -> Iterator[Optional[Span]]:
+        """Root span for one request; the finished trace is recorded and exported when the block exits."""
+        if not self.enabled or _current_span.get() is not None or random.random() >= self.sample_rate:
+            yield None
+            return
+        root = Span(Trace(), name, None, attributes)
+        token = _current_span.set(root)
+        with self._lock:
+            self.traces_started += 1
+        try:
+            yield root
+        except BaseException as e:
+            root.end(e)
+            raise
+        else:
+            root.end()
+        finally:
+            _current_span.reset(token)
+            self._finish(root.trace)
+
+    def _finish(self, trace: Trace):
+        with self._lock:
+            self.recent.append(trace)
+        if self.export_path or self.otlp_endpoint:
+            self._ensure_export_thread()
+            self._export_queue.put(trace)
+
+    def _ensure_export_thread(self):
+        with self._lock:
+            if self._export_thread is None or not self._export_thread.is_alive():
+                self._export_thread = threading.Thread(target=self._export_loop, name="trace-exporter", daemon=True)
+                self._export_thread.start()
+
+    def _export_loop(self):
+        client = httpx.Client(timeout=5.0) if self.otlp_endpoint else None
+        try:
+            while True:
+                trace = self._export_queue.get()
+                if trace is None:
+                    return
+                try:
+                    self._export(trace, client)
+                    self.traces_exported += 1
+                except Exception as e:
+                    self.export_errors += 1
+                    logger.warning(f"⚠️ Trace export failed: {e}")
+        finally:
+            if client is not None:
+                client.close()
+
+    def _export(self, trace: Trace, client: Optional[httpx.Client]):
+        body = trace.to_otlp()
+        if self.export_path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.export_path)), exist_ok=True)
+            with open(self.export_path, "a", encoding="utf-8") as export_file:
+                export_file.write(json.dumps(body, separators=(",", ":")) + "\n")
+        if client is not None:
+            client.post(self.otlp_endpoint, json=body).raise_for_status()
+
+    def shutdown(self, timeout: float = 5.0):
+        """Flush queued traces and stop the export thread."""
+        thread = self._export_thread
+        if thread is not None and thread.is_alive():
+            self._export_queue.put(None)
+            thread.join(timeout)
+
+    def recent_traces(self, limit: int = 20, min_duration_ms: float = 0.0) -> List[Dict[str, Any]]:
+        """Most recent finished traces first, optionally only those slower than min_duration_ms."""
+        with self._lock:
+            traces = list(self.recent)
+        summaries = [trace.summary() for trace in reversed(traces)]
+        return [summary for summary in summaries if summary.get("duration_ms", 0) >= min_duration_ms][:limit]
+
+    def get_trace(self, trace_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            trace = next((trace for trace in self.recent if trace.trace_id == trace_id), None)
+        return trace.summary() if trace else None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "export_path": self.export_path,
+            "otlp_endpoint": self.otlp_endpoint,
+            "traces_started": self.traces_started,
+            "traces_exported": self.traces_exported,
+            "export_errors": self.export_errors,
+            "recent_traces": len(self.recent)
+        }
+
+
+class TracingMiddleware:
+    """ASGI middleware tracing every request under a path prefix; the trace id is returned in X-Trace-Id.
+
+    The request span ends only after the response body is sent, so streamed responses are covered.
+    """
+
+    def __init__(self, app, path_prefix: str = "/api/"):
+        self.app = app
+        self.path_prefix = path_prefix
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefix):
+            await self.app(scope, receive, send)
+            return
+
+        with get_tracer().start_trace(f"{scope['method']} {scope['path']}", **{
+            "http.method": scope["method"], "http.target": scope["path"]
+        }) as root:
+            if root is None:
+                await self.app(scope, receive, send)
+                return
+
+            async def send_with_trace_id(message):
+                if message["type"] == "http.response.start":
+                    root.set_attribute("http.status_code", message["status"])
+                    message.setdefault("headers", [])
+                    message["headers"] = list(message["headers"]) + [(b"x-trace-id", root.trace.trace_id.encode())]
+                await send(message)
+
+            await self.app(scope, receive, send_with_trace_id)
+
+
+# Global instance
+tracer = None
+
+def get_tracer() -> Tracer:
+    """Get or create the global tracer."""
+    global tracer
+    if tracer is None:
+        tracer = Tracer.from_env()
+    return tracer
@@ -77,6 +77,7 @@ export interface PatientData {
 export interface RoutingRequest {
   patient_data: PatientData;
   caregiver_input: CaregiverInput;
+  deadline_seconds?: number;
 }
 
 export interface RoutingDecision {
@@ -100,11 +101,28 @@ export interface AgentResponse {
 export interface CompleteCase {
   routing_decision: RoutingDecision;
   agent_responses: AgentResponse[];
+  status?: 'success' | 'partial';
+  timed_out_agents?: string[];
+}
+
+export interface CompleteCaseStreamHandlers {
+  onRoutingDecision?: (decision: RoutingDecision) => void;
+  onAgentResponse?: (response: AgentResponse) => void;
+  onAgentError?: (error: { agent_type: string; message: string }) => void;
+  onAgentTimeout?: (timeout: { agent_type: string; message: string }) => void;
+  onComplete?: (summary: {
+    status: 'success' | 'partial';
+    processed_agents: number;
+    total_recommended: number;
+    timed_out_agents: string[];
+    elapsed_ms: number;
+  }) => void;
+  onError?: (error: { status: string; detail: string }) => void;
 }
 
 export interface AgentProcessingStatus {
   agent_type: string;
-  status: 'pending' | 'processing' | 'completed' | 'error';
+  status: 'pending' | 'processing' | 'completed' | 'error' | 'timeout';
   progress?: number;
   message?: string;
 }
@@ -142,6 +160,50 @@ export const routingAPI = {
   processCompleteCase: (request: RoutingRequest): Promise<CompleteCase> => 
     api.post('/process-complete-case', request).then(res => res.data),
   
+  // Progressive variant: routing decision first, then each agent as it completes
+  streamCompleteCase: async (request: RoutingRequest, handlers: CompleteCaseStreamHandlers): Promise<void> => {
+    const response = await fetch(`${API_BASE_URL}/process-complete-case/stream`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json', Accept: 'text/event-stream' },
+      body: JSON.stringify(request),
+    });
+    if (!response.ok || !response.body) {
+      throw new Error(`Streaming request failed with status ${response.status}`);
+    }
+    
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+      
+      let separator = buffer.indexOf('\n\n');
+      while (separator !== -1) {
+        const rawEvent = buffer.slice(0, separator);
+        buffer = buffer.slice(separator + 2);
+        separator = buffer.indexOf('\n\n');
+        
+        let eventName = 'message';
+        let data = '';
+        rawEvent.split('\n').forEach(line => {
+          if (line.startsWith('event: ')) eventName = line.slice(7);
+          else if (line.startsWith('data: ')) data += line.slice(6);
+        });
+        const payload = data ? JSON.parse(data) : null;
+        
+        if (eventName === 'routing_decision') handlers.onRoutingDecision?.(payload);
+        else if (eventName === 'agent_response') handlers.onAgentResponse?.(payload);
+        else if (eventName === 'agent_error') handlers.onAgentError?.(payload);
+        else if (eventName === 'agent_timeout') handlers.onAgentTimeout?.(payload);
+        else if (eventName === 'complete') handlers.onComplete?.(payload);
+        else if (eventName === 'error') handlers.onError?.(payload);
+      }
+    }
+  },
+  
   // Individual Agent Processing
   processNursingAgent: (request: RoutingRequest): Promise<AgentResponse> => 
     api.post('/process-nursing-agent', request).then(res => res.data),
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-agent vs combined (single-prompt) agent execution.
+
+Runs every loaded patient through both modes against the configured AI provider and reports
+LLM calls, estimated prompt/response tokens and wall-clock latency per mode. The response cache
+is disabled so both modes hit the provider. Nurse ranking calls are the same in both modes and
+are not counted.
+
+Usage:
+    python scripts/benchmark_agent_modes.py [--patients 5] [--urgency medium]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["LLM_CACHE_ENABLED"] = "false"
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from app.ai_service import AIService
+from app.data_service import DataService
+from app.models import CaregiverInput
+
+
+class CallRecorder:
+    """Wraps AIService._call_ai to count calls and estimated tokens (about 4 characters per token)."""
+
+    def __init__(self, ai_service: AIService):
+        self.call_ai = ai_service._call_ai
+        self.reset()
+        ai_service._call_ai = self
+
+    def reset(self):
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.response_tokens = 0
+
+    async def __call__(self, prompt: str, parser=None) -> str:
+        self.calls += 1
+        self.prompt_tokens += len(prompt) // 4
+        response = await self.call_ai(prompt, parser)
+        self.response_tokens += len(response or "") // 4
+        return response
+
+
+async def run_per_agent(ai_service: AIService, patient_data, caregiver_input):
+    routing_decision = await ai_service.route_patient(patient_data, caregiver_input)
+    await asyncio.gather(
+        *(ai_service.process_agent(agent_type, patient_data, caregiver_input)
+          for agent_type in dict.fromkeys(routing_decision.recommended_agents)),
+        return_exceptions=True
+    )
+
+
+async def run_combined(ai_service: AIService, patient_data, caregiver_input):
+    await ai_service.process_case_combined(patient_data, caregiver_input)
+
+
+async def benchmark(patient_count: int, urgency: str):
+    ai_service = AIService()
+    if not ai_service.client:
+        print("❌ No AI provider configured - set GOOGLE_AI_API_KEY, OPENAI_API_KEY or LLM_FAKE_PROVIDER=true")
+        return
+
+    data_service = DataService()
+    patients = data_service.list_patients()[:patient_count]
+    if not patients:
+        print("❌ No patient data loaded")
+        return
+
+    recorder = CallRecorder(ai_service)
+    modes = {"per_agent": run_per_agent, "combined": run_combined}
+    results = {}
+
+    for mode, runner in modes.items():
+        recorder.reset()
+        latencies = []
+        for patient_data in patients:
+            caregiver_input = CaregiverInput(
+                patient_id=patient_data.patient_id,
+                urgency_level=urgency,
+                primary_concern="Discharge coordination"
+            )
+            start = time.perf_counter()
+            await runner(ai_service, patient_data, caregiver_input)
+            latencies.append(time.perf_counter() - start)
+        results[mode] = {
+            "calls": recorder.calls,
+            "prompt_tokens": recorder.prompt_tokens,
+            "response_tokens": recorder.response_tokens,
+            "mean_latency": statistics.mean(latencies),
+            "max_latency": max(latencies)
+        }
+
+    print(f"\n📊 Agent execution modes ({len(patients)} patients, provider: {ai_service.ai_provider})")
+    print("=" * 78)
+    print(f"{'mode':<12}{'LLM calls':>11}{'prompt tok':>12}{'response tok':>14}{'mean s':>10}{'max s':>10}")
+    for mode, stats in results.items():
+        print(f"{mode:<12}{stats['calls']:>11}{stats['prompt_tokens']:>12}{stats['response_tokens']:>14}"
+              f"{stats['mean_latency']:>10.2f}{stats['max_latency']:>10.2f}")
+
+    per_agent, combined = results["per_agent"], results["combined"]
+    if per_agent["prompt_tokens"] and per_agent["mean_latency"]:
+        print(f"\nCombined mode: {1 - combined['prompt_tokens'] / per_agent['prompt_tokens']:.0%} fewer prompt tokens, "
+              f"{1 - combined['mean_latency'] / per_agent['mean_latency']:.0%} lower mean latency")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark per-agent vs combined agent execution")
+    parser.add_argument("--patients", type=int, default=5, help="Number of loaded patients to run")
+    parser.add_argument("--urgency", default="medium", help="Caregiver urgency level")
+    args = parser.parse_args()
+    asyncio.run(benchmark(args.patients, args.urgency))
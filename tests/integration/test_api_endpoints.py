@@ -15,6 +15,30 @@ class TestHealthEndpoint:
         response = client.get("/health")
         assert response.status_code == 200
         assert response.json()["status"] == "healthy"
+        assert "circuit_breakers" in response.json()
+
+class TestMetricsEndpoint:
+    """Test Prometheus metrics endpoint."""
+    
+    def test_metrics_text_format(self):
+        """Test /metrics serves the Prometheus text format."""
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert response.text.endswith("\n")
+        assert client.get("/api/metrics/stats").status_code == 200
+
+class TestTracing:
+    """Test request tracing endpoints."""
+    
+    def test_trace_id_header(self):
+        """Test /api requests return a trace id that can be looked up."""
+        response = client.get("/api/patients")
+        trace_id = response.headers["x-trace-id"]
+        trace = client.get(f"/api/traces/{trace_id}").json()
+        assert trace["name"] == "GET /api/patients"
+        assert trace["spans"][0]["attributes"]["http.status_code"] == response.status_code
+        assert client.get("/api/traces/unknown").status_code == 404
 
 class TestPatientDataEndpoints:
     """Test patient data management endpoints."""
@@ -267,3 +291,190 @@ class TestErrorHandling:
         """Test sending request without body to endpoints that require it."""
         response = client.post("/route-patient")
         assert response.status_code == 422
+
+class TestCompleteCaseStreaming:
+    """Test the server-sent-events complete case endpoint."""
+    
+    @pytest.fixture
+    def comprehensive_request_data(self):
+        """Fixture using the first patient loaded from the data directory."""
+        patients = client.get("/api/patients").json()["patients"]
+        if not patients:
+            pytest.skip("No patient data loaded")
+        patient_id = patients[0]["patient_id"]
+        return {
+            "patient_data": {
+                "patient_id": patient_id,
+                "name": patients[0]["name"],
+                "gender": "Unknown",
+                "primary_icu_diagnosis": patients[0]["primary_diagnosis"]
+            },
+            "caregiver_input": {
+                "patient_id": patient_id,
+                "urgency_level": "medium",
+                "primary_concern": "Needs equipment and medication before discharge"
+            }
+        }
+    
+    def test_stream_emits_routing_then_agents(self, comprehensive_request_data):
+        """Routing decision comes first and the stream ends with a summary."""
+        response = client.post("/api/process-complete-case/stream", json=comprehensive_request_data)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        
+        events = [
+            line[len("event: "):]
+            for line in response.text.splitlines()
+            if line.startswith("event: ")
+        ]
+        assert events[0] == "routing_decision"
+        assert events[-1] == "complete"
+        assert all(event in ("agent_response", "agent_error") for event in events[1:-1])
+    
+    @pytest.fixture
+    def slow_provider(self, monkeypatch):
+        """Provider slower than the request deadline used below; no cache so every call reaches it."""
+        from app import circuit_breaker, main
+        from app.fake_llm import FakeGenerativeModel, FakeLLMBehaviour
+        monkeypatch.setenv("LLM_CACHE_ENABLED", "false")
+        monkeypatch.setattr(circuit_breaker, "circuit_breakers", {})
+        monkeypatch.setattr(main.ai_service, "client",
+                            FakeGenerativeModel(behaviour=FakeLLMBehaviour(latency_seconds=1.0, distribution="fixed")))
+        monkeypatch.setattr(main.ai_service, "ai_provider", "fake")
+    
+    def test_deadline_shorter_than_provider_reports_timeouts(self, comprehensive_request_data, slow_provider):
+        """Agents cut off by the deadline are reported as timeouts, not as completed fallback content."""
+        comprehensive_request_data["deadline_seconds"] = 0.3
+        response = client.post("/api/process-complete-case?speculative=false&combined=false",
+                               json=comprehensive_request_data)
+        assert response.status_code == 200
+        
+        result = response.json()
+        assert result["status"] == "partial"
+        assert {status["status"] for status in result["agent_status"]} == {"timeout"}
+        assert result["timed_out_agents"] == result["routing_decision"]["recommended_agents"]
+        
+        response = client.post("/api/process-complete-case/stream?speculative=false&combined=false",
+                               json=comprehensive_request_data)
+        events = [line[len("event: "):] for line in response.text.splitlines() if line.startswith("event: ")]
+        assert events[0] == "routing_decision" and events[-1] == "complete"
+        assert set(events[1:-1]) == {"agent_timeout"}
+    
+    def test_stream_unknown_patient(self, comprehensive_request_data):
+        """Unknown patients are rejected before the stream starts."""
+        comprehensive_request_data["patient_data"]["patient_id"] = "NONEXISTENT"
+        response = client.post("/api/process-complete-case/stream", json=comprehensive_request_data)
+        assert response.status_code == 404
+
+class TestBatchRouting:
+    """Test batch routing over the loaded census."""
+    
+    def test_route_all_loaded(self):
+        """Every loaded patient gets a result and the summary adds up."""
+        total = client.get("/api/patients").json()["total"]
+        if not total:
+            pytest.skip("No patient data loaded")
+        
+        response = client.post("/api/route-batch", json={"all_loaded": True, "include_agents": False})
+        assert response.status_code == 200
+        
+        result = response.json()
+        assert len(result["results"]) == total
+        assert result["summary"]["total_patients"] == total
+        assert result["summary"]["succeeded"] == total
+        assert all("routing_decision" in item for item in result["results"])
+    
+    def test_packed_routing_covers_every_patient(self):
+        """Packed routing returns one decision per patient, including unknown IDs."""
+        patients = client.get("/api/patients").json()["patients"]
+        if not patients:
+            pytest.skip("No patient data loaded")
+        
+        patient_ids = [patient["patient_id"] for patient in patients] + ["NONEXISTENT"]
+        response = client.post("/api/route-batch", json={
+            "patient_ids": patient_ids, "include_agents": False, "pack_size": 3
+        })
+        assert response.status_code == 200
+        
+        results = {item["patient_id"]: item for item in response.json()["results"]}
+        assert results["NONEXISTENT"]["status"] == "not_found"
+        assert all(results[patient["patient_id"]]["routing_decision"]["patient_id"] == patient["patient_id"]
+                   for patient in patients)
+    
+    def test_packed_stream_reports_every_patient(self):
+        """The streaming batch emits one result per patient when routing is packed."""
+        patients = client.get("/api/patients").json()["patients"]
+        if not patients:
+            pytest.skip("No patient data loaded")
+        
+        patient_ids = [patient["patient_id"] for patient in patients] + ["NONEXISTENT"]
+        response = client.post("/api/route-batch/stream", json={
+            "patient_ids": patient_ids, "include_agents": False, "pack_size": 3, "max_concurrency": 2
+        })
+        assert response.status_code == 200
+        
+        events = [line[len("event: "):] for line in response.text.splitlines() if line.startswith("event: ")]
+        assert events.count("patient_result") == len(patient_ids)
+        assert events[-1] == "complete"
+    
+    def test_failed_pack_is_reported_and_rerouted(self, monkeypatch):
+        """A pack that fails emits pack_error; its patients are routed individually and the stream completes."""
+        from app import main
+        patients = client.get("/api/patients").json()["patients"]
+        if len(patients) < 2:
+            pytest.skip("Need at least two loaded patients")
+        
+        async def failing_pack(pack, semaphore=None):
+            raise RuntimeError("pack exploded")
+        monkeypatch.setattr(main.ai_service, "_route_pack", failing_pack)
+        
+        patient_ids = [patient["patient_id"] for patient in patients]
+        response = client.post("/api/route-batch/stream", json={
+            "patient_ids": patient_ids, "include_agents": False, "pack_size": 2
+        })
+        events = [line[len("event: "):] for line in response.text.splitlines() if line.startswith("event: ")]
+        assert events[0] == "pack_error"
+        assert events.count("patient_result") == len(patient_ids)
+        assert events[-1] == "complete"
+    
+    def test_disconnect_closes_the_pack_iterator(self, monkeypatch):
+        """Closing the stream while a pack is still routing finalizes the packed-routing generator."""
+        import asyncio
+        from app import main
+        from app.models import BatchRoutingRequest
+        patients = client.get("/api/patients").json()["patients"]
+        if len(patients) < 2:
+            pytest.skip("Need at least two loaded patients")
+        closed = []
+        
+        async def iter_packed_routing(cases, pack_size, semaphore=None):
+            try:
+                yield {cases[0][0].patient_id: await main.ai_service.route_patient(*cases[0])}
+                await asyncio.sleep(60)
+            finally:
+                closed.append(True)
+        monkeypatch.setattr(main.ai_service, "iter_packed_routing", iter_packed_routing)
+        
+        async def read_one_event_then_disconnect():
+            request = BatchRoutingRequest(patient_ids=[patient["patient_id"] for patient in patients],
+                                          include_agents=False, pack_size=2)
+            stream = (await main.route_batch_stream(request)).body_iterator
+            first = await stream.__anext__()
+            await stream.aclose()
+            # Checked before asyncio.run finalizes leftover generators itself
+            return first, list(closed)
+        
+        first, closed_on_disconnect = asyncio.run(read_one_event_then_disconnect())
+        assert first.startswith("event: patient_result")
+        assert closed_on_disconnect == [True]
+    
+    def test_unknown_patient_reported_not_failed(self):
+        """Unknown IDs are reported per patient instead of failing the batch."""
+        response = client.post("/api/route-batch", json={"patient_ids": ["NONEXISTENT"], "include_agents": False})
+        assert response.status_code == 200
+        assert response.json()["results"][0]["status"] == "not_found"
+    
+    def test_empty_batch_rejected(self):
+        """A batch with no patients is a client error."""
+        response = client.post("/api/route-batch", json={})
+        assert response.status_code == 400
@@ -0,0 +1,78 @@
+import time
+from app.circuit_breaker import CircuitBreaker, CLOSED, OPEN, HALF_OPEN
+
+
+def make_breaker(**overrides):
+    settings = dict(failure_threshold=3, slow_call_seconds=1.0, cool_down_seconds=0.05,
+                    half_open_max_calls=1, success_threshold=2)
+    settings.update(overrides)
+    return CircuitBreaker("test", **settings)
+
+
+class TestCircuitBreaker:
+    """Test breaker state transitions."""
+
+    def test_opens_after_consecutive_failures(self):
+        breaker = make_breaker()
+        for _ in range(3):
+            assert breaker.allow_request()
+            breaker.record_failure()
+
+        assert breaker.state == OPEN
+        assert not breaker.allow_request()
+        assert breaker.get_stats()["rejected_calls"] == 1
+
+    def test_success_resets_failure_count(self):
+        breaker = make_breaker()
+        breaker.record_failure()
+        breaker.record_failure()
+        breaker.record_success(0.1)
+        breaker.record_failure()
+
+        assert breaker.state == CLOSED
+
+    def test_slow_calls_count_as_failures(self):
+        breaker = make_breaker()
+        for _ in range(3):
+            breaker.record_success(5.0)
+
+        assert breaker.state == OPEN
+        assert breaker.get_stats()["slow_calls"] == 3
+
+    def test_half_open_lets_trickle_through_then_closes(self):
+        breaker = make_breaker(failure_threshold=1)
+        breaker.record_failure()
+        time.sleep(0.06)
+
+        assert breaker.allow_request()
+        assert breaker.state == HALF_OPEN
+        assert not breaker.allow_request()  # only one probe at a time
+
+        breaker.record_success(0.1)
+        assert breaker.allow_request()
+        breaker.record_success(0.1)
+        assert breaker.state == CLOSED
+
+    def test_failed_probe_reopens(self):
+        breaker = make_breaker(failure_threshold=1)
+        breaker.record_failure()
+        time.sleep(0.06)
+
+        assert breaker.allow_request()
+        breaker.record_failure()
+        assert breaker.state == OPEN
+        assert breaker.get_stats()["times_opened"] == 2
+
+    def test_cancelled_probe_frees_slot(self):
+        breaker = make_breaker(failure_threshold=1)
+        breaker.record_failure()
+        time.sleep(0.06)
+
+        assert breaker.allow_request()
+        breaker.record_cancelled()
+        assert breaker.allow_request()
+
+    def test_disabled_always_allows(self):
+        breaker = make_breaker(failure_threshold=1, enabled=False)
+        breaker.record_failure()
+        assert breaker.allow_request()
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pytest
+from app.data_service import (
+    DataService, frame_to_patient_records, iter_patient_chunks, read_patient_workbook, records_to_patients
+)
+
+
+@pytest.fixture
+def legacy_service():
+    return DataService.__new__(DataService)
+
+
+class TestColumnarIngestion:
+    """Test that columnar conversion matches the row-at-a-time path."""
+
+    def test_alias_fallback_and_type_coercion(self, legacy_service):
+        df = pd.DataFrame({
+            "Patient ID": ["A1", "A2", "A3", np.nan],
+            "ID": ["x", "y", "z", "B4"],
+            "Name": ["n1", "", np.nan, "n4"],
+            "Patient Name": ["p1", "p2", "p3", "p4"],
+            "Sex": ["F", "M", "F", "M"],
+            "Diagnosis": ["d", 5, 2.5, "d4"],
+            "Notes": pd.to_datetime(["2024-01-01", None, "2024-03-04", "2024-05-06"]),
+            "Length of Stay": ["12", 3.7, "abc", np.nan],
+            "ICU Admission Date": ["2024-01-02", pd.Timestamp("2024-02-03"), np.nan, ""],
+            "Follow-up Appointment Date": pd.to_datetime(["2024-01-01", None, "2024-03-04", "2024-05-06"]),
+        })
+
+        legacy = [legacy_service._row_to_comprehensive_patient_data(row) for _, row in df.iterrows()]
+        columnar = records_to_patients(frame_to_patient_records(df))
+
+        assert columnar == legacy
+        assert [patient.patient_id for patient in columnar] == ["A1", "A2", "A3", "B4"]
+        assert [patient.name for patient in columnar] == ["n1", "p2", "p3", "n4"]
+        assert [patient.length_of_stay_days for patient in columnar] == [12, 3, None, None]
+
+    def test_invalid_rows_are_skipped(self):
+        records = frame_to_patient_records(pd.DataFrame({"PatientID": ["P1", "P2"], "Gender": ["Female", np.nan]}))
+        records[1]["gender"] = None
+        assert [patient.patient_id for patient in records_to_patients(records)] == ["P1"]
+
+
+class TestStreamingIngestion:
+    """Test chunked read-only ingestion of large workbooks."""
+
+    @pytest.fixture
+    def workbook(self, tmp_path):
+        path = tmp_path / "census.xlsx"
+        pd.DataFrame({
+            "PatientID": [f"P{i}" for i in range(7)],
+            "Name": [f"Patient {i}" for i in range(7)],
+            "Gender": ["Female", "Male"] * 3 + ["Female"],
+            "Age": [70, 65.0, None, "abc", 80, 81, 82],
+            "Prescriber Contact": ["0123", "555", None, "0456", "1", "2", "3"],
+            "ICU Admission Date": pd.to_datetime(["2024-01-02"] * 6 + [None]),
+        }).to_excel(path, index=False)
+        return str(path)
+
+    def test_chunks_match_full_read(self, workbook):
+        chunks = list(iter_patient_chunks(workbook, chunk_rows=3))
+
+        assert [rows_read for rows_read, _ in chunks] == [3, 6, 7]
+        streamed = [patient for _, chunk in chunks for patient in chunk]
+        full = records_to_patients(frame_to_patient_records(read_patient_workbook(workbook)))
+        # Both paths keep an all-digit text column as typed
+        assert [patient.model_dump() for patient in streamed] == [patient.model_dump() for patient in full]
+        assert [patient.prescriber_contact for patient in full][:2] == ["0123", "555"]
+
+    def test_large_files_are_streamed(self, workbook, monkeypatch):
+        monkeypatch.setenv("PATIENT_SNAPSHOT_ENABLED", "false")
+        monkeypatch.setenv("PATIENT_STREAM_THRESHOLD_MB", "0")
+        monkeypatch.setenv("PATIENT_STREAM_CHUNK_ROWS", "2")
+        monkeypatch.setattr(DataService, "_auto_load_data", lambda self: None)
+        monkeypatch.setattr(pd, "read_excel", lambda *args, **kwargs: pytest.fail("workbook read whole"))
+        service = DataService()
+
+        assert len(service._load_excel_file(workbook)) == 7
+        assert service.load_progress["mode"] == "stream"
+        assert service.load_progress["status"] == "loaded"
+        assert service.load_progress["rows_read"] == 7 and service.load_progress["patients_loaded"] == 7
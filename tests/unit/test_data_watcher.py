@@ -0,0 +1,94 @@
+import os
+import pandas as pd
+import pytest
+from app.data_service import DataService
+from app.data_watcher import DataDirectoryWatcher
+
+
+def write_census(path, rows, mtime_offset=0):
+    pd.DataFrame(rows, columns=["PatientID", "Name", "Gender"]).to_excel(path, index=False)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + mtime_offset * 1_000_000_000))
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.setenv("PATIENT_SNAPSHOT_ENABLED", "false")
+    monkeypatch.setattr(DataService, "_auto_load_data", lambda self: None)
+    service = DataService()
+    service.set_data_directory(str(tmp_path))
+    return service
+
+
+class TestPatientDelta:
+    """Test delta application by patient_id and row fingerprint."""
+
+    def test_inserts_updates_deletes(self, service, tmp_path):
+        write_census(tmp_path / "census.xlsx", [["P1", "Ann", "Female"], ["P2", "Bob", "Male"], ["P3", "Cy", "Male"]])
+        assert service.load_latest_file()["inserted"] == 3
+        unchanged = service.get_patient("P1")
+
+        write_census(tmp_path / "census.xlsx", [["P1", "Ann", "Female"], ["P2", "Robert", "Male"], ["P4", "Di", "Female"]], 1)
+        delta = service.load_latest_file()
+
+        assert {key: delta[key] for key in ("inserted", "updated", "deleted", "unchanged")} == \
+            {"inserted": 1, "updated": 1, "deleted": 1, "unchanged": 1}
+        assert sorted(service.patient_cache) == ["P1", "P2", "P4"]
+        assert service.get_patient("P1") is unchanged
+        assert service.get_patient("P2").name == "Robert"
+
+    def test_delta_swaps_in_a_new_mapping(self, service, tmp_path):
+        write_census(tmp_path / "census.xlsx", [["P1", "Ann", "Female"], ["P2", "Bob", "Male"]])
+        service.load_latest_file()
+        before = service.patient_cache
+        listed = list(before.values())
+
+        write_census(tmp_path / "census.xlsx", [["P1", "Ann", "Female"], ["P3", "Cy", "Male"]], 1)
+        service.load_latest_file()
+
+        # A reader holding the old mapping keeps a consistent view; new readers see the whole delta
+        assert service.patient_cache is not before
+        assert sorted(before) == ["P1", "P2"] and list(before.values()) == listed
+        assert sorted(service.patient_cache) == ["P1", "P3"]
+
+
+class TestDataDirectoryWatcher:
+    """Test change detection and settling."""
+
+    def test_reloads_once_change_settles(self, service, tmp_path):
+        write_census(tmp_path / "census.xlsx", [["P1", "Ann", "Female"]])
+        service.load_latest_file()
+        watcher = DataDirectoryWatcher(service)
+        assert watcher.poll_once() is None
+
+        write_census(tmp_path / "census_2.xlsx", [["P1", "Ann", "Female"], ["P2", "Bob", "Male"]], 5)
+        write_census(tmp_path / "~$census_2.xlsx", [], 10)  # Excel lock file, ignored
+        assert watcher.poll_once() is None  # first sighting: wait for the copy to finish
+        delta = watcher.poll_once()
+
+        assert delta["source"] == "census_2.xlsx" and delta["inserted"] == 1 and delta["unchanged"] == 1
+        assert watcher.poll_once() is None
+        assert watcher.get_stats()["reloads"] == 1 and watcher.get_stats()["delta_totals"]["inserted"] == 1
+
+
+class TestMergedLoad:
+    """Test loading every workbook with newest-file-wins merging."""
+
+    def test_newest_file_wins_per_patient(self, service, tmp_path, monkeypatch):
+        write_census(tmp_path / "icu.xlsx", [["P1", "Ann", "Female"], ["P2", "Bob", "Male"]])
+        write_census(tmp_path / "cardiac.xlsx", [["P2", "Robert", "Male"], ["P3", "Cy", "Male"]], 5)
+        (tmp_path / "broken.xlsx").write_bytes(b"not a workbook")
+        os.utime(tmp_path / "broken.xlsx", (os.stat(tmp_path / "cardiac.xlsx").st_mtime + 5,) * 2)
+        service.load_mode = "merged"
+        service.parse_workers = 2
+
+        delta = service.reload_data_directory()
+
+        assert sorted(service.patient_cache) == ["P1", "P2", "P3"]
+        assert service.get_patient("P2").name == "Robert"
+        assert delta["inserted"] == 3
+        stats = {stat["filename"]: stat for stat in service.file_stats}
+        assert list(stats) == ["icu.xlsx", "cardiac.xlsx", "broken.xlsx"]
+        assert stats["icu.xlsx"]["rows"] == 2 and stats["icu.xlsx"]["source"] == "parsed"
+        assert "parse_seconds" in stats["cardiac.xlsx"]
+        assert stats["broken.xlsx"]["source"] == "failed"
@@ -0,0 +1,45 @@
+import asyncio
+import pytest
+from app import deadline
+from app.llm_executor import run_blocking
+
+
+class TestRequestDeadline:
+    """Test deadline propagation helpers."""
+
+    def test_no_deadline_by_default(self):
+        assert deadline.remaining() is None
+        assert deadline.effective_timeout(30) == 30
+
+    def test_nested_deadline_only_tightens(self):
+        with deadline.request_deadline(10):
+            with deadline.request_deadline(60):
+                assert deadline.remaining() <= 10
+            with deadline.request_deadline(1):
+                assert deadline.remaining() <= 1
+        assert deadline.remaining() is None
+
+    def test_wait_for_raises_when_deadline_passes(self):
+        async def slow():
+            await asyncio.sleep(1)
+
+        async def run():
+            with deadline.request_deadline(0.05):
+                await deadline.wait_for(slow())
+
+        with pytest.raises(deadline.DeadlineExceeded):
+            asyncio.run(run())
+
+    def test_deadline_reaches_tasks_and_worker_threads(self):
+        async def remaining_in_task():
+            return deadline.remaining()
+
+        async def run():
+            with deadline.request_deadline(5):
+                in_task = await asyncio.ensure_future(remaining_in_task())
+                in_thread = await run_blocking(deadline.remaining)
+            return in_task, in_thread
+
+        in_task, in_thread = asyncio.run(run())
+        assert 0 < in_task <= 5
+        assert 0 < in_thread <= 5
@@ -0,0 +1,130 @@
+import asyncio
+import pytest
+from app import circuit_breaker
+from app.ai_service import AIService
+from app.fake_llm import (
+    FakeAsyncOpenAI, FakeGenerativeModel, FakeLLMBehaviour, FakeProviderError, FakeRateLimitError, fake_response
+)
+from app.models import AgentType, CaregiverInput, ComprehensivePatientData
+from app.rate_limiter import is_rate_limit_error
+from app.structured_output import (
+    COMBINED_PARSER, ROUTING_PARSER, parse_agent_output, parse_packed_routing, PACKED_ROUTING_PARSER
+)
+
+
+@pytest.fixture
+def fake_service(monkeypatch):
+    """AIService backed by the fake provider with no latency."""
+    monkeypatch.setenv("LLM_FAKE_PROVIDER", "true")
+    monkeypatch.setenv("LLM_CACHE_ENABLED", "false")
+    monkeypatch.setattr(circuit_breaker, "circuit_breakers", {})
+    service = AIService()
+    service.client = FakeGenerativeModel(behaviour=FakeLLMBehaviour(latency_seconds=0))
+    return service
+
+
+@pytest.fixture
+def patient():
+    return ComprehensivePatientData(
+        patient_id="P001",
+        name="Test Patient",
+        gender="Female",
+        primary_icu_diagnosis="COPD Exacerbation",
+        skilled_nursing_needed="Yes",
+        equipment_needed="Oxygen concentrator",
+        insurance_coverage_status="Active"
+    )
+
+
+@pytest.fixture
+def caregiver_input():
+    return CaregiverInput(patient_id="P001", urgency_level="medium", primary_concern="Home oxygen setup")
+
+
+class TestFakeResponses:
+    """Test that fake responses satisfy the output schemas."""
+
+    def test_routing_prompt(self, fake_service, patient, caregiver_input):
+        decision = asyncio.run(fake_service.route_patient(patient, caregiver_input))
+
+        assert fake_service.ai_provider == "fake"
+        assert decision.recommended_agents == [AgentType.NURSING, AgentType.DME]
+        assert "patient goes home" in decision.reasoning  # came from the fake, not rule-based fallback
+
+    def test_agent_prompts(self, fake_service, patient, caregiver_input):
+        prompts = {}
+
+        async def capture(prompt, parser=None):
+            prompts[len(prompts)] = prompt
+            raise RuntimeError("captured")
+
+        fake_service._call_ai = capture
+        patient = patient.model_copy(update={"medication": "Prednisone", "route": "Oral"})
+        for agent_type in (AgentType.DME, AgentType.PHARMACY, AgentType.STATE):
+            asyncio.run(fake_service.process_agent(agent_type, patient, caregiver_input))
+            assert parse_agent_output(agent_type, fake_response(prompts[len(prompts) - 1]))
+
+    def test_combined_and_packed_prompts(self, fake_service, patient, caregiver_input):
+        combined = COMBINED_PARSER.parse(fake_response(fake_service._build_combined_prompt(patient, caregiver_input)))
+        assert set(combined.agents) == {agent.value for agent in combined.routing.recommended_agents}
+
+        second = patient.model_copy(update={"patient_id": "P002"})
+        prompt = fake_service._build_packed_routing_prompt([(patient, caregiver_input), (second, caregiver_input)])
+        entries = parse_packed_routing(fake_response(prompt))
+        assert [PACKED_ROUTING_PARSER.validate(entry).patient_id for entry in entries] == ["P001", "P002"]
+
+    def test_nurse_ranking_prompt(self):
+        prompt = "AVAILABLE NURSES:\nNURSE 1: A (ID: N001)\nNURSE 2: B (ID: N002)\nRank the top 1 nurses"
+        response = fake_response(prompt)
+        assert '"nurse_id": "N00' in response
+        assert response.count("nurse_id") == 1
+
+    def test_deterministic(self):
+        prompt = 'Respond with "recommended_agents" - Skilled Nursing Required: Yes'
+        assert fake_response(prompt) == fake_response(prompt)
+        assert ROUTING_PARSER.parse(fake_response(prompt))
+
+
+class TestFakeBehaviour:
+    """Test latency and failure injection."""
+
+    def test_injected_errors_and_429s(self):
+        behaviour = FakeLLMBehaviour(latency_seconds=0, error_rate=0.3, rate_limit_rate=0.2, seed=1)
+        outcomes = []
+        for _ in range(200):
+            try:
+                behaviour.next_call()
+                outcomes.append("ok")
+            except FakeRateLimitError as e:
+                assert is_rate_limit_error(e)
+                outcomes.append("429")
+            except FakeProviderError:
+                outcomes.append("error")
+
+        assert 20 < outcomes.count("429") < 60
+        assert 40 < outcomes.count("error") < 90
+        assert behaviour.get_stats()["calls"] == 200
+
+    def test_latency_distributions(self):
+        for distribution in ("fixed", "uniform", "lognormal"):
+            behaviour = FakeLLMBehaviour(latency_seconds=0.2, latency_jitter=0.5, distribution=distribution)
+            samples = [behaviour.next_call() for _ in range(200)]
+            assert all(sample >= 0 for sample in samples)
+            assert 0.1 < sum(samples) / len(samples) < 0.4
+
+    def test_blocking_call_honours_request_deadline(self):
+        from app import deadline
+        from app.llm_clients import generate_blocking
+        model = FakeGenerativeModel(behaviour=FakeLLMBehaviour(latency_seconds=5, distribution="fixed"))
+        with deadline.request_deadline(0.05):
+            timeout = deadline.effective_timeout(deadline.DEFAULT_LLM_CALL_TIMEOUT)
+            with pytest.raises(TimeoutError):
+                generate_blocking(model, 'JSON with "recommended_agents"', timeout)
+        assert timeout <= 0.05
+
+    def test_openai_interface(self):
+        client = FakeAsyncOpenAI(behaviour=FakeLLMBehaviour(latency_seconds=0))
+        response = asyncio.run(client.chat.completions.create(
+            model="gpt-3.5-turbo", messages=[{"role": "user", "content": 'JSON with "recommended_agents"'}]
+        ))
+        assert ROUTING_PARSER.parse(response.choices[0].message.content)
@@ -0,0 +1,117 @@
+import asyncio
+from app.hedging import HedgingPolicy, LatencyHistogram
+from app.rate_limiter import ProviderRateLimiter
+
+
+def delayed(result, delay, calls=None, error=None):
+    async def call():
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            if calls is not None:
+                calls.append("cancelled")
+            raise
+        if error:
+            raise error
+        return result
+    return call
+
+
+class TestLatencyHistogram:
+    """Test percentile estimates."""
+
+    def test_percentiles(self):
+        histogram = LatencyHistogram()
+        for _ in range(90):
+            histogram.record(0.3)
+        for _ in range(10):
+            histogram.record(8.0)
+
+        assert histogram.percentile(50) == 0.5
+        assert histogram.percentile(95) == 10.0
+        assert histogram.summary()["count"] == 100
+
+
+class TestHedgingPolicy:
+    """Test hedged request races."""
+
+    def test_fast_primary_never_hedges(self):
+        policy = HedgingPolicy(enabled=True, default_delay=0.2)
+        result = asyncio.run(policy.race(
+            ("google", delayed('{"from": "primary"}', 0.01)),
+            ("openai", delayed('{"from": "backup"}', 0.01)),
+            lambda text: text.startswith("{")
+        ))
+
+        assert result == '{"from": "primary"}'
+        assert policy.hedges_fired == 0
+
+    def test_slow_primary_loses_to_backup_and_is_cancelled(self):
+        policy = HedgingPolicy(enabled=True, default_delay=0.05)
+        calls = []
+        result = asyncio.run(policy.race(
+            ("google", delayed('{"from": "primary"}', 1.0, calls)),
+            ("openai", delayed('{"from": "backup"}', 0.01)),
+            lambda text: text.startswith("{")
+        ))
+
+        assert result == '{"from": "backup"}'
+        assert policy.hedges_fired == 1
+        assert policy.backup_wins == 1
+        assert calls == ["cancelled"]
+
+    def test_primary_error_fails_over_immediately(self):
+        policy = HedgingPolicy(enabled=True, default_delay=5.0)
+
+        async def run():
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            result = await policy.race(
+                ("google", delayed(None, 0.01, error=RuntimeError("boom"))),
+                ("openai", delayed('{"from": "backup"}', 0.01)),
+                lambda text: text.startswith("{")
+            )
+            return result, loop.time() - start
+
+        result, elapsed = asyncio.run(run())
+        assert result == '{"from": "backup"}'
+        assert policy.failovers == 1
+        assert elapsed < 1.0
+
+    def test_hedge_delay_uses_percentile_once_warm(self):
+        policy = HedgingPolicy(percentile=95, default_delay=5.0, min_samples=10)
+        assert policy.hedge_delay("google") == 5.0
+
+        for _ in range(20):
+            policy.record("google", 1.2)
+        assert policy.hedge_delay("google") == 1.5
+
+    def test_choose_backup(self):
+        policy = HedgingPolicy(backup_provider="alternate")
+        assert policy.choose_backup("google", ["google", "openai"]) == "openai"
+        assert policy.choose_backup("google", ["google"]) == "google"
+
+    def test_cancelled_loser_returns_its_limiter_slot(self):
+        policy = HedgingPolicy(enabled=True, default_delay=0.02)
+        limiters = {"google": ProviderRateLimiter("google", max_concurrency=8),
+                    "openai": ProviderRateLimiter("openai", max_concurrency=8)}
+
+        def limited(provider, result, delay):
+            return lambda: limiters[provider].run(delayed(result, delay), estimated_tokens=10)
+
+        async def run():
+            results = []
+            for _ in range(10):
+                results.append(await policy.race(
+                    ("google", limited("google", '{"from": "primary"}', 1.0)),
+                    ("openai", limited("openai", '{"from": "backup"}', 0.01)),
+                    lambda text: text.startswith("{")
+                ))
+            await asyncio.sleep(0)  # let the cancelled primaries unwind
+            return results
+
+        assert asyncio.run(run()) == ['{"from": "backup"}'] * 10
+        assert policy.hedges_fired == 10
+        assert limiters["google"].get_stats()["in_flight"] == 0
+        assert limiters["openai"].get_stats()["in_flight"] == 0
+        assert limiters["google"].get_stats()["concurrency_limit"] == 8
@@ -0,0 +1,74 @@
+import time
+from app.llm_cache import LLMResponseCache, make_cache_key
+
+
+class TestCacheKey:
+    """Test cache key derivation."""
+
+    def test_key_depends_on_model_and_version(self):
+        base = make_cache_key("prompt", "gemini-1.5-flash", "v1")
+
+        assert base == make_cache_key("prompt", "gemini-1.5-flash", "v1")
+        assert base != make_cache_key("prompt", "gpt-3.5-turbo", "v1")
+        assert base != make_cache_key("prompt", "gemini-1.5-flash", "v2")
+        assert base != make_cache_key("other prompt", "gemini-1.5-flash", "v1")
+
+
+class TestLLMResponseCache:
+    """Test the memory + SQLite response cache."""
+
+    def test_memory_hit_and_miss_counters(self):
+        cache = LLMResponseCache()
+
+        assert cache.get("k") is None
+        cache.set("k", "response")
+        assert cache.get("k") == "response"
+
+        stats = cache.get_stats()
+        assert stats["misses"] == 1
+        assert stats["memory_hits"] == 1
+
+    def test_disk_tier_survives_new_instance(self, tmp_path):
+        db_path = str(tmp_path / "cache.sqlite3")
+        writer = LLMResponseCache(db_path=db_path)
+        writer.set("k", "response")
+        writer.close()
+
+        cache = LLMResponseCache(db_path=db_path)
+        assert cache.get("k") == "response"
+        assert cache.get_stats()["disk_hits"] == 1
+        # Promoted to memory on the disk hit
+        assert cache.get("k") == "response"
+        assert cache.get_stats()["memory_hits"] == 1
+
+    def test_ttl_expiry(self, tmp_path):
+        cache = LLMResponseCache(db_path=str(tmp_path / "cache.sqlite3"), ttl_seconds=0.05)
+        cache.set("k", "response")
+        time.sleep(0.1)
+
+        assert cache.get("k") is None
+        cache.flush()
+        assert cache.get_stats()["disk_entries"] == 0
+
+    def test_size_bounded_eviction(self, tmp_path):
+        cache = LLMResponseCache(db_path=str(tmp_path / "cache.sqlite3"),
+                                 max_memory_entries=2, max_disk_entries=3)
+        for i in range(5):
+            cache.set(f"k{i}", f"response {i}")
+        cache.flush()
+
+        stats = cache.get_stats()
+        assert stats["memory_entries"] == 2
+        assert stats["disk_entries"] == 3
+        assert cache.get("k0") is None
+        assert cache.get("k4") == "response 4"
+
+    def test_disk_writes_are_queued_for_the_writer_thread(self, tmp_path):
+        cache = LLMResponseCache(db_path=str(tmp_path / "cache.sqlite3"))
+        cache._writes.put(("touch", "blocker", 0))  # the writer may be mid-batch; set() must not wait for it
+        cache.set("k", "response")
+        assert cache.get("k") == "response"
+
+        cache.flush()
+        assert cache.get_stats()["disk_entries"] == 1
+        assert cache.get_stats()["pending_writes"] == 0
@@ -0,0 +1,93 @@
+import asyncio
+import pytest
+from app import llm_clients
+from app.ai_service import AIService
+from app.enhanced_nursing_agent import NurseRAGSystem
+from app.llm_clients import LLMClientRegistry, get_llm_clients
+
+
+@pytest.fixture(autouse=True)
+def fresh_registry(monkeypatch):
+    monkeypatch.setattr(llm_clients, "llm_clients", None)
+    monkeypatch.delenv("GOOGLE_AI_API_KEY", raising=False)
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    monkeypatch.delenv("LLM_FAKE_PROVIDER", raising=False)
+
+
+class TestLLMClientRegistry:
+    """Test provider selection and client sharing."""
+
+    def test_provider_order(self):
+        assert LLMClientRegistry().providers() == []
+        assert LLMClientRegistry(google_api_key="g", openai_api_key="o").providers() == ["google", "openai"]
+        assert LLMClientRegistry(openai_api_key="o").providers() == ["openai"]
+        assert LLMClientRegistry(google_api_key="g", use_fake=True).providers() == ["fake"]
+
+    def test_openai_client_is_pooled_and_shared(self):
+        registry = LLMClientRegistry(openai_api_key="test-key", max_connections=8, max_keepalive_connections=4)
+        client = registry.get_client("openai")
+
+        assert registry.get_client("openai") is client
+        pool = client._client._transport._pool
+        assert pool._max_connections == 8
+        assert pool._max_keepalive_connections == 4
+        asyncio.run(registry.aclose())
+
+    def test_rebuilt_when_credentials_change(self, monkeypatch):
+        registry = get_llm_clients()
+        assert get_llm_clients() is registry
+
+        monkeypatch.setenv("LLM_FAKE_PROVIDER", "true")
+        assert get_llm_clients() is not registry
+        assert get_llm_clients().providers() == ["fake"]
+
+    def test_shared_by_ai_service_and_nurse_ranking(self, monkeypatch):
+        monkeypatch.setenv("LLM_FAKE_PROVIDER", "true")
+        rag_system = NurseRAGSystem.__new__(NurseRAGSystem)
+        rag_system.ai_client = None
+        rag_system._init_ai_client()
+
+        assert AIService().client is rag_system.ai_client
+        assert rag_system.ai_provider == "fake"
+
+    def test_nurse_ranking_cache_key_uses_the_serving_model(self, monkeypatch):
+        from app import enhanced_nursing_agent
+        from app.fake_llm import FAKE_MODEL_NAME
+        monkeypatch.setenv("LLM_FAKE_PROVIDER", "true")
+        rag_system = NurseRAGSystem.__new__(NurseRAGSystem)
+        rag_system.ai_client = None
+        rag_system._init_ai_client()
+        models = []
+
+        def make_cache_key(prompt, model_name, version):
+            models.append(model_name)
+            raise RuntimeError("captured")
+
+        monkeypatch.setattr(enhanced_nursing_agent, "make_cache_key", make_cache_key)
+        monkeypatch.setattr(rag_system, "_create_recommendation_prompt", lambda *args: "prompt")
+        monkeypatch.setattr(rag_system, "_fallback_recommendations", lambda *args: [])
+        rag_system._get_llm_recommendations({}, [], 3)
+
+        assert models == [FAKE_MODEL_NAME]
+
+
+class TestWarmUp:
+    """Test startup connection warm-up."""
+
+    def test_failures_are_reported_not_raised(self):
+        registry = LLMClientRegistry(openai_api_key="test-key")
+        client = registry.get_client("openai")
+
+        async def unreachable():
+            raise ConnectionError("connection refused")
+        client.models.list = unreachable
+
+        results = asyncio.run(registry.warm_up(timeout=1))
+        assert results["openai"].startswith("failed")
+        assert registry.get_stats()["warm_up"] == results
+
+    def test_fake_provider_needs_no_warm_up(self):
+        registry = LLMClientRegistry(use_fake=True)
+        registry.get_client("fake")
+
+        assert asyncio.run(registry.warm_up()) == {}
@@ -0,0 +1,88 @@
+import asyncio
+import json
+import pytest
+from app import circuit_breaker, llm_recorder
+from app.ai_service import AIService
+from app.fake_llm import FakeGenerativeModel, FakeLLMBehaviour
+from app.llm_recorder import LLMRecorder, RECORD, REPLAY, ReplayMissError
+from app.models import CaregiverInput, ComprehensivePatientData
+
+
+@pytest.fixture
+def recording_path(tmp_path):
+    return str(tmp_path / "recordings.jsonl")
+
+
+@pytest.fixture
+def record_mode(monkeypatch, recording_path):
+    """Point the global recorder at a temporary file; returns a function switching the mode."""
+    monkeypatch.setenv("LLM_RECORD_PATH", recording_path)
+    monkeypatch.setenv("LLM_CACHE_ENABLED", "false")
+    monkeypatch.setattr(llm_recorder, "llm_recorder", None)
+    monkeypatch.setattr(circuit_breaker, "circuit_breakers", {})
+
+    def set_mode(mode):
+        monkeypatch.setenv("LLM_RECORD_MODE", mode)
+    return set_mode
+
+
+class TestLLMRecorder:
+    """Test the recording file format and replay order."""
+
+    def test_round_trip(self, recording_path):
+        recorder = LLMRecorder(recording_path, mode=RECORD)
+        recorder.record("ai_service", "prompt one", "v1", '{"a": 1}', 0.25)
+        recorder.record("ai_service", "prompt one", "v1", '{"a": 2}', 0.5)
+
+        with open(recording_path) as recording_file:
+            entries = [json.loads(line) for line in recording_file]
+        assert [entry["latency"] for entry in entries] == [0.25, 0.5]
+        assert all("prompt one" not in json.dumps(entry) for entry in entries)
+
+        replayer = LLMRecorder(recording_path, mode=REPLAY)
+        responses = [replayer.replay_blocking("ai_service", "prompt one", "v1") for _ in range(3)]
+        assert responses == ['{"a": 1}', '{"a": 2}', '{"a": 2}']
+        assert replayer.get_stats()["replayed"] == 3
+
+    def test_miss_and_torn_line(self, recording_path):
+        LLMRecorder(recording_path, mode=RECORD).record("ai_service", "prompt", "v1", "{}", 0.1)
+        with open(recording_path, "a") as recording_file:
+            recording_file.write('{"key": "trunc')
+
+        replayer = LLMRecorder(recording_path, mode=REPLAY)
+        assert replayer.replay_blocking("ai_service", "prompt", "v1") == "{}"
+        with pytest.raises(ReplayMissError):
+            replayer.replay_blocking("ai_service", "prompt", "v2")
+        with pytest.raises(ReplayMissError):
+            asyncio.run(replayer.replay("nurse_ranking", "prompt", "v1"))
+        assert replayer.get_stats()["misses"] == 2
+
+
+class TestRecordReplay:
+    """Test recording AIService traffic and replaying it without a provider."""
+
+    def test_replay_matches_recording(self, record_mode):
+        patient = ComprehensivePatientData(
+            patient_id="P001",
+            name="Test Patient",
+            gender="Female",
+            primary_icu_diagnosis="COPD Exacerbation",
+            skilled_nursing_needed="Yes",
+            equipment_needed="Oxygen concentrator"
+        )
+        caregiver_input = CaregiverInput(patient_id="P001", urgency_level="medium", primary_concern="Home oxygen")
+
+        record_mode("record")
+        service = AIService()
+        service.client = FakeGenerativeModel(behaviour=FakeLLMBehaviour(latency_seconds=0))
+        service.ai_provider = "fake"
+        recorded = asyncio.run(service.route_patient(patient, caregiver_input))
+        assert llm_recorder.get_llm_recorder().recorded == 1
+
+        record_mode("replay")
+        service.client = None
+        service.clients = {}
+        replayed = asyncio.run(service.route_patient(patient, caregiver_input))
+
+        assert replayed == recorded
+        assert llm_recorder.get_llm_recorder().get_stats()["replayed"] == 1
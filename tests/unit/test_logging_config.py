@@ -0,0 +1,93 @@
+import io
+import json
+import logging
+import pytest
+from app import logging_config
+from app.logging_config import LoggingPipeline, log_payload
+from app.tracing import Tracer
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    """Pipeline writing JSON to a buffer, attached to a dedicated logger rather than the root logger."""
+    stream = io.StringIO()
+    pipeline = LoggingPipeline(level="DEBUG", payload_sample_rate=1.0, payload_max_chars=50, stream=stream)
+    monkeypatch.setattr(logging_config, "logging_pipeline", pipeline)
+    logger = logging.getLogger("tests.structured")
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    logger.addHandler(pipeline.queue_handler)
+    pipeline.listener.start()
+
+    def records():
+        pipeline.listener.stop()
+        return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+    yield logger, records
+    logger.removeHandler(pipeline.queue_handler)
+
+
+class TestStructuredLogging:
+    """Test JSON records, trace correlation and payload sampling."""
+
+    def test_json_record_with_trace_and_exception(self, pipeline):
+        logger, records = pipeline
+        tracer = Tracer()
+        with tracer.start_trace("GET /api/test") as root:
+            try:
+                raise RuntimeError("boom")
+            except RuntimeError:
+                logger.exception("agent failed", extra={"patient_id": "P001"})
+
+        record = records()[0]
+        assert record["level"] == "ERROR"
+        assert record["message"] == "agent failed"
+        assert record["patient_id"] == "P001"
+        assert record["trace_id"] == root.trace.trace_id
+        assert "RuntimeError: boom" in record["exception"]
+
+    def test_payload_truncated(self, pipeline):
+        logger, records = pipeline
+        log_payload(logger, "nurse recommendations", {"recommendations": ["x" * 100]}, patient_id="P001")
+
+        record = records()[0]
+        assert record["payload_truncated"] is True
+        assert len(record["payload"]) == 51
+        assert record["payload_chars"] > 100
+
+    def test_payload_skipped_without_serializing(self, pipeline, monkeypatch):
+        logger, records = pipeline
+
+        class Unserializable:
+            def __str__(self):
+                raise AssertionError("payload should not be serialized")
+
+        logger.setLevel(logging.INFO)
+        log_payload(logger, "patient context", Unserializable())
+        logger.setLevel(logging.DEBUG)
+        monkeypatch.setattr(logging_config.logging_pipeline, "payload_sample_rate", 0.0)
+        log_payload(logger, "patient context", Unserializable())
+
+        assert records() == []
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        pipeline = LoggingPipeline(queue_size=1, stream=io.StringIO())
+        logger = logging.getLogger("tests.structured.full")
+        logger.propagate = False
+        logger.addHandler(pipeline.queue_handler)
+        try:
+            logger.warning("first")
+            logger.warning("second")
+        finally:
+            logger.removeHandler(pipeline.queue_handler)
+
+        assert pipeline.queue_handler.dropped == 1
+
+    def test_pipeline_not_started_under_pytest(self, monkeypatch):
+        monkeypatch.delenv("LOG_PIPELINE_ENABLED", raising=False)
+        monkeypatch.setattr(logging_config, "logging_pipeline", None)
+        root_handlers = list(logging.getLogger().handlers)
+
+        assert logging_config.configure_logging() is None
+        assert logging_config.logging_pipeline is None
+        assert logging.getLogger().handlers == root_handlers
@@ -0,0 +1,78 @@
+import asyncio
+import pytest
+from app import circuit_breaker, metrics
+from app.ai_service import AIService
+from app.fake_llm import FakeGenerativeModel, FakeLLMBehaviour
+from app.metrics import LLM_CALL_TOKENS, LLM_TOKENS_TOTAL, STAGE_SECONDS, get_metrics, timed
+from app.models import CaregiverInput, ComprehensivePatientData
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    """Fresh global metrics registry with the response cache disabled."""
+    monkeypatch.setenv("LLM_CACHE_ENABLED", "false")
+    monkeypatch.setattr(metrics, "metrics", None)
+    return get_metrics()
+
+
+class TestMetricsRegistry:
+    """Test histogram summaries and Prometheus rendering."""
+
+    def test_summary_percentiles(self, registry):
+        for seconds in [0.1] * 90 + [2.0] * 10:
+            registry.observe(STAGE_SECONDS, seconds, stage="routing")
+        registry.observe(STAGE_SECONDS, 0.5, stage="agent", agent="dme")
+
+        stages = {(entry["stage"], entry.get("agent")): entry for entry in registry.get_summary()[STAGE_SECONDS]}
+        assert stages[("routing", None)]["count"] == 100
+        assert stages[("routing", None)]["p50"] == 0.1
+        assert stages[("routing", None)]["p99"] == 2.0
+        assert stages[("agent", "dme")]["p95"] == 0.5
+
+    def test_prometheus_format(self, registry):
+        registry.observe(STAGE_SECONDS, 0.2, stage="retrieval")
+        registry.increment(LLM_TOKENS_TOTAL, 120, provider="google", direction="prompt")
+
+        text = registry.render_prometheus()
+        assert "# TYPE routing_ai_stage_duration_seconds histogram" in text
+        assert 'routing_ai_stage_duration_seconds_bucket{stage="retrieval",le="0.25"} 1' in text
+        assert 'routing_ai_stage_duration_seconds_bucket{stage="retrieval",le="+Inf"} 1' in text
+        assert 'routing_ai_stage_duration_seconds_count{stage="retrieval"} 1' in text
+        assert 'routing_ai_llm_tokens_total{direction="prompt",provider="google"} 120' in text
+        assert text.count("# TYPE routing_ai_stage_duration_seconds ") == 1
+
+    def test_timed_sync_and_async(self, registry):
+        @timed("form_generation", agent="pharmacy")
+        def build_form():
+            return "form"
+
+        @timed("routing")
+        async def route():
+            return "decision"
+
+        assert build_form() == "form"
+        assert asyncio.run(route()) == "decision"
+        labels = {(entry["stage"], entry.get("agent")) for entry in registry.get_summary()[STAGE_SECONDS]}
+        assert labels == {("form_generation", "pharmacy"), ("routing", None)}
+
+
+class TestPipelineMetrics:
+    """Test that AIService records stage latency and per-call token counts."""
+
+    def test_routing_records_stage_and_tokens(self, registry, monkeypatch):
+        monkeypatch.setattr(circuit_breaker, "circuit_breakers", {})
+        service = AIService()
+        service.client = FakeGenerativeModel(behaviour=FakeLLMBehaviour(latency_seconds=0))
+        service.ai_provider = "fake"
+        patient = ComprehensivePatientData(patient_id="P001", name="Test Patient", gender="Male",
+                                           primary_icu_diagnosis="Pneumonia", skilled_nursing_needed="Yes")
+        caregiver_input = CaregiverInput(patient_id="P001", urgency_level="high", primary_concern="Follow-up")
+
+        asyncio.run(service.route_patient(patient, caregiver_input))
+
+        summary = registry.get_summary()
+        assert [entry["stage"] for entry in summary[STAGE_SECONDS]] == ["routing"]
+        prompt_tokens = [entry for entry in summary[LLM_CALL_TOKENS] if entry["direction"] == "prompt"]
+        assert prompt_tokens[0]["provider"] == "fake" and prompt_tokens[0]["count"] == 1
+        totals = {entry["direction"]: entry["value"] for entry in summary[LLM_TOKENS_TOTAL]}
+        assert totals["prompt"] > 100 and totals["response"] > 0
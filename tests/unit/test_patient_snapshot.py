@@ -0,0 +1,55 @@
+import os
+import pandas as pd
+import pytest
+from app import data_service as data_service_module
+from app.data_service import PARSER_SCHEMA, DataService
+from app.models import ComprehensivePatientData
+from app.patient_snapshot import PatientSnapshotCache
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    path = tmp_path / "census.xlsx"
+    pd.DataFrame({"PatientID": ["P1", "P2"], "Name": ["Ann", "Bob"], "Gender": ["Female", "Male"]}).to_excel(path, index=False)
+    return str(path)
+
+
+@pytest.fixture
+def snapshots(tmp_path, monkeypatch):
+    cache = PatientSnapshotCache(str(tmp_path / "snapshots"))
+    monkeypatch.setattr(data_service_module, "get_patient_snapshots", lambda: cache)
+    return cache
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(DataService, "_auto_load_data", lambda self: None)
+    return DataService()
+
+
+class TestPatientSnapshotCache:
+    """Test snapshot reuse and invalidation."""
+
+    def test_second_load_skips_excel(self, service, workbook, snapshots, monkeypatch):
+        first = service._load_excel_file(workbook)
+
+        monkeypatch.setattr(pd, "read_excel", lambda *args, **kwargs: pytest.fail("workbook re-read"))
+        second = service._load_excel_file(workbook)
+
+        assert second == first
+        assert service.load_progress["mode"] == "snapshot" and service.load_progress["status"] == "loaded"
+        assert snapshots.get_stats()["hits"] == 1 and snapshots.get_stats()["writes"] == 1
+
+    def test_changed_source_is_stale(self, service, workbook, snapshots):
+        snapshots.store(workbook, PARSER_SCHEMA, [ComprehensivePatientData(patient_id="P1", name="Old", gender="Female",
+                                                                        primary_icu_diagnosis="")])
+        stat = os.stat(workbook)
+        os.utime(workbook, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+        assert snapshots.load(workbook, PARSER_SCHEMA) is None
+        assert service._load_excel_file(workbook)[1].name == "Bob"
+        assert snapshots.get_stats()["stale"] == 2
+
+    def test_schema_change_is_stale(self, workbook, snapshots):
+        snapshots.store(workbook, "old-schema", [])
+        assert snapshots.load(workbook, PARSER_SCHEMA) is None
@@ -0,0 +1,125 @@
+import asyncio
+import pytest
+from app.rate_limiter import (
+    ProviderRateLimiter, RateLimitTimeout, TokenBucket, is_rate_limit_error
+)
+
+
+class RateLimitError(Exception):
+    """Stand-in for the OpenAI SDK's 429 error type."""
+    status_code = 429
+
+
+class TestTokenBucket:
+    """Test token bucket accounting."""
+
+    def test_consume_and_wait(self):
+        bucket = TokenBucket(rate_per_minute=60)
+        assert bucket.time_until_available(60) == 0
+
+        bucket.consume(60)
+        # One token per second refill rate
+        assert 0.9 < bucket.time_until_available(1) <= 1.0
+
+
+class TestProviderRateLimiter:
+    """Test queueing, retries and adaptive concurrency."""
+
+    def test_rate_limit_error_detection(self):
+        assert is_rate_limit_error(RateLimitError("too many"))
+        assert is_rate_limit_error(Exception("429 Resource has been exhausted (e.g. check quota)"))
+        assert not is_rate_limit_error(ValueError("bad json"))
+
+    def test_queues_when_bucket_empty(self):
+        limiter = ProviderRateLimiter("test", requests_per_minute=600, max_concurrency=10)
+        limiter.request_bucket.consume(600)
+
+        async def call():
+            return "ok"
+
+        async def run():
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            result = await limiter.run(call, estimated_tokens=10)
+            return result, loop.time() - start
+
+        result, elapsed = asyncio.run(run())
+        assert result == "ok"
+        # 600/min refills one request every 0.1s
+        assert elapsed >= 0.08
+
+    def test_times_out_instead_of_waiting_forever(self):
+        limiter = ProviderRateLimiter("test", requests_per_minute=1, max_wait=0.1)
+        limiter.request_bucket.consume(1)
+
+        with pytest.raises(RateLimitTimeout):
+            asyncio.run(limiter.acquire(estimated_tokens=10))
+
+    def test_retries_429_and_halves_concurrency(self, monkeypatch):
+        limiter = ProviderRateLimiter("test", max_concurrency=8, max_retries=2)
+        monkeypatch.setattr(limiter, "_backoff", lambda attempt: 0)
+        attempts = []
+
+        def flaky():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise RateLimitError("slow down")
+            return "ok"
+
+        assert limiter.run_blocking(flaky, estimated_tokens=10) == "ok"
+        stats = limiter.get_stats()
+        assert stats["retries"] == 1
+        assert stats["rate_limited_responses"] == 1
+        assert stats["concurrency_limit"] < 8
+        assert stats["in_flight"] == 0
+
+    def test_non_rate_limit_errors_are_not_retried(self):
+        limiter = ProviderRateLimiter("test")
+
+        def broken():
+            raise ValueError("bad request")
+
+        with pytest.raises(ValueError):
+            limiter.run_blocking(broken, estimated_tokens=10)
+        assert limiter.get_stats()["retries"] == 0
+
+    def test_cancelled_calls_release_their_slot(self):
+        limiter = ProviderRateLimiter("test", max_concurrency=2, max_wait=0.5)
+
+        async def hang():
+            await asyncio.sleep(10)
+
+        async def run():
+            tasks = [asyncio.create_task(limiter.run(hang, estimated_tokens=10)) for _ in range(2)]
+            await asyncio.sleep(0.01)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+            async def call():
+                return "ok"
+            return await limiter.run(call, estimated_tokens=10)
+
+        assert asyncio.run(run()) == "ok"
+        stats = limiter.get_stats()
+        assert stats["in_flight"] == 0
+        assert stats["concurrency_limit"] == 2
+
+    def test_waiters_wake_when_slot_frees(self):
+        limiter = ProviderRateLimiter("test", max_concurrency=1, max_wait=2)
+
+        async def short():
+            await asyncio.sleep(0.05)
+            return "ok"
+
+        async def run():
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            results = await asyncio.gather(*(limiter.run(short, estimated_tokens=10) for _ in range(3)))
+            return results, loop.time() - start
+
+        results, elapsed = asyncio.run(run())
+        assert results == ["ok"] * 3
+        # Served back to back as slots free up, not on a polling interval
+        assert elapsed < 0.5
+        assert limiter._waiters == []
@@ -0,0 +1,81 @@
+import asyncio
+from app.models import AgentType, CaregiverInput, RoutingDecision
+from app.speculation import SpeculationStats, route_with_speculation
+
+
+class FakeAIService:
+    """Routes to a fixed agent set after a delay; predicts a different fixed set."""
+
+    def __init__(self, predicted, routed, routing_delay=0.05):
+        self.predicted = predicted
+        self.routed = routed
+        self.routing_delay = routing_delay
+
+    def predict_agents(self, patient_data, caregiver_input):
+        return self.predicted
+
+    async def route_patient(self, patient_data, caregiver_input):
+        await asyncio.sleep(self.routing_delay)
+        return RoutingDecision(
+            patient_id="P001",
+            recommended_agents=self.routed,
+            reasoning="test",
+            priority_score=5,
+            estimated_timeline="24 hours"
+        )
+
+
+def make_runner(started):
+    async def run_agent(agent_type, patient_data, caregiver_input):
+        started.append(agent_type)
+        await asyncio.sleep(0.1)
+        return agent_type.value
+    return run_agent
+
+
+CAREGIVER_INPUT = CaregiverInput(patient_id="P001", urgency_level="medium", primary_concern="test")
+
+
+class TestRouteWithSpeculation:
+    """Test speculative agent prefetch."""
+
+    def test_keeps_confirmed_cancels_rest_and_starts_missed(self):
+        ai_service = FakeAIService(
+            predicted=[AgentType.NURSING, AgentType.DME],
+            routed=[AgentType.NURSING, AgentType.PHARMACY]
+        )
+        stats = SpeculationStats()
+        started = []
+
+        async def run():
+            routing, tasks = await route_with_speculation(
+                ai_service, None, CAREGIVER_INPUT, make_runner(started), stats
+            )
+            return routing, await asyncio.gather(*tasks.values())
+
+        routing, results = asyncio.run(run())
+
+        assert results == ["nursing", "pharmacy"]
+        assert started == [AgentType.NURSING, AgentType.DME, AgentType.PHARMACY]
+        summary = stats.get_stats()
+        assert summary["launched"] == 2
+        assert summary["confirmed"] == 1
+        assert summary["cancelled"] == 1
+        assert summary["missed"] == 1
+        assert summary["hit_rate"] == 0.5
+
+    def test_speculation_overlaps_routing(self):
+        agents = [AgentType.NURSING, AgentType.STATE]
+        ai_service = FakeAIService(predicted=agents, routed=agents, routing_delay=0.1)
+        stats = SpeculationStats()
+
+        async def run():
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            _, tasks = await route_with_speculation(ai_service, None, CAREGIVER_INPUT, make_runner([]), stats)
+            await asyncio.gather(*tasks.values())
+            return loop.time() - start
+
+        # Routing (0.1s) and agents (0.1s) overlap instead of adding up
+        assert asyncio.run(run()) < 0.18
+        assert stats.get_stats()["precision"] == 1.0
@@ -0,0 +1,91 @@
+import pytest
+from app.models import AgentType
+from app.structured_output import (
+    AGENT_PARSERS, PACKED_ROUTING_RESPONSE_PARSER, ROUTING_PARSER, StructuredOutputError, StructuredOutputParser, RoutingOutput,
+    load_json, parse_agent_output, parse_packed_routing, repair_json
+)
+
+
+class TestRepairJson:
+    """Test the local repair pass."""
+
+    def test_code_fence_and_prose(self):
+        text = 'Here is the plan:\n```json\n{"a": 1}\n```\nLet me know!'
+        assert load_json(text) == ({"a": 1}, True)
+
+    def test_trailing_commas_and_python_literals(self):
+        data, repaired = load_json('{"a": [1, 2,], "b": True, "c": None,}')
+        assert repaired
+        assert data == {"a": [1, 2], "b": True, "c": None}
+
+    def test_literals_inside_strings_untouched(self):
+        data, _ = load_json('{"note": "True story, None left",}')
+        assert data == {"note": "True story, None left"}
+
+    def test_truncated_output_is_closed(self):
+        data, _ = load_json('{"recommendations": ["Call agency", "Schedule vis')
+        assert data == {"recommendations": ["Call agency", "Schedule vis"]}
+
+    def test_raw_newline_in_string(self):
+        assert load_json(repair_json('{"a": "line one\nline two"}'))[0] == {"a": "line one\nline two"}
+
+    def test_unrecoverable_raises(self):
+        with pytest.raises(StructuredOutputError):
+            load_json("I cannot help with that.")
+
+
+class TestParsers:
+    """Test schema validation of parsed output."""
+
+    def test_routing_normalizes_agent_case(self):
+        routing = ROUTING_PARSER.parse(
+            '{"recommended_agents": ["DME", "Nursing"], "reasoning": "r", "priority_score": "7", "estimated_timeline": "t"}'
+        )
+        assert routing.recommended_agents == [AgentType.DME, AgentType.NURSING]
+        assert routing.priority_score == 7
+
+    def test_routing_out_of_range_priority_rejected(self):
+        with pytest.raises(StructuredOutputError):
+            ROUTING_PARSER.parse(
+                '{"recommended_agents": ["dme"], "reasoning": "r", "priority_score": 42, "estimated_timeline": "t"}'
+            )
+
+    def test_agent_output_keeps_extra_structured_fields(self):
+        result = parse_agent_output(AgentType.DME, '''{
+            "structured_data": {"equipment_category": "respiratory", "setup_training_needed": "yes", "oxygen_lpm": 2},
+            "recommendations": ["Schedule delivery"],
+            "next_steps": ["Call supplier"]
+        }''')
+        assert result["structured_data"] == {
+            "equipment_category": "respiratory", "setup_training_needed": True, "oxygen_lpm": 2
+        }
+        assert result["external_referrals"] == []
+
+    def test_agent_output_missing_fields_rejected(self):
+        with pytest.raises(StructuredOutputError):
+            parse_agent_output(AgentType.STATE, '{"recommendations": ["Submit prior auth"]}')
+
+    def test_packed_routing_accepts_wrapper_or_array(self):
+        assert parse_packed_routing('{"decisions": [{"patient_id": "1"}]}') == [{"patient_id": "1"}]
+        assert parse_packed_routing('[{"patient_id": "1"}]') == [{"patient_id": "1"}]
+
+    def test_outcome_counters(self):
+        parser = StructuredOutputParser("test_routing", RoutingOutput)
+        valid = '{"recommended_agents": ["state"], "reasoning": "r", "priority_score": 3, "estimated_timeline": "t"}'
+        parser.parse(valid)
+        parser.parse(valid + " trailing prose")
+        with pytest.raises(StructuredOutputError):
+            parser.parse("not json")
+
+        stats = parser.get_stats()
+        assert (stats["parsed"], stats["repaired"], stats["failed"]) == (1, 1, 1)
+
+    def test_inline_schema_for_gemini(self):
+        schema = PACKED_ROUTING_RESPONSE_PARSER.inline_schema()
+        entry = schema["properties"]["decisions"]["items"]
+        assert "$ref" not in str(schema) and "title" not in str(schema)
+        assert entry["properties"]["recommended_agents"]["items"]["enum"] == ["nursing", "dme", "pharmacy", "state"]
+        assert "patient_id" in entry["required"]
+
+        state_data = AGENT_PARSERS[AgentType.STATE].inline_schema()["properties"]["structured_data"]
+        assert state_data["properties"]["prior_auth_required"] == {"type": "boolean", "nullable": True}
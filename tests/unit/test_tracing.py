@@ -0,0 +1,85 @@
+import asyncio
+import json
+import pytest
+from app import circuit_breaker
+from app.ai_service import AIService
+from app.fake_llm import FakeGenerativeModel, FakeLLMBehaviour
+from app.llm_executor import run_blocking
+from app.models import CaregiverInput, ComprehensivePatientData
+from app.tracing import Tracer, span, traced
+
+
+@pytest.fixture
+def tracer(tmp_path):
+    return Tracer(export_path=str(tmp_path / "traces.jsonl"))
+
+
+class TestSpans:
+    """Test span nesting across tasks and worker threads."""
+
+    def test_no_op_outside_trace(self):
+        with span("orphan") as orphan:
+            assert orphan is None
+
+    def test_nesting_across_tasks_and_threads(self, tracer):
+        @traced("blocking_step")
+        def blocking_step():
+            return "done"
+
+        @traced("agent")
+        async def agent():
+            return await run_blocking(blocking_step)
+
+        async def request():
+            with tracer.start_trace("POST /api/test") as root:
+                await asyncio.gather(agent(), agent())
+                return root
+
+        root = asyncio.run(request())
+        spans = {span.span_id: span for span in root.trace.spans}
+        agents = [span for span in spans.values() if span.name == "agent"]
+        steps = [span for span in spans.values() if span.name == "blocking_step"]
+
+        assert len(agents) == 2 and all(span.parent_id == root.span_id for span in agents)
+        assert {span.parent_id for span in steps} == {span.span_id for span in agents}
+
+    def test_error_status_and_export(self, tracer):
+        with pytest.raises(ValueError):
+            with tracer.start_trace("POST /api/fail"):
+                with span("failing_step"):
+                    raise ValueError("bad input")
+        tracer.shutdown()
+
+        with open(tracer.export_path) as export_file:
+            body = json.loads(export_file.readline())
+        spans = body["resourceSpans"][0]["scopeSpans"][0]["spans"]
+        failing = next(span for span in spans if span["name"] == "failing_step")
+        assert failing["status"] == {"code": 2, "message": "ValueError: bad input"}
+        assert len(failing["traceId"]) == 32 and len(failing["spanId"]) == 16
+        assert tracer.get_stats()["traces_exported"] == 1
+
+
+class TestPipelineSpans:
+    """Test the spans produced by AIService."""
+
+    def test_route_patient_spans(self, tracer, monkeypatch):
+        monkeypatch.setenv("LLM_CACHE_ENABLED", "false")
+        monkeypatch.setattr(circuit_breaker, "circuit_breakers", {})
+        service = AIService()
+        service.client = FakeGenerativeModel(behaviour=FakeLLMBehaviour(latency_seconds=0))
+        service.ai_provider = "fake"
+        patient = ComprehensivePatientData(patient_id="P001", name="Test Patient", gender="Female",
+                                           primary_icu_diagnosis="Heart Failure", skilled_nursing_needed="Yes")
+        caregiver_input = CaregiverInput(patient_id="P001", urgency_level="high", primary_concern="Follow-up")
+
+        async def request():
+            with tracer.start_trace("POST /api/route-patient") as root:
+                await service.route_patient(patient, caregiver_input)
+                return root
+
+        root = asyncio.run(request())
+        summary = tracer.get_trace(root.trace.trace_id)
+        assert [(span["name"], span["depth"]) for span in summary["spans"]] == [
+            ("POST /api/route-patient", 0), ("route_patient", 1), ("_call_ai", 2), ("_call_provider", 3)
+        ]
+        assert summary["spans"][3]["attributes"]["llm.provider"] == "fake"